@@ -1 +1,21 @@
-from .boiler import from_conf
+# Modules are imported on first use, so that importing the package is fast
+_lazy = {
+    "from_conf": "boiler",
+    "Boiler": "boiler",
+    "AmbiantSensor": "ambiant_sensor",
+    "Touch": "touch",
+    "TouchError": "touch",
+    "OpMode": "touch",
+}
+
+
+def __getattr__(name):
+    if name not in _lazy:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    return getattr(import_module(f".{_lazy[name]}", __name__), name)
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_lazy))
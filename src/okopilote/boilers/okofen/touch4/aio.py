@@ -0,0 +1,305 @@
+"""
+Asyncio interface for the Pelletronic Touch v4.
+
+The HTTP client is a minimal persistent HTTP/1.1 client built on asyncio
+streams, which is all the Touch JSON interface needs and, unlike most HTTP
+libraries, keeps the trailing "?" of meta data queries.
+"""
+
+import asyncio
+import logging
+from urllib.parse import urlsplit
+
+from .boiler import Boiler
+from .decoder import ENCODING
+from .polling import AdaptivePoller
+from .recorder import Recorder
+from .touch import BaseTouch, TouchError, TouchUnavailable
+from .transport import ResponseHead
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTouch(BaseTouch):
+    """
+    Asyncio interface for the Pelletronic Touch v4, Oekofen JSON Interface
+    V4.00b. Create instances with `await AsyncTouch.open(...)`.
+
+    Property setters only update the cache and buffer the write request: call
+    flush() to send buffered writes, or rollback() to discard them. Expired
+    values are served as is: call refresh() to reload them.
+    """
+
+    def __init__(self, url, password, **kwargs):
+        """See BaseTouch for arguments."""
+        super().__init__(url, password, **kwargs)
+        split = urlsplit(self.api_url)
+        self._host = split.hostname
+        self._port = split.port or 80
+        self._netloc = split.netloc
+        self._path = split.path
+        self._reader = None
+        self._writer = None
+
+    @classmethod
+    async def open(cls, url, password, **kwargs):
+        """Create an AsyncTouch and load its meta data."""
+        touch = cls(url, password, **kwargs)
+        await touch.load_meta()
+        return touch
+
+    async def close(self):
+        """Close the connection to the Touch."""
+        if self._writer is not None:
+            self._writer.close()
+            self._reader, self._writer = None, None
+
+    async def _http_get(self, target):
+        """Send a GET request for target and return (status, body)."""
+
+        fresh = False
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self._host, self._port), self.timeout[0]
+            )
+            fresh = True
+        try:
+            self._writer.write(
+                f"GET {self._path}{target} HTTP/1.1\r\n"
+                f"Host: {self._netloc}\r\n\r\n".encode(ENCODING)
+            )
+            await self._writer.drain()
+            return await asyncio.wait_for(self._read_response(), self.timeout[1])
+        except (ConnectionError, asyncio.IncompleteReadError):
+            await self.close()
+            if fresh:
+                raise
+            # The Touch closed the idle connection: retry on a new one
+            logger.debug("Connection to Touch lost, reconnect")
+            return await self._http_get(target)
+        except asyncio.TimeoutError:
+            await self.close()
+            raise
+
+    async def _read_response(self):
+        head = ResponseHead(await self._reader.readline())
+        while head.feed(await self._reader.readline()):
+            pass
+        length, close = head.length, head.close
+        if length is None:
+            body = await self._reader.read()
+            close = True
+        else:
+            body = await self._reader.readexactly(length)
+        if close:
+            await self.close()
+        return head.status, body
+
+    async def _request_touch(
+        self, target, to_json=True, keep=None, _allow_recursion=True
+    ):
+        """
+        Send a request to the Pelletronic Touch and return the response,
+        keeping only keep (see decoder.decode_sections()).
+        """
+
+        if _allow_recursion:
+            self._check_breaker()
+        # Touch enforces some delay before each request: the scheduler, shared
+        # by every client of the Touch, holds the request back until the
+        # delay is over. The breaker is checked again once in the slot, see
+        # Touch._request_touch().
+        check = self._check_breaker if _allow_recursion else None
+        async with self.scheduler.async_slot(check):
+            self._count("requests")
+            try:
+                with self._span("request"):
+                    status, body = await self._http_get(target)
+            except Exception:
+                self._count("request_errors")
+                self.breaker.record_failure()
+                raise
+        self._count("received_bytes", len(body))
+        if status != 401:
+            self.breaker.record_success()
+        if to_json and status < 400:
+            return self._decode_json(body, keep)
+        text = body.decode(ENCODING)
+        if status == 401 and _allow_recursion:
+            self._count("rejections")
+            delay = self._throttle_delay(text)
+            if delay is not None:
+                # Retry once the (newly learnt) delay is over
+                self.scheduler.record_throttle(delay)
+            else:
+                await asyncio.sleep(self._rejection_backoff())
+            self._count("retries")
+            return await self._request_touch(
+                target, to_json, keep, _allow_recursion=False
+            )
+        if status >= 400:
+            self._count("request_errors")
+            raise TouchError(f"HTTP error {status} for {target}: {text}")
+        return text
+
+    async def load_meta(self, refresh=False):
+        """
+        Load meta data from the cache if any and valid, otherwise query them
+        from Touch and store them. Set refresh to bypass the cache.
+        """
+
+        if not refresh and self._load_cached_meta():
+            return
+        logger.debug("Load meta data from Touch")
+        self._store_meta(await self._request_touch("all?", keep=self._kept("all?")))
+
+    async def load_data(self, attribute="all", keep=()):
+        """
+        Query attribute or all data from Touch and and cache them. keep lists
+        names to keep from all data besides the keep argument of the Touch.
+        """
+
+        await self._load_data(attribute, keep)
+        self._notify()
+
+    async def _load_data(self, attribute, keep=()):
+        logger.debug(f"Load {attribute} data from Touch")
+        q = self._data_query(attribute)
+        data = await self._request_touch(q, keep=self._kept(q, keep))
+        self._record_cost(q, self.scheduler.last_network_time)
+        if self._meta_outdated(q, data):
+            await self.load_meta(refresh=True)
+        self._store_data(attribute, data)
+
+    async def load_many(self, names):
+        """
+        Query several attributes and/or device sections from Touch with the
+        cheapest plan, and cache them. See BaseTouch.resolve() for names.
+        """
+
+        queries = self._query_plan(names)
+        logger.debug(f"Load {', '.join(queries)} data from Touch")
+        try:
+            for q in queries:
+                await self._load_data(q, keep=names)
+        finally:
+            self._notify()
+
+    async def refresh(self, names=None, max_age=None):
+        """
+        Reload, in one batch, the values of names (default: every value read
+        so far) older than max_age (default: their TTL). Return the names of
+        reloaded values.
+        """
+
+        expired = self._expired_names(names, max_age)
+        if expired:
+            await self.load_many(expired)
+        return expired
+
+    def _buffering(self):
+        return True
+
+    async def _write(self, request):
+        logger.info(f"Set {request}")
+        if not self.readonly:
+            self._check_write(
+                request, await self._request_touch(request, to_json=False)
+            )
+        else:
+            logger.warning(f"Cant’t set {request}: read only mode")
+
+    async def flush(self):
+        """
+        Send buffered writes in one ordered pass. If a write fails, the cached
+        values of writes not sent are restored before raising.
+        """
+
+        sent = set()
+        try:
+            for key, request in self._pending_writes():
+                await self._write(request)
+                sent.add(key)
+        finally:
+            self._end_transaction(sent)
+
+
+class AsyncBoiler(Boiler):
+    """
+    Boiler driven by an AsyncTouch. acquire(), force_heating() and
+    release_heating() are coroutines; create instances with
+    `await AsyncBoiler.open(...)`. acquire() records acquired data, polls
+    adaptively and confirms refusals of control like Boiler.acquire().
+    """
+
+    def __init__(self, touch, room_t_set_max=22.0, record=None, adaptive_polling=False):
+        self.touch = touch
+        self.recorder = None if record is None else Recorder(record)
+        self._init_state(room_t_set_max)
+        self.poller = AdaptivePoller(self) if adaptive_polling else None
+
+    @classmethod
+    async def open(
+        cls,
+        url,
+        password,
+        readonly=False,
+        room_t_set_max=22.0,
+        meta_cache=None,
+        record=None,
+        adaptive_polling=False,
+    ):
+        """Create an AsyncBoiler and its AsyncTouch."""
+        touch = await AsyncTouch.open(
+            url, password, readonly=readonly, meta_cache=meta_cache
+        )
+        return cls(
+            touch,
+            room_t_set_max=room_t_set_max,
+            record=record,
+            adaptive_polling=adaptive_polling,
+        )
+
+    async def acquire(self):
+        try:
+            if self.poller is None:
+                await self.touch.load_many(self._acquired)
+            elif not await self.poller.acquire_async():
+                if self._refusal_due():
+                    await self.touch.load_data("hk1.mode_auto")
+                return
+        # asyncio.TimeoutError is no OSError before Python 3.11
+        except (TouchUnavailable, OSError, asyncio.TimeoutError) as e:
+            self._acquire_failed(e)
+            return
+        self.stale = False
+        self.acquire_error = None
+        if self.recorder is not None:
+            self.recorder.record(self.touch)
+
+    async def close(self):
+        if self.recorder is not None:
+            self.recorder.close()
+        await self.touch.close()
+
+    async def force_heating(self, delta=0.0):
+        """
+        Force heating room by setting the heating circuit operation mode to
+        "heating" and by rising the temperature set high enough + delta.
+        """
+
+        self._force_hc_op_mode()
+        self._force_room_setpoint(delta)
+        await self.touch.flush()
+        self.forcing = True
+
+    async def release_heating(self):
+        """
+        Restore the Pelletronic operation mode and temperature set to their
+        values before the enforcement.
+        """
+
+        self._release_hc_op_mode()
+        self._release_room_setpoint()
+        await self.touch.flush()
+        self.forcing = False
@@ -1,19 +1,50 @@
+import logging
+import math
+
 from okopilote.devices.common.abstract import AbstractTemperatureSensor
 
-from .touch import Touch
+from . import meta_cache
+from .registry import get_touch, release_touch
+from .touch import TouchUnavailable
+
+logger = logging.getLogger(__name__)
 
 
 def from_conf(conf):
-    return AmbiantSensor(url=conf.get("url"), password=conf.get("password"))
+    conf.setdefault("max_age", "10.0")
+    return AmbiantSensor(
+        url=conf.get("url"),
+        password=conf.get("password"),
+        meta_cache=meta_cache.from_conf(conf),
+        max_age=conf.getfloat("max_age"),
+    )
 
 
 class AmbiantSensor(AbstractTemperatureSensor):
 
-    def __init__(self, url, password):
-        self._touch = Touch(url, password, readonly=True)
+    def __init__(self, url, password, meta_cache=None, max_age=10.0):
+        self._touch = get_touch(url, password, readonly=True, meta_cache=meta_cache)
+        # Do not query the Touch if temperature was loaded (possibly by another
+        # user of the shared Touch) less than max_age seconds ago.
+        self.max_age = max_age
+        # Whether the last temperature is the last known one, the Touch being
+        # unreachable
+        self.stale = False
 
     @property
     def temperature(self):
-        # Refresh then return value
-        self._touch.load_data("room_t")
+        # Refresh if needed then return value
+        try:
+            self._touch.refresh(["room_t"], max_age=self.max_age)
+        except (TouchUnavailable, OSError) as e:
+            if math.isinf(self._touch.age("room_t")):
+                raise
+            logger.warning(f"Can't refresh temperature, use last known one: {e}")
+            self.stale = True
+        else:
+            self.stale = False
         return self._touch.room_t
+
+    def close(self):
+        """Release the Touch connection, shared with other adapters."""
+        release_touch(self._touch)
@@ -1,9 +1,15 @@
 import logging
-from time import sleep
+import math
+from time import monotonic
 
 from okopilote.devices.common.abstract import AbstractBoiler
 
-from .touch import Touch, OpMode
+from . import meta_cache, metrics
+from .metrics import registry, release_registry, serve_registry, timed
+from .polling import AdaptivePoller
+from .recorder import Recorder
+from .registry import get_touch, release_touch
+from .touch import OpMode, TouchUnavailable
 
 logger = logging.getLogger(__name__)
 
@@ -11,84 +17,294 @@ logger = logging.getLogger(__name__)
 def from_conf(conf):
     conf.setdefault("readonly", "no")
     conf.setdefault("room_t_set_max", "22.0")
+    conf.setdefault("compact", "no")
+    conf.setdefault("trim", "no")
+    conf.setdefault("history", "0")
+    conf.setdefault("transport", "requests")
+    conf.setdefault("metrics", "no")
+    conf.setdefault("adaptive_polling", "no")
     return Boiler(
         url=conf.get("url"),
         password=conf.get("password"),
         readonly=conf.getboolean("readonly"),
         room_t_set_max=conf.getfloat("room_t_set_max"),
+        meta_cache=meta_cache.from_conf(conf),
+        ttl=_parse_ttl(conf.get("ttl", "")),
+        timeout=tuple(float(t) for t in conf.get("timeout", "10, 40").split(",")),
+        compact=conf.getboolean("compact"),
+        trim=conf.getboolean("trim"),
+        history=conf.getint("history"),
+        record=conf.get("record"),
+        transport=conf.get("transport"),
+        metrics=metrics.registry if conf.getboolean("metrics") else None,
+        adaptive_polling=conf.getboolean("adaptive_polling"),
+        metrics_port=conf.getint("metrics_port", fallback=None),
     )
 
 
+def _parse_ttl(text):
+    """Parse "name:seconds, ..." into a dict of time to live."""
+    ttl = {}
+    for item in text.split(","):
+        if item.strip():
+            name, _, seconds = item.partition(":")
+            ttl[name.strip()] = float(seconds)
+    return ttl
+
+
 class Boiler(AbstractBoiler):
 
-    def __init__(self, url, password, readonly=False, room_t_set_max=22.0):
-        self.touch = Touch(url, password, readonly=readonly)
+    # Touch data used by the boiler logic, loaded by acquire()
+    _acquired = [
+        "pe1.L_state",
+        "boiler_flow_t",
+        "boiler_flow_t_set",
+        "hk1.mode_auto",
+        "hk1.L_pump",
+        "hc_flow_t_set",
+        "room_t",
+        "room_t_set",
+    ]
+
+    # Attributes of every heating circuit and burner, loaded by acquire() too:
+    # decisions on heat generation take every burner into account, and the
+    # adaptive poller the state of every unit
+    _circuit_attrs = ["L_pump"]
+    _burner_attrs = ["L_state", "L_temp_act", "L_temp_set"]
+
+    # Rise of the room temperature setpoint above the room temperature when
+    # forcing heat: start_shift to switch the heating circuit on, keep_shift
+    # to keep it heating, which is told by a flow temperature setpoint above
+    # heating_flow_t_set
+    start_shift = 1.2
+    keep_shift = 0.3
+    heating_flow_t_set = 20
+    # Room temperature setpoint restored when releasing heat
+    release_room_t_set = 16.0
+
+    # Delay between a refusal of control and its confirmation, in seconds
+    confirm_delay = 1.0
+
+    # Port serving the metrics registry until close(), if any
+    metrics_port = None
+
+    def __init__(
+        self,
+        url,
+        password,
+        readonly=False,
+        room_t_set_max=22.0,
+        meta_cache=None,
+        ttl=None,
+        timeout=(10, 40),
+        compact=False,
+        trim=False,
+        history=0,
+        record=None,
+        transport="requests",
+        metrics=None,
+        adaptive_polling=False,
+        metrics_port=None,
+    ):
+        """
+        metrics_port: serve the shared metrics registry (see metrics module)
+        on this port until close(). metrics default then to the registry.
+        """
+
+        if metrics_port is not None and metrics is None:
+            metrics = registry
+        self.touch = get_touch(
+            url,
+            password,
+            readonly=readonly,
+            meta_cache=meta_cache,
+            ttl=ttl,
+            timeout=timeout,
+            compact=compact,
+            # Only keep what the boiler logic uses from Touch payloads
+            keep=self._acquired if trim else None,
+            history=history,
+            transport=transport,
+            metrics=metrics,
+        )
+        # Log of acquired data, see recorder module
+        self.recorder = None if record is None else Recorder(record)
+        self._init_state(room_t_set_max)
+        # Poll rate and polled data depending on the boiler state
+        self.poller = AdaptivePoller(self) if adaptive_polling else None
+        if metrics_port is not None:
+            serve_registry(metrics_port)
+            self.metrics_port = metrics_port
+
+    def _init_state(self, room_t_set_max):
         self.room_t_set_max = room_t_set_max
+        touch = self.touch
+        self._acquired = list(
+            dict.fromkeys(
+                self._acquired
+                + touch.circuits.names(self._circuit_attrs)
+                + touch.burners.names(self._burner_attrs)
+            )
+        )
         # Backup Pelletronic op mode and temperature setpoint to be able
         # to restore those values after enforcing
         self.bk_op_mode = None
         self.force_op_mode = None
         self.bk_room_t_set = None
         self.force_room_t_set = None
+        # Whether heat is forced: from force_heating() to release_heating()
+        self.forcing = False
+        # When the boiler was first seen refusing control, the refusal being
+        # confirmed by the op mode acquired confirm_delay seconds later
+        self._refused_since = None
+        # Whether the last acquisition failed, decisions being taken from
+        # the last known values, and why
+        self.stale = False
+        self.acquire_error = None
+
+    @property
+    def metrics(self):
+        """Metrics of the Touch, timing decisions too (see metrics module)."""
+        return self.touch.metrics
 
+    @timed("boiler")
     def acquire(self):
-        self.touch.load_data()
+        """
+        Load the data used by the boiler logic. With adaptive polling, the
+        Touch is only queried when a poll is due (see polling module), or to
+        confirm a refusal of control.
+        """
+
+        try:
+            if self.poller is None:
+                self.touch.load_many(self._acquired)
+            elif not self.poller.acquire():
+                self._confirm_refusal()
+                return
+        except (TouchUnavailable, OSError) as e:
+            self._acquire_failed(e)
+            return
+        self.stale = False
+        self.acquire_error = None
+        if self.recorder is not None:
+            self.recorder.record(self.touch)
+
+    def _acquire_failed(self, error):
+        """
+        Go on with the last known values, flagged as stale, when the Touch is
+        unreachable. Raise error if no value was ever acquired.
+        """
+
+        if math.isinf(self.touch.age(self._acquired[0])):
+            raise error
+        logger.warning(f"Can't acquire boiler data, use last known values: {error}")
+        self.stale = True
+        self.acquire_error = error
+
+    def close(self):
+        """Release the Touch connection, shared with other adapters."""
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.metrics_port is not None:
+            release_registry(self.metrics_port)
+            self.metrics_port = None
+        release_touch(self.touch)
 
     @property
+    @timed("boiler")
     def accept_control(self):
-        """Is the boiler set up to be controlled?"""
+        """
+        Is the boiler set up to be controlled? The answer is given at once
+        from cached data. A refusal is confirmed by the next acquisition at
+        least confirm_delay seconds later. See accept_control_with_age().
+        """
+
         if self.touch.hc_op_mode in [OpMode.AUTO, OpMode.HEATING]:
+            self._refused_since = None
             return True
-        else:
-            sleep(1)
-            self.acquire()
-            if self.touch.hc_op_mode in [OpMode.AUTO, OpMode.HEATING]:
-                return True
-            else:
-                return False
+        if self._refused_since is None:
+            self._refused_since = monotonic()
+        return False
+
+    def accept_control_with_age(self):
+        """
+        Return (accept_control, age in seconds of the op mode it derives
+        from, whether the answer is confirmed). Only refusals need a
+        confirmation.
+        """
+        accepted = self.accept_control
+        confirmed = accepted or self._refusal_confirmed()
+        return accepted, self.touch.age("hk1.mode_auto"), confirmed
+
+    def _refusal_confirmed(self):
+        """Whether the op mode was fetched confirm_delay after the refusal."""
+        if self._refused_since is None:
+            return True
+        fetched = monotonic() - self.touch.age("hk1.mode_auto")
+        return fetched >= self._refused_since + self.confirm_delay
+
+    def _refusal_due(self):
+        """Whether a refusal is due for confirmation."""
+        if self._refusal_confirmed():
+            return False
+        return monotonic() >= self._refused_since + self.confirm_delay
+
+    def _confirm_refusal(self):
+        """Refetch the op mode if a refusal is due for confirmation."""
+        if self._refusal_due():
+            self.touch.load_data("hk1.mode_auto")
 
     @property
+    @timed("boiler")
     def ambiant_temperature(self):
         """Ambiant temperature mesured by the boiler’s sensor"""
         return self.touch.room_t
 
     @property
+    @timed("boiler")
     def delivering_heat(self):
-        """Is the heating circuit devilering heat?"""
+        """Is the heating circuit, the one heat is forced on, delivering heat?"""
         return self.touch.hc_pumping
 
+    @timed("boiler")
     def force_heating(self, delta=0.0):
         """
         Force heating room by setting the heating circuit operation mode to
         "heating" and by rising the temperature set high enough + delta.
         """
 
-        self._force_hc_op_mode()
-        self._force_room_setpoint(delta)
+        with self.touch.transaction():
+            self._force_hc_op_mode()
+            self._force_room_setpoint(delta)
+        self.forcing = True
 
     @property
+    @timed("boiler")
     def generating_heat(self):
-        """Is the boiler generating heat?"""
-        return self.touch.boiler_fired
+        """Is any burner generating heat?"""
+        return self.touch.burners.fired()
 
     @property
+    @timed("boiler")
     def heat_available(self):
         """Is hot water available without ignit fire?"""
-        if self.touch.boiler_fired or self.touch.boiler_flow_t > max(
-            70, self.touch.boiler_flow_t_set
-        ):
+        burners = self.touch.burners
+        if burners.fired() or burners.hot(70):
             return True
         else:
             return False
 
+    @timed("boiler")
     def release_heating(self):
         """
         Restore the Pelletronic operation mode and temperature set to their
         values before the enforcement.
         """
 
-        self._release_hc_op_mode()
-        self._release_room_setpoint()
+        with self.touch.transaction():
+            self._release_hc_op_mode()
+            self._release_room_setpoint()
+        self.forcing = False
 
     def does_accept_ctrl(self):
         """DEPRECATED- Kept for backward compatibility."""
@@ -129,7 +345,10 @@ class Boiler(AbstractBoiler):
         # Rise living temperature setpoint to switch on the heating system
         # (bigger rise) or to keep it heating (smaller rise). To decide on, we
         # look at the flow temperature setpoint of the heating circuit.
-        shift = max(offset, 0.3 if self.touch.hc_flow_t_set > 20 else 1.2)
+        if self.touch.hc_flow_t_set > self.heating_flow_t_set:
+            shift = max(offset, self.keep_shift)
+        else:
+            shift = max(offset, self.start_shift)
         logger.debug(f"shift={shift}")
         # self.force_room_t_set = round(min(self.touch.room_t + shift,
         #                                  self.room_t_set_max), 1)
@@ -170,16 +389,21 @@ class Boiler(AbstractBoiler):
         """Restore temperature set to its value before being forced."""
         # The code for restoring the setpoint that was set before forcing heat is
         # buggy, so we just restore a fixed value.
-        self.touch.room_t_set = 16.0
+        self.touch.room_t_set = self.release_room_t_set
         # if (self.bk_room_t_set is not None and round(self.touch.room_t_set, 1)
         #        == round(self.force_room_t_set, 1)):
-        if self.bk_room_t_set is not None and self._round_t(
-            self.touch.room_t_set
-        ) == self._round_t(self.force_room_t_set):
+        if (
+            self.bk_room_t_set is not None
+            and self.force_room_t_set is not None
+            and self._round_t(self.touch.room_t_set)
+            == self._round_t(self.force_room_t_set)
+        ):
             logger.info(f"Restore living t set to {self.bk_room_t_set}°C")
             self.touch.room_t_set = self.bk_room_t_set
             # Erase backup values
-            self.bk_room_t_set, self.force_room_t_set = None, None
+            self.bk_room_t_set = None
+        # The setpoint is no longer forced, whichever value was restored
+        self.force_room_t_set = None
 
     def _round_t(self, value):
         """Round value at the same precision than Touch room temperature."""
@@ -0,0 +1,164 @@
+"""
+Heating circuits (hk1, hk2...) and burners (pe1, pe2...) of a Touch.
+
+Installations may have several heating circuits and several burners, like
+cascades. They are discovered from meta data and exposed as collections
+mapping their number to their device. Values of one attribute over every
+unit are read in one pass into an array of doubles, so that decisions over a
+whole collection are evaluated on arrays rather than unit by unit.
+"""
+
+import math
+import re
+from array import array
+from collections.abc import Mapping
+from operator import mul
+from typing import Optional
+
+from .errors import TouchError
+from .snapshot import Snapshot
+
+# Burner states (pe<n>.L_state) with fire on
+FIRED_STATES = (1, 2, 3, 4)
+
+# Device names of circuits and burners
+UNIT_DEVICE = re.compile(r"(hk|pe)\d+")
+
+
+class KeepUnits(dict):
+    """
+    What to keep from a payload, as expected by decoder.decode_sections(),
+    also keeping whole every circuit and burner section.
+    """
+
+    def __contains__(self, device):
+        return super().__contains__(device) or bool(UNIT_DEVICE.fullmatch(device))
+
+    def __getitem__(self, device):
+        # None: every attribute
+        if UNIT_DEVICE.fullmatch(device):
+            return None
+        return super().__getitem__(device)
+
+
+class Units(Mapping):
+    """
+    Devices of a kind, named prefix + number, mapping their number to their
+    device name, in number order.
+    """
+
+    prefix: Optional[str] = None
+
+    def __init__(self, touch):
+        self.touch = touch
+        pattern = re.compile(re.escape(self.prefix) + r"(\d+)")
+        numbers = {}
+        for device, attrs in touch._meta.items():
+            match = pattern.fullmatch(device)
+            if match and isinstance(attrs, dict):
+                numbers[int(match.group(1))] = device
+        self._devices = {number: numbers[number] for number in sorted(numbers)}
+        self.devices = list(self._devices.values())
+        # attr -> (factors, or None if all are 1, Snapshot positions)
+        self._plans = {}
+
+    def __getitem__(self, number):
+        return self._devices[number]
+
+    def __iter__(self):
+        return iter(self._devices)
+
+    def __len__(self):
+        return len(self._devices)
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {', '.join(self.devices)}>"
+
+    def names(self, attrs):
+        """Return "device.attr" names of attrs of every unit."""
+        return [f"{device}.{attr}" for device in self.devices for attr in attrs]
+
+    def _plan(self, attr):
+        plan = self._plans.get(attr)
+        if plan is None:
+            meta = self.touch._meta
+            factors = array("d")
+            for device in self.devices:
+                attr_meta = meta[device].get(attr)
+                factor = 1
+                if isinstance(attr_meta, dict):
+                    factor = attr_meta.get("factor", 1)
+                factors.append(factor)
+            if all(factor == 1 for factor in factors):
+                factors = None
+            schema = self.touch._schema
+            positions = None
+            if schema is not None:
+                positions = []
+                for device in self.devices:
+                    field = schema.index.get((device, attr))
+                    numeric = field is not None and field[0]
+                    positions.append(field[1] if numeric else None)
+            plan = self._plans[attr] = (factors, positions)
+        return plan
+
+    def values(self, attr):
+        """
+        Return the values of attr of every unit, in number order, as an
+        array of doubles, with factors applied. Raise TouchError if a value
+        is missing.
+        """
+
+        touch = self.touch
+        touch._read_fields([(device, attr) for device in self.devices])
+        factors, positions = self._plan(attr)
+        data = touch._data
+        if isinstance(data, Snapshot) and data.schema is touch._schema:
+            numbers = data.numbers
+            values = array(
+                "d",
+                [math.nan if p is None else numbers[p] for p in positions],
+            )
+        else:
+            values = array(
+                "d",
+                [data.get(device, {}).get(attr, math.nan) for device in self.devices],
+            )
+        for device, value in zip(self.devices, values):
+            if value != value:
+                raise TouchError(f'"{device}.{attr}" not found in cache')
+        if factors is not None:
+            values = array("d", map(mul, values, factors))
+        return values
+
+
+class Circuits(Units):
+    """Heating circuits: hk1, hk2..."""
+
+    prefix = "hk"
+
+    def pumping(self):
+        """Whether the water circulator of any circuit is running."""
+        return 1 in self.values("L_pump")
+
+
+class Burners(Units):
+    """Burners: pe1, pe2..."""
+
+    prefix = "pe"
+
+    def fired(self):
+        """Whether the fire of any burner is on."""
+        return any(state in FIRED_STATES for state in self.values("L_state"))
+
+    def hot(self, min_t=70):
+        """
+        Whether the water of any burner is hotter than both min_t and its
+        setpoint.
+        """
+        return any(
+            temp > max(min_t, temp_set)
+            for temp, temp_set in zip(
+                self.values("L_temp_act"), self.values("L_temp_set")
+            )
+        )
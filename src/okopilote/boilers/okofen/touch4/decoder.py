@@ -0,0 +1,107 @@
+"""
+Streaming decoding of Touch JSON payloads.
+
+Touch payloads are ISO-8859-1 encoded JSON objects of device sections:
+{device: {attr: value}}. decode_sections() decodes the payload section by
+section as chunks arrive and only keeps the sections and attributes asked for,
+so that neither the whole payload nor unwanted sections stay in memory.
+"""
+
+import codecs
+import json
+import re
+
+# Encoding of Touch payloads
+ENCODING = "ISO-8859-1"
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_json = json.JSONDecoder()
+
+
+class PayloadError(ValueError):
+    """The payload is not a JSON object of device sections."""
+
+
+def decode(payload):
+    """Decode a whole payload (bytes) into Python objects."""
+    return json.loads(payload.decode(ENCODING))
+
+
+def decode_sections(chunks, keep=None):
+    """
+    Decode a payload given as an iterable of byte chunks into a {device:
+    {attr: value}} dict. keep maps the devices to keep to the set of their
+    attributes to keep (None: every attribute). keep=None keeps everything.
+    """
+
+    decoder = codecs.getincrementaldecoder(ENCODING)()
+    result = {}
+    buf, pos, key = "", 0, None
+    # Next expected token: "{", "key", "key or }", ":", "value", ", or }", "end"
+    expect = "{"
+    for chunk in _chunks_and_end(chunks):
+        final = chunk == b""
+        buf += decoder.decode(chunk, final=final)
+        while True:
+            pos = _WHITESPACE.match(buf, pos).end()
+            if pos == len(buf):
+                break
+            char = buf[pos]
+            if expect == "value":
+                try:
+                    value, end = _json.raw_decode(buf, pos)
+                except ValueError:
+                    if final:
+                        raise PayloadError(f"Invalid value for {key!r}")
+                    # Incomplete value: wait for the next chunk
+                    break
+                if end == len(buf) and not final:
+                    # A number or literal may go on in the next chunk
+                    break
+                # Unwanted sections are dropped as soon as decoded
+                if keep is None or key in keep:
+                    result[key] = _filter(value, keep, key)
+                pos, expect = end, ", or }"
+            elif expect in ("key", "key or }") and char == '"':
+                try:
+                    key, pos = _json.raw_decode(buf, pos)
+                except ValueError:
+                    if final:
+                        raise PayloadError("Invalid key in payload")
+                    break
+                expect = ":"
+            elif (
+                expect == "key or }"
+                and char == "}"
+                or expect == ", or }"
+                and char == "}"
+            ):
+                pos, expect = pos + 1, "end"
+            elif expect == "{" and char == "{":
+                pos, expect = pos + 1, "key or }"
+            elif expect == ":" and char == ":":
+                pos, expect = pos + 1, "value"
+            elif expect == ", or }" and char == ",":
+                pos, expect = pos + 1, "key"
+            else:
+                raise PayloadError(f"Unexpected {char!r} in payload")
+        # Drop what was decoded
+        buf, pos = buf[pos:], 0
+    if expect != "end":
+        raise PayloadError("Truncated payload")
+    return result
+
+
+def _chunks_and_end(chunks):
+    # Yield non empty chunks, then b"" to flush the decoder
+    for chunk in chunks:
+        if chunk:
+            yield chunk
+    yield b""
+
+
+def _filter(section, keep, key):
+    attrs = None if keep is None else keep[key]
+    if attrs is None or not isinstance(section, dict):
+        return section
+    return {attr: value for attr, value in section.items() if attr in attrs}
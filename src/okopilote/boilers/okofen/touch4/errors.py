@@ -0,0 +1,19 @@
+"""
+Exceptions of the Touch interface, in a module of their own so that low level
+modules like transport raise them without importing touch.
+"""
+
+
+class TouchError(Exception):
+    """Generic parent exception for Pelletronic errors."""
+
+
+class TouchUnavailable(TouchError):
+    """The Touch is known to be unreachable: it was not queried."""
+
+
+class TouchProtocolError(TouchError, ConnectionError):
+    """
+    The Touch answered something else than an HTTP response. As a
+    ConnectionError, it is handled like a lost connection.
+    """
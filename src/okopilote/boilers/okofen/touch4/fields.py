@@ -0,0 +1,162 @@
+"""
+Attribute model of the Touch, derived from meta data.
+
+Meta data describe every attribute of every device: factor, unit, range and
+format of choices. A Field, built from the meta data of an attribute, reads
+and writes its value with the right type and factor. Fields are only built
+when first used, and kept in a memo until meta data change, so that the
+hundreds of attributes of a Touch cost nothing until they are used.
+
+Devices are reached as attributes of Touch objects, and their attributes as
+attributes of devices:
+
+    touch.hk1.temp_heat = 19.5
+    touch.pe1.L_modulation
+"""
+
+import math
+
+
+class Field:
+    """
+    Accessor of device.attr. kind is "number" (factor applied), "choice"
+    (raw value, labelled by choices), or "text". Numbers and choices are
+    writable, unless their name starts with "L_".
+    """
+
+    __slots__ = (
+        "device",
+        "attr",
+        "kind",
+        "factor",
+        "unit",
+        "minimum",
+        "maximum",
+        "choices",
+        "writable",
+    )
+
+    def __init__(self, device, attr, meta):
+        self.device = device
+        self.attr = attr
+        self.factor = 1
+        self.unit = None
+        self.minimum = None
+        self.maximum = None
+        self.choices = None
+        if not isinstance(meta, dict):
+            # Plain value, like "L_statetext"
+            self.kind = "text"
+            self.writable = False
+            return
+        self.factor = meta.get("factor", 1)
+        self.unit = meta.get("unit")
+        self.minimum = meta.get("min")
+        self.maximum = meta.get("max")
+        if "format" in meta:
+            self.kind = "choice"
+            self.choices = _parse_format(meta["format"])
+        elif isinstance(meta.get("val"), str):
+            self.kind = "text"
+        else:
+            self.kind = "number"
+        self.writable = self.kind != "text" and not attr.startswith("L_")
+
+    @property
+    def name(self):
+        return f"{self.device}.{self.attr}"
+
+    def __repr__(self):
+        return f"<Field {self.name} {self.kind}>"
+
+    def get(self, touch):
+        """Return the cached value from touch."""
+        return touch._get(self.device, self.attr)
+
+    def set(self, touch, value):
+        """Set the value on touch (see BaseTouch._set())."""
+
+        if not self.writable:
+            raise AttributeError(f"{self.name} is read only")
+        raw_value = round(value / self.factor)
+        if (self.minimum is not None and raw_value < self.minimum) or (
+            self.maximum is not None and raw_value > self.maximum
+        ):
+            raise ValueError(f"{value} is out of the range of {self.name}")
+        touch._set(self.device, self.attr, value)
+
+    def label(self, value):
+        """Return the label of a choice value, or None."""
+        return None if self.choices is None else self.choices.get(value)
+
+    def round(self, value):
+        """Round value with the same precision as the attribute."""
+        if self.factor == 1:
+            return value
+        return round(value, -math.floor(math.log10(self.factor)))
+
+
+def _parse_format(text):
+    # "0:Off|1:On" -> {0: "Off", 1: "On"}
+    choices = {}
+    for item in text.split("|"):
+        value, _, label = item.partition(":")
+        try:
+            choices[int(value)] = label
+        except ValueError:
+            pass
+    return choices
+
+
+class Fields:
+    """Memo of the fields of meta data, built on first use."""
+
+    def __init__(self, meta):
+        self._meta = meta
+        self._memo = {}
+
+    def __len__(self):
+        """Number of fields built so far."""
+        return len(self._memo)
+
+    def get(self, device, attr):
+        """Return the field of device.attr. Raise KeyError if it is unknown."""
+
+        field = self._memo.get((device, attr))
+        if field is None:
+            attrs = self._meta.get(device)
+            # "*_info" are comments
+            if not isinstance(attrs, dict) or attr.endswith("_info"):
+                raise KeyError(f"{device}.{attr}")
+            field = Field(device, attr, attrs[attr])
+            self._memo[device, attr] = field
+        return field
+
+
+class Device:
+    """View of a Touch device, whose attributes are the device attributes."""
+
+    __slots__ = ("_touch", "_name")
+
+    def __init__(self, touch, name):
+        object.__setattr__(self, "_touch", touch)
+        object.__setattr__(self, "_name", name)
+
+    def _get_field(self, attr):
+        try:
+            return self._touch._fields.get(self._name, attr)
+        except KeyError:
+            raise AttributeError(f"Device {self._name} has no attribute '{attr}'")
+
+    def __getattr__(self, attr):
+        return self._get_field(attr).get(self._touch)
+
+    def __setattr__(self, attr, value):
+        self._get_field(attr).set(self._touch, value)
+
+    def __dir__(self):
+        attrs = self._touch._meta.get(self._name, {})
+        return [attr for attr in attrs if not attr.endswith("_info")]
+
+    def __repr__(self):
+        return f"<Device {self._name}>"
@@ -0,0 +1,113 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+from time import monotonic
+
+logger = logging.getLogger(__name__)
+
+
+class DeviceResult:
+    """Outcome of the acquisition of one device during a fleet poll."""
+
+    __slots__ = ("name", "stale", "error", "elapsed", "data")
+
+    def __init__(self, name, stale, error, elapsed, data):
+        self.name = name
+        # Whether data are not from this poll (late or failed acquisition)
+        self.stale = stale
+        # Exception raised by the acquisition, if any
+        self.error = error
+        # Duration of the acquisition in s, or time waited for it if stale
+        self.elapsed = elapsed
+        # Touch data: {device: {attr: raw value}}, last known if stale
+        self.data = data
+
+    def __repr__(self):
+        state = "stale" if self.stale else "fresh"
+        return f"<DeviceResult {self.name} {state} {self.elapsed:.3f}s>"
+
+
+class FleetSnapshot:
+    """Consolidated result of a fleet poll."""
+
+    def __init__(self, devices, elapsed):
+        # Device name -> DeviceResult
+        self.devices = devices
+        self.elapsed = elapsed
+
+    @property
+    def stale(self):
+        """Names of devices whose data are not from this poll."""
+        return [name for name, result in self.devices.items() if result.stale]
+
+
+class FleetPoller:
+    """
+    Acquire many boilers in parallel on a bounded pool of worker threads.
+
+    boilers maps names to Boiler objects. A poll waits at most deadline
+    seconds: devices not acquired by then are reported stale with their last
+    known data, and their pending acquisition is not restarted before it ends.
+    Devices whose acquisition failed, the Touch being unreachable, are
+    reported stale with the error.
+    """
+
+    def __init__(self, boilers, max_workers=4, deadline=10.0):
+        self.boilers = dict(boilers)
+        self.deadline = deadline
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="touch4-fleet"
+        )
+        # Name -> acquisition future not collected yet
+        self._running = {}
+        # Name -> data of the last successful acquisition
+        self._last_data = {}
+
+    def close(self):
+        """Stop worker threads, without waiting for pending acquisitions."""
+        self._executor.shutdown(wait=False)
+
+    @staticmethod
+    def _acquire(boiler):
+        start = monotonic()
+        boiler.acquire()
+        if boiler.stale:
+            # The boiler goes on with its last known data: report the failure
+            raise boiler.acquire_error
+        return monotonic() - start, boiler.touch.snapshot().to_dict()
+
+    def poll(self):
+        """Acquire every boiler and return a FleetSnapshot."""
+
+        start = monotonic()
+        futures = {}
+        for name, boiler in self.boilers.items():
+            future = self._running.get(name)
+            if future is None:
+                future = self._executor.submit(self._acquire, boiler)
+                self._running[name] = future
+            else:
+                logger.debug(f"Acquisition of {name} is still pending")
+            futures[future] = name
+        done, _ = wait(futures, timeout=self.deadline)
+        waited = monotonic() - start
+
+        devices = {}
+        for future, name in futures.items():
+            if future not in done:
+                logger.warning(f"Acquisition of {name} missed the deadline")
+                devices[name] = DeviceResult(
+                    name, True, None, waited, self._last_data.get(name)
+                )
+                continue
+            del self._running[name]
+            try:
+                elapsed, data = future.result()
+            except Exception as e:
+                logger.warning(f"Acquisition of {name} failed: {e}")
+                devices[name] = DeviceResult(
+                    name, True, e, waited, self._last_data.get(name)
+                )
+            else:
+                self._last_data[name] = data
+                devices[name] = DeviceResult(name, False, None, elapsed, data)
+        return FleetSnapshot(devices, monotonic() - start)
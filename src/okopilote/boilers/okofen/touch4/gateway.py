@@ -0,0 +1,358 @@
+"""
+Local gateway sharing one Touch between many clients.
+
+The Touch rejects requests sent too close to each other, so clients querying
+it side by side (the controller, a dashboard, scripts) throttle each other.
+The gateway owns the only connection to the Touch and serves its clients the
+Touch URL scheme (/PASSWORD/all, /PASSWORD/all?, /PASSWORD/dev,
+/PASSWORD/dev.attr and /PASSWORD/dev.attr=value): existing clients only need
+to point at the gateway.
+
+Reads are served from the cache of a Touch object, reloaded when older than
+max_age seconds: responses served from the cache don't wait for loads in
+progress. Meta data (all?) carry the values last loaded. Writes are answered
+at once, as the Touch does, and sent write_delay seconds later, successive
+writes of an attribute being coalesced.
+
+    python -m okopilote.boilers.okofen.touch4.gateway http://touch PASSWORD
+"""
+
+import argparse
+import json
+import logging
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import monotonic
+
+from .decoder import ENCODING
+from .touch import Touch, TouchError, TouchUnavailable
+
+logger = logging.getLogger(__name__)
+
+
+class Gateway:
+    """
+    Gateway to touch, serving clients using password (default: the Touch
+    one) on address:port (port 0: any free port). Clients expect whole
+    payloads: touch must not trim them (see keep of BaseTouch).
+    """
+
+    def __init__(
+        self,
+        touch,
+        password=None,
+        port=3938,
+        address="127.0.0.1",
+        max_age=10.0,
+        write_delay=0.2,
+    ):
+        if touch.keep is not None:
+            raise ValueError("Gateway needs a Touch keeping whole payloads")
+        self.touch = touch
+        if password is None:
+            # API URL is "<url>/<password>/"
+            password = touch.api_url[len(touch.url) + 1 : -1]
+        self.password = password
+        self.max_age = max_age
+        self.write_delay = write_delay
+        # Serializes the use of the Touch object, held during loads
+        self._lock = threading.Lock()
+        # Guards response bodies and counters, never held during loads
+        self._cache_lock = threading.Lock()
+        # Encoded response bodies of reads and when they expire (monotonic
+        # time), until the next load or write
+        self._bodies = {}
+        self._loaded_all = -float("inf")
+        self._flush_timer = None
+        # Counters
+        self.stats = {"requests": 0, "hits": 0, "loads": 0, "writes": 0, "sent": 0}
+        handler = type("Handler", (GatewayHandler,), {"gateway": self})
+        self.httpd = ThreadingHTTPServer((address, port), handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve in a background thread."""
+        self._thread = threading.Thread(
+            target=self.httpd.serve_forever, name="touch4-gateway", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Serve {self.touch.url} on {self.url}")
+        return self
+
+    def serve_forever(self):
+        logger.info(f"Serve {self.touch.url} on {self.url}")
+        self.httpd.serve_forever()
+
+    def stop(self):
+        """Stop serving and send pending writes."""
+
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+        self.flush()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def read(self, query):
+        """Return the response body of a read query, as text."""
+
+        with self._cache_lock:
+            self.stats["requests"] += 1
+            body = self._cached_body(query)
+        if body is not None:
+            return body
+        with self._lock:
+            # Loaded by another request meanwhile?
+            with self._cache_lock:
+                body = self._cached_body(query)
+            if body is not None:
+                return body
+            expires = -math.inf
+            try:
+                if query == "all?":
+                    self._refresh_meta()
+                    expires = math.inf
+                else:
+                    expires = monotonic() + self.max_age - self._refresh(query)
+            except (TouchUnavailable, OSError) as e:
+                if not self._known(query):
+                    raise
+                logger.warning(f"Serve last known {query} data: {e}")
+            if query == "all?":
+                data = self._meta_with_values()
+            else:
+                data = self.touch.cached(query)
+            body = json.dumps(data, ensure_ascii=False)
+            with self._cache_lock:
+                self._bodies[query] = (body, expires)
+            return body
+
+    def _cached_body(self, query):
+        """Return the body of query if cached and not expired, else None."""
+
+        cached = self._bodies.get(query)
+        if cached is None or monotonic() > cached[1]:
+            return None
+        self.stats["hits"] += 1
+        return cached[0]
+
+    def _clear_bodies(self):
+        with self._cache_lock:
+            self._bodies.clear()
+
+    def _refresh_meta(self):
+        touch = self.touch
+        # Meta data from the cache may be outdated, as after a firmware update
+        if not touch.meta or touch.meta_from_cache:
+            touch.reload_meta()
+            self._clear_bodies()
+
+    def _meta_with_values(self):
+        """Return meta data, with the values last loaded rather than theirs."""
+
+        data = self.touch.cached()
+        meta = {}
+        for device, attrs in self.touch.meta.items():
+            values = data.get(device)
+            if not values or not isinstance(attrs, dict):
+                meta[device] = attrs
+                continue
+            meta[device] = attrs = dict(attrs)
+            for attr, value in values.items():
+                if isinstance(attrs.get(attr), dict):
+                    attrs[attr] = dict(attrs[attr], val=value)
+                elif attr in attrs:
+                    # Plain value, like "L_statetext"
+                    attrs[attr] = value
+        return meta
+
+    def _known(self, query):
+        """Whether data of query were ever loaded."""
+        if query == "all?":
+            return bool(self.touch.meta)
+        return self.touch.loaded(query)
+
+    def _refresh(self, query):
+        """
+        Reload the data of query if older than max_age, and return their age
+        in seconds.
+        """
+
+        # Send pending writes first, so that a load can't revert them
+        self._flush()
+        touch = self.touch
+        if query == "all":
+            if monotonic() - self._loaded_all <= self.max_age:
+                return monotonic() - self._loaded_all
+            touch.load_data()
+            self._loaded_all = monotonic()
+            loaded = True
+        else:
+            device, attr = touch.resolve(query)
+            if attr is None:
+                # Every attribute of the device
+                names = [
+                    f"{device}.{a}"
+                    for a in touch.meta[device]
+                    if not a.endswith("_info")
+                ]
+            else:
+                names = [query]
+            loaded = touch.refresh(names, max_age=self.max_age)
+        if loaded:
+            with self._cache_lock:
+                self.stats["loads"] += 1
+                self._bodies.clear()
+        if query == "all":
+            return 0.0
+        return max(touch.age(name) for name in names)
+
+    def write(self, request):
+        """
+        Queue the write request "dev.attr=raw value" and return the response
+        body, which echoes it.
+        """
+
+        name, _, raw = request.partition("=")
+        with self._cache_lock:
+            self.stats["requests"] += 1
+            self.stats["writes"] += 1
+        with self._lock:
+            try:
+                raw_value = int(raw)
+            except ValueError:
+                raise ValueError(f"'{raw}' is not an integer value")
+            touch = self.touch
+            if not touch.buffering:
+                touch.begin()
+            touch.set_raw(name, raw_value)
+            self._clear_bodies()
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.write_delay, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        return request
+
+    def flush(self):
+        """Send queued writes."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        self._flush_timer = None
+        touch = self.touch
+        if not touch.buffering:
+            return
+        pending = len(touch.pending_writes())
+        try:
+            touch.commit()
+        except Exception as e:
+            # Cached values of the writes not sent are restored
+            logger.error(f"Can't send queued writes: {e}")
+        else:
+            with self._cache_lock:
+                self.stats["sent"] += pending
+        self._clear_bodies()
+
+
+class GatewayHandler(BaseHTTPRequestHandler):
+    """Handler of gateway requests, answering like the Touch."""
+
+    protocol_version = "HTTP/1.1"
+
+    # Set by Gateway on its subclass
+    gateway = None
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def do_GET(self):
+        try:
+            empty, password, target = self.path.split("/")
+        except ValueError:
+            empty = "-"
+        if empty:
+            self._send(400, "Syntax error")
+            return
+        if password != self.gateway.password:
+            self._send(401, "Wrong password")
+            return
+        try:
+            if "=" in target:
+                body = self.gateway.write(target)
+            else:
+                body = self.gateway.read(target)
+        except (TouchUnavailable, OSError) as e:
+            self._send(503, str(e))
+        except (ValueError, KeyError) as e:
+            # Unknown attribute, not a setting or invalid value
+            self._send(400, f"Error: {e}")
+        except TouchError as e:
+            self._send(500, f"Error: {e}")
+        else:
+            self._send(200, body)
+
+    def _send(self, code, text):
+        body = text.encode(ENCODING, errors="replace")
+        # Headers and body in one write, like the Touch
+        head = (
+            f"HTTP/1.1 {code} {self.responses[code][0]}\r\n"
+            f"Date: {self.date_time_string()}\r\n"
+            f"Content-length: {len(body)}\r\n\r\n"
+        )
+        self.wfile.write(head.encode(ENCODING) + body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("url", help="URL of the Touch")
+    parser.add_argument("password", help="password of the Touch JSON interface")
+    parser.add_argument("--port", type=int, default=3938)
+    parser.add_argument("--address", default="127.0.0.1")
+    parser.add_argument(
+        "--gateway-password", help="password of gateway clients (default: same)"
+    )
+    parser.add_argument("--max-age", type=float, default=10.0, help="cache (s)")
+    parser.add_argument("--write-delay", type=float, default=0.2, help="(s)")
+    parser.add_argument(
+        "--transport", default="socket", choices=["requests", "socket"]
+    )
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+    touch = Touch(args.url, args.password, transport=args.transport)
+    gateway = Gateway(
+        touch,
+        password=args.gateway_password,
+        port=args.port,
+        address=args.address,
+        max_age=args.max_age,
+        write_delay=args.write_delay,
+    )
+    try:
+        gateway.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        gateway.httpd.server_close()
+        gateway.flush()
+        touch.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+History of polled Touch values and change events.
+
+A History keeps, per device attribute, a bounded ring buffer of the last raw
+values fetched from the Touch with their fetch time. Changes describe values
+that differ from the cached ones after a load.
+
+A ChangeLog keeps the last changes numbered by version, one version per
+load, for consumers reading them at their own pace through a Cursor.
+"""
+
+import threading
+from bisect import bisect_right
+from collections import deque
+
+
+class Change:
+    """Change of the raw value of device.attr, fetched at time."""
+
+    __slots__ = ("device", "attr", "old", "new", "time")
+
+    def __init__(self, device, attr, old, new, time):
+        self.device = device
+        self.attr = attr
+        # Previous cached value, None if there was none
+        self.old = old
+        self.new = new
+        self.time = time
+
+    @property
+    def name(self):
+        return f"{self.device}.{self.attr}"
+
+    def __repr__(self):
+        return f"<Change {self.name} {self.old!r} -> {self.new!r}>"
+
+
+class History:
+    """Ring buffers of the last size (time, raw value) samples of attributes."""
+
+    def __init__(self, size):
+        if size < 1:
+            raise ValueError("History size must be at least 1")
+        self.size = size
+        # (device, attr) -> deque of (time, value)
+        self._buffers = {}
+
+    def resize(self, size):
+        """Keep the last size samples of each attribute from now on."""
+        if size < 1:
+            raise ValueError("History size must be at least 1")
+        self.size = size
+        for key, buffer in self._buffers.items():
+            self._buffers[key] = deque(buffer, maxlen=size)
+
+    def record(self, device, attr, time, value):
+        """Append a sample, dropping the oldest one if the buffer is full."""
+        buffer = self._buffers.get((device, attr))
+        if buffer is None:
+            buffer = self._buffers[device, attr] = deque(maxlen=self.size)
+        buffer.append((time, value))
+
+    def samples(self, device, attr, since=None):
+        """Return the [(time, value)] samples of device.attr, oldest first."""
+        buffer = self._buffers.get((device, attr), ())
+        if since is None:
+            return list(buffer)
+        return [sample for sample in buffer if sample[0] >= since]
+
+    def held_since(self, device, attr):
+        """
+        Return the time of the first sample of the last run of samples equal
+        to the latest value, or None without samples.
+        """
+
+        buffer = self._buffers.get((device, attr))
+        if not buffer:
+            return None
+        last = buffer[-1][1]
+        since = buffer[-1][0]
+        for time, value in reversed(buffer):
+            if value != last:
+                break
+            since = time
+        return since
+
+    def slope(self, device, attr, since=None):
+        """
+        Return the least squares slope of raw values per second, from samples
+        since the given time, or None with less than two distinct times.
+        """
+
+        samples = [
+            (time, value)
+            for time, value in self.samples(device, attr, since)
+            if isinstance(value, (int, float))
+        ]
+        if len(samples) < 2:
+            return None
+        mean_t = sum(t for t, _ in samples) / len(samples)
+        mean_v = sum(v for _, v in samples) / len(samples)
+        var = sum((t - mean_t) ** 2 for t, _ in samples)
+        if var == 0:
+            return None
+        cov = sum((t - mean_t) * (v - mean_v) for t, v in samples)
+        return cov / var
+
+    def clear(self):
+        self._buffers.clear()
+
+
+class ChangeLog:
+    """
+    Log of the last changes. Each appended batch of changes makes a new
+    version. At least the size last changes are kept. Appending and reading
+    only hold a lock while references are copied, never Touch data.
+    """
+
+    def __init__(self, size=1000):
+        self.size = size
+        self.version = 0
+        # Parallel lists of changes and of their versions, in version order
+        self._changes = []
+        self._versions = []
+        # Version of the last dropped change
+        self._dropped = 0
+        self._lock = threading.Lock()
+
+    def append(self, changes):
+        """Log a batch of changes as a new version. Return the version."""
+
+        with self._lock:
+            self.version += 1
+            self._changes.extend(changes)
+            self._versions.extend([self.version] * len(changes))
+            excess = len(self._changes) - self.size
+            # Drop old changes by blocks, not at each append
+            if excess > self.size:
+                self._dropped = self._versions[excess - 1]
+                del self._changes[:excess]
+                del self._versions[:excess]
+            return self.version
+
+    def since(self, version):
+        """
+        Return (changes logged after version, current version, whether some
+        of them were dropped).
+        """
+
+        with self._lock:
+            start = bisect_right(self._versions, version)
+            return self._changes[start:], self.version, version < self._dropped
+
+    def diff(self, since, until=None):
+        """
+        Return {(device, attr): (old, new)} for values that changed between
+        versions since and until (default: current), changes being merged.
+        Raise LookupError if changes between those versions were dropped.
+        """
+
+        with self._lock:
+            if since < self._dropped:
+                raise LookupError(f"Changes since version {since} were dropped")
+            start = bisect_right(self._versions, since)
+            stop = None if until is None else bisect_right(self._versions, until)
+            changes = self._changes[start:stop]
+        diff = {}
+        for change in changes:
+            key = (change.device, change.attr)
+            old = diff[key][0] if key in diff else change.old
+            diff[key] = (old, change.new)
+        return {key: values for key, values in diff.items() if values[0] != values[1]}
+
+    def cursor(self, keys=None):
+        """Return a Cursor reading changes from now on (see Cursor)."""
+        return Cursor(self, keys)
+
+
+class Cursor:
+    """
+    Position of a consumer in a ChangeLog. keys is the set of (device, attr)
+    watched, (device, None) standing for a whole device, or None for all.
+    """
+
+    def __init__(self, log, keys=None):
+        self.log = log
+        self.keys = keys
+        self.version = log.version
+        # Whether changes were dropped before the last read could get them:
+        # the consumer should then resync from current data.
+        self.lost = False
+
+    def read(self):
+        """Return the list of changes since the last read, oldest first."""
+
+        changes, self.version, self.lost = self.log.since(self.version)
+        keys = self.keys
+        if keys is None:
+            return changes
+        return [
+            change
+            for change in changes
+            if (change.device, change.attr) in keys or (change.device, None) in keys
+        ]
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def from_conf(conf):
+    """Return a MetaCache set up from configuration, or None if disabled."""
+    directory = conf.get("meta_cache")
+    if not directory:
+        return None
+    conf.setdefault("meta_cache_max_age", "604800")
+    max_age = conf.getfloat("meta_cache_max_age")
+    return MetaCache(directory, max_age=max_age if max_age > 0 else None)
+
+
+def interface_version(payload):
+    """
+    Return the version of the interface serving payload, "all?" meta data or
+    "all" data. The Touch reports no version number: the version is read from
+    the devices and attributes of the payload ("*_info" comments excluded),
+    which firmware updates change.
+    """
+
+    layout = sorted(
+        (device, sorted(attr for attr in attrs if not attr.endswith("_info")))
+        for device, attrs in payload.items()
+        if isinstance(attrs, dict)
+    )
+    return hashlib.sha1(json.dumps(layout).encode()).hexdigest()
+
+
+class MetaCache:
+    """
+    Persistent on-disk cache of the Touch meta data (the "all?" payload).
+
+    Entries are keyed by the Touch URL (password excluded) and record the
+    interface version of the meta data (see interface_version()), against
+    which Touch objects check the data they load. An entry is discarded when
+    its format version, URL or interface version do not match, when its
+    content is malformed, or when it is older than max_age seconds (None:
+    never expires).
+    """
+
+    # Bump when the layout of cache files changes
+    FORMAT_VERSION = 2
+
+    def __init__(self, directory, max_age=None):
+        self.directory = directory
+        self.max_age = max_age
+
+    def __eq__(self, other):
+        # Caches of the same directory are interchangeable
+        if not isinstance(other, MetaCache):
+            return NotImplemented
+        return (self.directory, self.max_age) == (other.directory, other.max_age)
+
+    def __hash__(self):
+        return hash((self.directory, self.max_age))
+
+    def _path(self, url):
+        key = hashlib.sha1(url.encode()).hexdigest()
+        return os.path.join(self.directory, f"touch4-meta-{key}.json")
+
+    def load(self, url):
+        """Return cached meta data, or None if missing, invalid or stale."""
+
+        path = self._path(url)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            logger.debug(f"No meta cache for {url}")
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignore unreadable meta cache {path}: {e}")
+            return None
+        if not self._is_valid(entry, url):
+            logger.warning(f"Ignore invalid meta cache {path}")
+            return None
+        age = time.time() - entry["saved"]
+        if self.max_age is not None and not 0 <= age <= self.max_age:
+            logger.info(f"Meta cache for {url} is stale ({age:.0f}s old)")
+            return None
+        return entry["meta"]
+
+    def save(self, url, meta):
+        """Store meta data on disk, atomically replacing any previous entry."""
+
+        path = self._path(url)
+        entry = {
+            "format": self.FORMAT_VERSION,
+            "url": url,
+            "interface": interface_version(meta),
+            "saved": time.time(),
+            "meta": meta,
+        }
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Unable to write meta cache {path}: {e}")
+        else:
+            logger.debug(f"Meta data of {url} saved to {path}")
+
+    def invalidate(self, url):
+        """Remove the cache entry, if any."""
+        try:
+            os.remove(self._path(url))
+        except FileNotFoundError:
+            pass
+
+    def _is_valid(self, entry, url):
+        try:
+            if (
+                entry["format"] != self.FORMAT_VERSION
+                or entry["url"] != url
+                or not isinstance(entry["saved"], (int, float))
+            ):
+                return False
+            meta = entry["meta"]
+        except (KeyError, TypeError):
+            return False
+        return (
+            isinstance(meta, dict)
+            and len(meta) > 0
+            and all(isinstance(section, dict) for section in meta.values())
+            and entry.get("interface") == interface_version(meta)
+        )
@@ -0,0 +1,240 @@
+"""
+Instrumentation of Touch requests and Boiler decisions.
+
+A Metrics object collects counters and histograms, labelled by Touch URL. It
+exports them in the Prometheus text format, and passes each observation to
+listeners. Touch and Boiler objects only pay for instrumentation when they
+are given a Metrics object.
+"""
+
+import functools
+import logging
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of histogram buckets, in seconds
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.0005,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class Metrics:
+    """Counters and histograms of named and labelled values."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, prefix="touch4_"):
+        self.buckets = tuple(buckets)
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        # (name, labels) -> value, labels being a sorted tuple of (key, value)
+        self._counters = {}
+        # (name, labels) -> [count per bucket..., count, sum]
+        self._histograms = {}
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """
+        Call callback(kind, name, labels, value) on each observation, kind
+        being "counter" or "histogram".
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, kind, name, labels, value):
+        for callback in self._listeners:
+            try:
+                callback(kind, name, labels, value)
+            except Exception:
+                logger.exception(f"Metrics listener {callback!r} failed")
+
+    def inc(self, name, value=1, **labels):
+        """Add value to counter name."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        if self._listeners:
+            self._notify("counter", name, labels, value)
+
+    def observe(self, name, value, **labels):
+        """Add value to histogram name."""
+
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram[i] += 1
+                    break
+            histogram[-2] += 1
+            histogram[-1] += value
+        if self._listeners:
+            self._notify("histogram", name, labels, value)
+
+    @contextmanager
+    def span(self, name, **labels):
+        """Time the block into histogram <name>_seconds."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(f"{name}_seconds", perf_counter() - start, **labels)
+
+    def counter(self, name, **labels):
+        """Return the value of a counter."""
+        return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def histogram(self, name, **labels):
+        """Return (count, sum) of a histogram."""
+        histogram = self._histograms.get((name, tuple(sorted(labels.items()))))
+        return (0, 0.0) if histogram is None else (histogram[-2], histogram[-1])
+
+    def to_prometheus(self):
+        """Return metrics in the Prometheus text exposition format."""
+
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                (key, list(values)) for key, values in self._histograms.items()
+            )
+        declared = set()
+        for (name, labels), value in counters:
+            name = f"{self.prefix}{name}_total"
+            if name not in declared:
+                lines.append(f"# TYPE {name} counter")
+                declared.add(name)
+            lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        for (name, labels), values in histograms:
+            name = f"{self.prefix}{name}"
+            if name not in declared:
+                lines.append(f"# TYPE {name} histogram")
+                declared.add(name)
+            cumulated = 0
+            for bound, count in zip(self.buckets, values):
+                cumulated += count
+                le = labels + (("le", _number(bound)),)
+                lines.append(f"{name}_bucket{_labels(le)} {cumulated}")
+            # Values above the last bound are only counted in the +Inf bucket
+            le = labels + (("le", "+Inf"),)
+            lines.append(f"{name}_bucket{_labels(le)} {values[-2]}")
+            lines.append(f"{name}_count{_labels(labels)} {values[-2]}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(values[-1])}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def timed(name):
+    """
+    Decorate a method of an object with metrics and touch attributes, like a
+    Boiler, to time it into histogram <name>_seconds, labelled with the
+    method name and the Touch URL.
+    """
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            metrics = self.metrics
+            if metrics is None:
+                return method(self, *args, **kwargs)
+            with metrics.span(name, method=method.__name__, touch=self.touch.url):
+                return method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# Metrics shared by the Touch and Boiler objects created from configuration
+registry = Metrics()
+
+
+def start_http_server(metrics, port, address=""):
+    """Serve metrics in the Prometheus format on /metrics, in a thread."""
+
+    # Imported here as it is slow to import and seldom used
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.to_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    httpd = ThreadingHTTPServer((address, port), Handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    logger.info(f"Serve metrics on port {httpd.server_address[1]}")
+    return httpd
+
+
+# Port -> [server of the registry, count of users]
+_servers: Dict[int, List[Any]] = {}
+_servers_lock = threading.Lock()
+
+
+def serve_registry(port):
+    """
+    Serve the shared registry on port, once per process. Every call must be
+    paired with a call to release_registry().
+    """
+
+    with _servers_lock:
+        entry = _servers.get(port)
+        if entry is None:
+            entry = _servers[port] = [start_http_server(registry, port), 0]
+        entry[1] += 1
+        return entry[0]
+
+
+def release_registry(port):
+    """Stop serving the registry on port once no user is left."""
+
+    with _servers_lock:
+        entry = _servers.get(port)
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] > 0:
+            return
+        del _servers[port]
+    entry[0].shutdown()
+    entry[0].server_close()
+    logger.info(f"Stop serving metrics on port {port}")
@@ -0,0 +1,149 @@
+"""
+Adaptive polling of a boiler: the poll interval and the polled attributes
+depend on what the boiler is doing.
+"""
+
+import logging
+from time import monotonic
+
+from .touch import OpMode
+
+logger = logging.getLogger(__name__)
+
+# Attributes telling the state of the boiler, polled in every state so that
+# transitions are seen, with the state of every burner and circuit
+STATE_NAMES = ["pe1.L_state", "hk1.L_pump", "hk1.mode_auto"]
+
+
+class Profile:
+    """Polling profile of a state: poll interval in seconds and names."""
+
+    __slots__ = ("interval", "names")
+
+    def __init__(self, interval, names):
+        self.interval = interval
+        self.names = list(names)
+
+    def __repr__(self):
+        return f"<Profile {self.interval}s {', '.join(self.names)}>"
+
+
+class AdaptivePoller:
+    """
+    Poll boiler data at a rate and with a subset of attributes depending on
+    the boiler state: "forcing" (heat is being forced), "firing", "pumping",
+    "off" (heating circuit off) or "standby". The state attributes are always
+    polled; when a poll shows a new state, the attributes of the new state
+    are polled at once. Every attribute is polled at least every full_interval
+    seconds.
+
+    acquire() stands in for Boiler.acquire() and may be called as often as
+    wished: it only queries the Touch when a poll is due. acquire_async() does
+    the same for AsyncBoiler.
+    """
+
+    # Names polled besides the state attributes. While forcing heat, every
+    # attribute of the boiler is polled.
+    default_profiles = {
+        "forcing": Profile(10, []),
+        "firing": Profile(
+            15, ["boiler_flow_t", "boiler_flow_t_set", "hc_flow_t_set", "room_t"]
+        ),
+        "pumping": Profile(30, ["boiler_flow_t", "hc_flow_t_set", "room_t"]),
+        "off": Profile(300, []),
+        "standby": Profile(60, ["boiler_flow_t", "room_t", "room_t_set"]),
+    }
+
+    def __init__(self, boiler, profiles=None, full_interval=900):
+        self.boiler = boiler
+        self.profiles = dict(self.default_profiles)
+        self.profiles.update(profiles or {})
+        self.full_interval = full_interval
+        self.state = None
+        self._next_poll = -float("inf")
+        self._next_full = -float("inf")
+        # Counters
+        self.polls = 0
+        self.skipped = 0
+
+    def current_state(self):
+        """Return the state of the boiler from cached data."""
+
+        boiler = self.boiler
+        if boiler.forcing:
+            return "forcing"
+        touch = boiler.touch
+        try:
+            if touch.burners.fired():
+                return "firing"
+            if touch.circuits.pumping():
+                return "pumping"
+            if touch.hc_op_mode is OpMode.OFF:
+                return "off"
+        except Exception:
+            # Not loaded yet
+            return None
+        return "standby"
+
+    def _names(self, state, full):
+        if full or state in (None, "forcing"):
+            return list(self.boiler._acquired)
+        touch = self.boiler.touch
+        names = (
+            STATE_NAMES
+            + touch.burners.names(["L_state"])
+            + touch.circuits.names(["L_pump"])
+            + self.profiles[state].names
+        )
+        return list(dict.fromkeys(names))
+
+    def due(self):
+        """Return the time in seconds until the next poll (0: due now)."""
+        if self.current_state() != self.state:
+            # Forcing heat started or stopped
+            return 0.0
+        return max(0.0, self._next_poll - monotonic())
+
+    def acquire(self):
+        """Poll the boiler if a poll is due. Return whether it was polled."""
+
+        polled = False
+        for names in self._polls():
+            self.boiler.touch.load_many(names)
+            polled = True
+        return polled
+
+    async def acquire_async(self):
+        """acquire() for boilers driven by an asyncio Touch (see aio module)."""
+
+        polled = False
+        for names in self._polls():
+            await self.boiler.touch.load_many(names)
+            polled = True
+        return polled
+
+    def _polls(self):
+        """Yield the lists of names to load for a due poll, once loaded."""
+
+        if self.due() > 0:
+            self.skipped += 1
+            return
+        now = monotonic()
+        full = now >= self._next_full
+        yield self._names(self.current_state(), full)
+        self.polls += 1
+        if full:
+            self._next_full = now + self.full_interval
+        state = self.current_state()
+        if state != self.state:
+            logger.debug(f"Boiler state {self.state} -> {state}")
+            # Poll what matters in the new state without waiting
+            if self.state is not None and not full:
+                yield self._names(state, False)
+                self.polls += 1
+            self.state = state
+        profile = self.profiles.get(state, self.profiles["standby"])
+        self._next_poll = now + profile.interval
+
+    def stats(self):
+        return {"state": self.state, "polls": self.polls, "skipped": self.skipped}
@@ -0,0 +1,321 @@
+"""
+On-disk log of Touch polls.
+
+A log is a directory of segments, one per schema (see snapshot module), named
+after the schema fingerprint:
+- <name>.json: meta data of the schema, written once;
+- <name>.rows: fixed size rows of doubles: poll time (UNIX time), numeric
+  values, then string values as indexes in the string table (NaN: missing);
+- <name>.strings: string table, one JSON string per line.
+Rows are appended in bulk by a Recorder and read through memory maps, so that
+months of polls are replayed without loading them (see replay module). Rows
+suit appending polls and replaying them in order; analysis reads columns
+(LogSegment.column()) or exports the log to Parquet (to_parquet()) or CSV.
+"""
+
+import csv
+import heapq
+import json
+import logging
+import math
+import mmap
+import os
+import sys
+from array import array
+from time import time as now
+
+from .snapshot import Schema, Snapshot
+
+logger = logging.getLogger(__name__)
+
+# Version of the log format
+LOG_VERSION = 1
+
+
+class Recorder:
+    """
+    Append snapshots of Touch data to the log in directory. Rows are written
+    by batch rows, or on flush() and close().
+    """
+
+    def __init__(self, directory, batch=60):
+        self.directory = directory
+        self.batch = batch
+        # Schema fingerprint -> _SegmentWriter
+        self._segments = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def record(self, touch, time=None):
+        """Append the cached data of touch, polled at time (default: now)."""
+
+        if not touch._meta:
+            logger.warning("Can't record Touch data without meta data")
+            return
+        snapshot = touch.snapshot()
+        fingerprint = snapshot.schema.fingerprint
+        segment = self._segments.get(fingerprint)
+        if segment is None:
+            segment = _SegmentWriter(self.directory, touch._meta, snapshot.schema)
+            self._segments[fingerprint] = segment
+        segment.append(now() if time is None else time, snapshot)
+        if segment.buffered >= self.batch:
+            segment.flush()
+
+    def flush(self):
+        """Write buffered rows."""
+        for segment in self._segments.values():
+            segment.flush()
+
+    def close(self):
+        self.flush()
+        self._segments.clear()
+
+
+class _SegmentWriter:
+    def __init__(self, directory, meta, schema):
+        self.path = os.path.join(directory, schema.fingerprint[:16])
+        self.schema = schema
+        if not os.path.exists(self.path + ".json"):
+            header = {
+                "version": LOG_VERSION,
+                "byteorder": sys.byteorder,
+                "fingerprint": schema.fingerprint,
+                "meta": meta,
+            }
+            with open(self.path + ".json", "w") as f:
+                json.dump(header, f)
+        # Drop a row partially written (e.g. on a crash), so that appended rows
+        # stay aligned
+        width = 1 + len(schema.numeric) + len(schema.strings)
+        try:
+            size = os.path.getsize(self.path + ".rows")
+        except FileNotFoundError:
+            size = 0
+        if size % (8 * width):
+            logger.warning(f"Dropping a row partially written in {self.path}")
+            os.truncate(self.path + ".rows", size - size % (8 * width))
+        # String -> index in the string table, and strings not written yet
+        self._strings = {s: i for i, s in enumerate(_read_strings(self.path))}
+        self._new_strings = []
+        self._rows = array("d")
+        self.buffered = 0
+
+    def append(self, time, snapshot):
+        row = array("d", [time])
+        row.extend(snapshot.numbers)
+        for value in snapshot.strings:
+            if value is None:
+                row.append(math.nan)
+                continue
+            index = self._strings.get(value)
+            if index is None:
+                index = self._strings[value] = len(self._strings)
+                self._new_strings.append(value)
+            row.append(index)
+        self._rows.extend(row)
+        self.buffered += 1
+
+    def flush(self):
+        if not self.buffered:
+            return
+        # Strings first, so that rows never refer to missing strings
+        if self._new_strings:
+            with open(self.path + ".strings", "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(s) + "\n" for s in self._new_strings)
+            self._new_strings = []
+        with open(self.path + ".rows", "ab") as f:
+            self._rows.tofile(f)
+        logger.debug(f"Recorded {self.buffered} poll(s) in {self.path}")
+        self._rows = array("d")
+        self.buffered = 0
+
+
+def _read_strings(path):
+    try:
+        with open(path + ".strings", encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+    except FileNotFoundError:
+        return []
+
+
+class LogSegment:
+    """Read access to a log segment, through a memory map of its rows."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path + ".json") as f:
+            header = json.load(f)
+        if header["version"] != LOG_VERSION:
+            raise ValueError(f"Unsupported log version in {path}")
+        self.meta = header["meta"]
+        self.schema = Schema.from_meta(self.meta)
+        if self.schema.fingerprint != header["fingerprint"]:
+            raise ValueError(f"Log schema mismatch in {path}")
+        self._swap = header["byteorder"] != sys.byteorder
+        self.strings = [sys.intern(s) for s in _read_strings(path)]
+        self.width = 1 + len(self.schema.numeric) + len(self.schema.strings)
+        self._map = None
+        self._rows = memoryview(b"").cast("d")
+        try:
+            size = os.path.getsize(path + ".rows")
+        except FileNotFoundError:
+            size = 0
+        # Ignore a row partially written
+        size -= size % (8 * self.width)
+        if size:
+            with open(path + ".rows", "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._rows = memoryview(self._map)[:size].cast("d")
+
+    def __len__(self):
+        return len(self._rows) // self.width
+
+    def _row(self, index):
+        row = array("d", self._rows[index * self.width : (index + 1) * self.width])
+        if self._swap:
+            row.byteswap()
+        return row
+
+    def time(self, index):
+        """Return the poll time of row index."""
+        return self._row(index)[0] if self._swap else self._rows[index * self.width]
+
+    def snapshot(self, index):
+        """Return the Snapshot of row index."""
+
+        row = self._row(index)
+        n = len(self.schema.numeric)
+        strings = [
+            None if value != value else self.strings[int(value)]
+            for value in row[1 + n :]
+        ]
+        return Snapshot(self.schema, row[1 : 1 + n], strings)
+
+    def column(self, device, attr):
+        """
+        Return the values of device.attr in every row, as an array of doubles
+        (NaN: missing) for numeric fields or a list of strings (None: missing).
+        Raise KeyError if the field is not in the schema.
+        """
+
+        numeric, position = self.schema.index[device, attr]
+        offset = 1 + position + (0 if numeric else len(self.schema.numeric))
+        values = array("d", self._rows[offset :: self.width])
+        if self._swap:
+            values.byteswap()
+        if numeric:
+            return values
+        strings = self.strings
+        return [None if value != value else strings[int(value)] for value in values]
+
+    def times(self):
+        """Return the poll times of every row, as an array of doubles."""
+        times = array("d", self._rows[:: self.width])
+        if self._swap:
+            times.byteswap()
+        return times
+
+    def polls(self, start=None, end=None):
+        """Yield (time, index) of rows polled between start and end."""
+        for index in range(len(self)):
+            time = self.time(index)
+            if (start is None or time >= start) and (end is None or time < end):
+                yield time, index
+
+    def close(self):
+        self._rows.release()
+        if self._map is not None:
+            self._map.close()
+
+
+def open_log(directory):
+    """Return the segments (LogSegment) of the log in directory."""
+    return [
+        LogSegment(os.path.join(directory, name[: -len(".json")]))
+        for name in sorted(os.listdir(directory))
+        if name.endswith(".json")
+    ]
+
+
+def iter_log(segments, start=None, end=None):
+    """
+    Yield (time, segment, Snapshot) of the polls logged in segments between
+    start and end (UNIX times), in time order.
+    """
+
+    def polls(i, segment):
+        # A function, so that each generator keeps its own i
+        for time, index in segment.polls(start, end):
+            yield time, i, index
+
+    polls = heapq.merge(*(polls(i, s) for i, s in enumerate(segments)))
+    for time, i, index in polls:
+        yield time, segments[i], segments[i].snapshot(index)
+
+
+def _fields(segments):
+    """Return the fields of segments, in order of first appearance."""
+
+    fields = []
+    for segment in segments:
+        for field in segment.schema.numeric + segment.schema.strings:
+            if field not in fields:
+                fields.append(field)
+    return fields
+
+
+def to_parquet(directory, path):
+    """
+    Write the log in directory to the Parquet file path, one column per field
+    and one row per poll, in time order. Require pyarrow.
+    """
+
+    import pyarrow  # type: ignore[import]
+    import pyarrow.parquet  # type: ignore[import]
+
+    segments = open_log(directory)
+    try:
+        fields = _fields(segments)
+        numeric = {f for s in segments for f in s.schema.numeric}
+        tables = []
+        for segment in segments:
+            columns = {"time": pyarrow.array(segment.times(), pyarrow.float64())}
+            for device, attr in fields:
+                if (device, attr) in segment.schema.index:
+                    values = segment.column(device, attr)
+                else:
+                    values = [None] * len(segment)
+                kind = pyarrow.float64() if (device, attr) in numeric else None
+                columns[f"{device}.{attr}"] = pyarrow.array(
+                    values, kind or pyarrow.string(), from_pandas=True
+                )
+            tables.append(pyarrow.table(columns))
+        if tables:
+            table = pyarrow.concat_tables(tables).sort_by("time")
+        else:
+            table = pyarrow.table({"time": pyarrow.array([], pyarrow.float64())})
+        pyarrow.parquet.write_table(table, path)
+    finally:
+        for segment in segments:
+            segment.close()
+
+
+def to_csv(directory, f):
+    """Write the log in directory to the text file f as CSV, one poll per row."""
+
+    segments = open_log(directory)
+    try:
+        fields = _fields(segments)
+        writer = csv.writer(f)
+        writer.writerow(["time"] + [f"{device}.{attr}" for device, attr in fields])
+        for time, _, snapshot in iter_log(segments):
+            row = [time]
+            for device, attr in fields:
+                try:
+                    row.append(snapshot.get_value(device, attr))
+                except KeyError:
+                    row.append("")
+            writer.writerow(row)
+    finally:
+        for segment in segments:
+            segment.close()
@@ -0,0 +1,167 @@
+import inspect
+import logging
+import threading
+from typing import Dict, List, Tuple
+
+from .history import History
+from .touch import Touch
+from .transport import get_transport
+
+logger = logging.getLogger(__name__)
+
+# Shared Touch objects: (url, password) -> [touch, reference count, settings
+# asked for by its users]
+_touches: Dict[Tuple[str, str], List] = {}
+_lock = threading.Lock()
+
+
+def get_touch(url, password, readonly=False, **kwargs):
+    """
+    Return the Touch object shared by every user of the device at url, creating
+    it on first use with kwargs. Each call must be balanced by a call to
+    release_touch().
+
+    The settings of every user are merged into the shared Touch, whichever
+    comes first: settings left to their default ask for nothing, time to live
+    are merged, the longest history and every kept name are kept, and data
+    are compact if any user asked for it. Raise ValueError if a setting
+    conflicts with the one asked for by a previous user. A shared Touch is read
+    only as long as every user asked for read only.
+    """
+
+    key = (url.rstrip("/"), password)
+    asked = _asked(kwargs)
+    with _lock:
+        entry = _touches.get(key)
+        if entry is None:
+            touch = Touch(url, password, readonly=readonly, **kwargs)
+            entry = _touches[key] = [touch, 0, asked]
+        else:
+            touch, _, settings = entry
+            merged = _merge_settings(key[0], settings, asked)
+            _apply_settings(touch, settings, merged)
+            entry[2] = merged
+            if touch.readonly and not readonly:
+                logger.debug(f"Shared Touch at {key[0]} is now writable")
+                touch.readonly = False
+        entry[1] += 1
+        logger.debug(f"Touch at {key[0]} has {entry[1]} user(s)")
+        return entry[0]
+
+
+def _defaults():
+    """Return the default settings of Touch objects."""
+
+    defaults = {}
+    for cls in reversed(Touch.__mro__):
+        if "__init__" not in vars(cls):
+            continue
+        for name, param in inspect.signature(cls.__init__).parameters.items():
+            if param.default is not param.empty:
+                defaults[name] = param.default
+    return defaults
+
+
+def _asked(kwargs):
+    """Return the settings of kwargs differing from the defaults."""
+
+    defaults = _defaults()
+    asked = {}
+    for name, value in kwargs.items():
+        if name == "ttl":
+            # No time to live is given as None or {}
+            value = dict(value or {})
+            if value:
+                asked[name] = value
+        elif name not in defaults or value != defaults[name]:
+            asked[name] = value
+    return asked
+
+
+def _merge_settings(url, settings, asked):
+    """
+    Return the settings of a shared Touch merged with the settings asked for
+    by a new user. Raise ValueError if they conflict.
+    """
+
+    merged = dict(settings)
+    for name, value in asked.items():
+        if name not in settings:
+            merged[name] = value
+            continue
+        current = settings[name]
+        if name == "ttl":
+            for key, seconds in value.items():
+                if current.get(key, seconds) != seconds:
+                    raise ValueError(
+                        f"Shared Touch at {url} has a time to live of "
+                        + f"{current[key]}s for {key}, not {seconds}s"
+                    )
+            merged[name] = {**current, **value}
+        elif name == "keep":
+            merged[name] = list(dict.fromkeys(list(current) + list(value)))
+        elif name == "history":
+            merged[name] = max(current, value)
+        elif current != value:
+            raise ValueError(
+                f"Shared Touch at {url} was set up with {name}={current!r}, "
+                + f"not {name}={value!r}"
+            )
+    return merged
+
+
+def _apply_settings(touch, settings, merged):
+    """Apply to the shared touch the merged settings that changed."""
+
+    changed = {
+        name: value for name, value in merged.items() if settings.get(name) != value
+    }
+    if not changed:
+        return
+    logger.debug(f"Shared Touch at {touch.url} now has {changed}")
+    for name in ("meta_cache", "default_ttl", "metrics"):
+        if name in changed:
+            setattr(touch, name, changed[name])
+    if "ttl" in changed:
+        touch.ttl = dict(changed["ttl"])
+    if "history" in changed:
+        if touch._history is None:
+            touch._history = History(changed["history"])
+        else:
+            touch._history.resize(changed["history"])
+    if "timeout" in changed:
+        touch.timeout = touch.transport.timeout = changed["timeout"]
+        # Reconnect with the new timeouts
+        touch.transport.close()
+    if "transport" in changed:
+        previous = touch.transport
+        touch.transport = get_transport(changed["transport"], touch.timeout)
+        previous.close()
+    if "keep" in changed:
+        trimmed = touch.keep is not None and not touch._meta_from_cache
+        touch.keep = touch._keep_fields(changed["keep"])
+        if trimmed:
+            # Meta data were trimmed to the names kept so far
+            touch._load_meta(refresh=True)
+    if "compact" in changed:
+        touch.compact = changed["compact"]
+        if touch._meta:
+            touch._meta_loaded()
+    touch._compile_accessors()
+
+
+def release_touch(touch):
+    """Release a Touch obtained by get_touch(), closing it on last release."""
+
+    with _lock:
+        for key, entry in _touches.items():
+            if entry[0] is touch:
+                break
+        else:
+            raise ValueError("Touch object is not registered")
+        entry[1] -= 1
+        if entry[1] > 0:
+            return
+        del _touches[key]
+    logger.debug(f"Close Touch at {key[0]}")
+    touch.close()
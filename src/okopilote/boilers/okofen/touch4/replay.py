@@ -0,0 +1,133 @@
+"""
+Replay of Touch polls logged by a Recorder (see recorder module), to run the
+boiler logic over recorded data with no device attached.
+"""
+
+import logging
+
+from .boiler import Boiler
+from .recorder import iter_log, open_log
+from .touch import BaseTouch, OpMode, Touch, TouchError
+
+logger = logging.getLogger(__name__)
+
+
+def serve_query(data, res, keep=None):
+    """
+    Return what the Touch answers to the data query res ("all", "device" or
+    "device.attr") from data, keeping only keep (see
+    decoder.decode_sections()).
+    """
+
+    if res == "all":
+        result = data
+    else:
+        device, _, attr = res.partition(".")
+        result = {device: dict(data.get(device, {}))}
+        if attr:
+            result[device] = {a: v for a, v in result[device].items() if a == attr}
+    if keep is not None:
+        result = {
+            device: (
+                attrs
+                if keep[device] is None
+                else {a: v for a, v in attrs.items() if a in keep[device]}
+            )
+            for device, attrs in result.items()
+            if device in keep
+        }
+    return result
+
+
+class ReplayTouch(Touch):
+    """
+    Touch serving the polls logged in directory between start and end (UNIX
+    times) instead of querying a device. Each load (load_data(), load_many(),
+    refresh()) moves to the next logged poll, whose time is in `time`: the
+    clock of ages and history. It is read only: writes only update the cache.
+    """
+
+    def __init__(self, directory, start=None, end=None, **kwargs):
+        """See BaseTouch for other arguments."""
+        BaseTouch.__init__(
+            self, f"file://{directory}", "replay", readonly=True, **kwargs
+        )
+        self._segments = open_log(directory)
+        self._polls = iter_log(self._segments, start, end)
+        self._segment = None
+        # Next poll, read ahead to load its meta data, and current poll data
+        self._next = next(self._polls, None)
+        self._poll = {}
+        # Time of the current poll
+        self.time = None
+        self._load_meta()
+
+    def close(self):
+        self._polls.close()
+        for segment in self._segments:
+            segment.close()
+
+    @property
+    def exhausted(self):
+        """Whether every poll has been replayed."""
+        return self._next is None
+
+    def _clock(self):
+        # Values are as old as the poll they come from
+        return 0.0 if self.time is None else self.time
+
+    def _advance(self):
+        """Move to the next logged poll."""
+
+        self._load_meta()
+        self.time, _, snapshot = self._next
+        self._poll = snapshot.to_dict()
+        self._next = next(self._polls, None)
+
+    def _request_touch(self, res, to_json=True, keep=None, _allow_recursion=True):
+        """Serve a data query from the current poll."""
+
+        if not to_json:
+            # Touch put write requests in the body response
+            return res
+        return serve_query(self._poll, res, keep)
+
+    def _load_meta(self, refresh=False):
+        """Load meta data of the next poll if they changed."""
+
+        if self._next is None:
+            raise TouchError("No more logged polls")
+        segment = self._next[1]
+        if segment is not self._segment:
+            logger.debug(f"Load meta data from {segment.path}")
+            self._segment = segment
+            self._store_meta(segment.meta)
+
+    def load_data(self, attribute="all", keep=()):
+        self._advance()
+        super().load_data(attribute, keep)
+
+    def load_many(self, names):
+        self._advance()
+        super().load_many(names)
+
+
+class ReplayBoiler(Boiler):
+    """Boiler driven by a ReplayTouch: each acquire() replays the next poll."""
+
+    def __init__(self, touch, room_t_set_max=22.0):
+        self.touch = touch
+        self.recorder = None
+        self.poller = None
+        self._init_state(room_t_set_max)
+
+    def close(self):
+        self.touch.close()
+
+    @property
+    def accept_control(self):
+        """
+        Is the boiler set up to be controlled? Unlike Boiler, the answer is
+        given from the current poll, without replaying the next one.
+        """
+        return self.touch.hc_op_mode in [OpMode.AUTO, OpMode.HEATING]
@@ -0,0 +1,338 @@
+"""
+Offline simulation of the boiler control logic.
+
+A MemoryTouch keeps device data in memory and answers queries and writes as
+a Touch does, with no HTTP involved. simulate() drives Boiler objects on
+MemoryTouch objects over room temperature runs, synthetic or recorded, as
+the controller does, and reports setpoint churn, writes and comfort, so that
+room_t_set_max and the setpoint shifts of Boiler can be tuned:
+
+    report = simulate(synthetic_runs(100), room_t_set_max=21.5, keep_shift=0.5)
+"""
+
+import copy
+import logging
+import math
+import random
+import threading
+from contextlib import contextmanager
+
+from .boiler import logger as boiler_logger
+from .recorder import iter_log, open_log
+from .replay import ReplayBoiler, serve_query
+from .touch import BaseTouch, Touch, TouchError
+from .touch import logger as touch_logger
+
+logger = logging.getLogger(__name__)
+
+# Loggers of the boiler logic, which log every forcing and write
+QUIETED_LOGGERS = [boiler_logger, touch_logger]
+
+# Meta data of the attributes used by the boiler logic, with their initial
+# values
+MINIMAL_META = {
+    "pe1": {
+        "L_temp_act": {"val": 200, "unit": "°C", "factor": 0.1},
+        "L_temp_set": {"val": 80, "unit": "°C", "factor": 0.1},
+        "L_state": {"val": 99, "format": "1:Start|4:Burning|99:Off"},
+    },
+    "hk1": {
+        "L_roomtemp_act": {"val": 190, "unit": "°C", "factor": 0.1},
+        "L_flowtemp_act": {"val": 200, "unit": "°C", "factor": 0.1},
+        "L_flowtemp_set": {"val": 80, "unit": "°C", "factor": 0.1},
+        "L_pump": {"val": 0, "format": "0:Off|1:On"},
+        "remote_override": {"val": 0, "unit": "K", "factor": 0.1},
+        "mode_auto": {"val": 1, "format": "0:Off|1:Auto|2:Comfort|3:Setback"},
+        "temp_heat": {
+            "val": 160,
+            "unit": "°C",
+            "factor": 0.1,
+            "min": 100,
+            "max": 400,
+        },
+    },
+}
+
+
+class MemoryTouch(Touch):
+    """
+    Touch whose device data live in memory, initialized from the values of
+    meta (a payload of "all?" queries, default MINIMAL_META). Writes update
+    device_data and are counted by "device.attr" in writes.
+    """
+
+    def __init__(self, meta=None, **kwargs):
+        """See BaseTouch for other arguments."""
+        BaseTouch.__init__(self, "memory://touch", "memory", **kwargs)
+        self._device_meta = copy.deepcopy(MINIMAL_META if meta is None else meta)
+        self.device_data = {
+            device: {
+                attr: value["val"] if isinstance(value, dict) else value
+                for attr, value in attrs.items()
+                if not attr.endswith("_info")
+            }
+            for device, attrs in self._device_meta.items()
+            if isinstance(attrs, dict)
+        }
+        self.writes = {}
+        self._load_meta()
+
+    def close(self):
+        pass
+
+    def _request_touch(self, res, to_json=True, keep=None, _allow_recursion=True):
+        """Serve a query from device data, or apply a write request."""
+
+        if res == "all?":
+            return self._device_meta
+        if not to_json:
+            name, _, value = res.partition("=")
+            device, _, attr = name.partition(".")
+            if attr not in self.device_data.get(device, ()):
+                raise TouchError(f"Key not found: {name}")
+            self.device_data[device][attr] = int(value)
+            self.writes[name] = self.writes.get(name, 0) + 1
+            # Touch put write requests in the body response
+            return res
+        return serve_query(self.device_data, res, keep)
+
+    def _load_meta(self, refresh=False):
+        self._store_meta(self._request_touch("all?"))
+
+    def _query_plan(self, names):
+        # Queries cost nothing but their processing: load all at once
+        return ["all"]
+
+
+class HeatingModel:
+    """
+    Minimal model of a heating installation. The heating circuit heats when
+    its op mode is auto or comfort and the room temperature is below the
+    setpoint: the burner fires and the room warms up by gain °C per hour.
+    The room loses loss times the difference to outside_t per hour.
+    """
+
+    def __init__(self, room_t=19.0, outside_t=5.0, gain=2.0, loss=0.1):
+        self.room_t = room_t
+        self.outside_t = outside_t
+        self.gain = gain
+        self.loss = loss
+
+    def step(self, data, seconds, room_t=None):
+        """
+        Update Touch device data after seconds. room_t, if given, is the
+        measured room temperature, overriding the model.
+        """
+
+        circuit, burner = data["hk1"], data["pe1"]
+        heating = (
+            circuit["mode_auto"] in (1, 2)
+            and circuit["temp_heat"] > round(self.room_t * 10)
+        )
+        if room_t is None:
+            hours = seconds / 3600
+            self.room_t += hours * (
+                (self.gain if heating else 0.0)
+                - self.loss * (self.room_t - self.outside_t)
+            )
+        else:
+            self.room_t = room_t
+        circuit["L_roomtemp_act"] = round(self.room_t * 10)
+        circuit["L_flowtemp_set"] = 400 if heating else 80
+        circuit["L_flowtemp_act"] = 380 if heating else 200
+        circuit["L_pump"] = 1 if heating else 0
+        burner["L_state"] = 4 if heating else 99
+        burner["L_temp_act"] = 650 if heating else 300
+        burner["L_temp_set"] = 700 if heating else 80
+
+
+class Report:
+    """
+    Figures of simulation runs. Degree hours are the integral over time of
+    the room temperature below (under_heating) or above (over_heating) the
+    wanted one.
+    """
+
+    fields = (
+        "runs",
+        "steps",
+        "writes",
+        "setpoint_writes",
+        "op_mode_writes",
+        "forced_steps",
+        "max_setpoint_steps",
+        "under_heating",
+        "over_heating",
+        "abs_error",
+    )
+
+    def __init__(self):
+        for field in self.fields:
+            setattr(self, field, 0)
+
+    def add(self, other):
+        """Add the figures of another report."""
+        for field in self.fields:
+            setattr(self, field, getattr(self, field) + getattr(other, field))
+        return self
+
+    @property
+    def mean_abs_error(self):
+        """Mean difference between room and wanted temperatures, in °C."""
+        return self.abs_error / self.steps if self.steps else math.nan
+
+    def as_dict(self):
+        result = {field: getattr(self, field) for field in self.fields}
+        result["mean_abs_error"] = self.mean_abs_error
+        return result
+
+    def __repr__(self):
+        return f"<Report {self.as_dict()}>"
+
+
+def run(
+    wanted,
+    measured=None,
+    step=60.0,
+    room_t_set_max=22.0,
+    hysteresis=0.0,
+    model=HeatingModel,
+    meta=None,
+    log_level=logging.ERROR,
+    **tuning,
+):
+    """
+    Drive a Boiler over a run and return its Report. wanted lists the room
+    temperature wanted by the controller at each step of step seconds: heat
+    is forced while the room is colder, then released once the room is
+    hysteresis °C warmer than wanted. measured lists recorded room
+    temperatures replacing those of the HeatingModel returned by model().
+    Records of the boiler logic below log_level are dropped during the run.
+    tuning sets Boiler attributes, like start_shift or keep_shift.
+    """
+
+    model = model()
+    touch = MemoryTouch(meta)
+    boiler = ReplayBoiler(touch, room_t_set_max=room_t_set_max)
+    for name, value in tuning.items():
+        if not hasattr(boiler, name):
+            raise TypeError(f"Boiler has no attribute '{name}'")
+        setattr(boiler, name, value)
+    report = Report()
+    report.runs = 1
+    hours = step / 3600
+    forcing = False
+    measured = iter(()) if measured is None else iter(measured)
+    with _log_level(log_level):
+        for target in wanted:
+            model.step(touch.device_data, step, next(measured, None))
+            boiler.acquire()
+            room_t = touch.room_t
+            if boiler.accept_control:
+                if room_t < target:
+                    boiler.force_heating()
+                    forcing = True
+                elif forcing and room_t >= target + hysteresis:
+                    boiler.release_heating()
+                    forcing = False
+            report.steps += 1
+            report.forced_steps += forcing
+            if forcing and boiler.force_room_t_set == room_t_set_max:
+                report.max_setpoint_steps += 1
+            report.under_heating += max(0.0, target - room_t) * hours
+            report.over_heating += max(0.0, room_t - target) * hours
+            report.abs_error += abs(room_t - target)
+    report.writes = sum(touch.writes.values())
+    report.setpoint_writes = touch.writes.get("hk1.temp_heat", 0)
+    report.op_mode_writes = touch.writes.get("hk1.mode_auto", 0)
+    boiler.close()
+    return report
+
+
+class _RunFilter(logging.Filter):
+    """
+    Filter of QUIETED_LOGGERS dropping the records below the log level of the
+    run of the current thread, if any. Loggers keep their level: other
+    threads log as configured while runs are going on.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._local = threading.local()
+
+    def filter(self, record):
+        level = getattr(self._local, "level", None)
+        return level is None or record.levelno >= level
+
+
+_run_filter = _RunFilter()
+for _log in QUIETED_LOGGERS:
+    _log.addFilter(_run_filter)
+
+
+@contextmanager
+def _log_level(level):
+    """Context dropping the records of QUIETED_LOGGERS below level."""
+
+    local = _run_filter._local
+    previous = getattr(local, "level", None)
+    local.level = level
+    try:
+        yield
+    finally:
+        local.level = previous
+
+
+def simulate(runs, **kwargs):
+    """
+    Simulate runs, an iterable of (wanted, measured) temperature lists (see
+    run() for them and for kwargs), and return the sum of their reports.
+    """
+
+    report = Report()
+    for wanted, measured in runs:
+        report.add(run(wanted, measured, **kwargs))
+    return report
+
+
+def synthetic_runs(count, steps=1440, step=60.0, seed=0):
+    """
+    Generate count runs of steps steps of step seconds (default: one day by
+    minute) with no measured temperature. The wanted temperature follows a
+    day and night schedule with random comfort and setback temperatures.
+    """
+
+    rand = random.Random(seed)
+    for _ in range(count):
+        comfort = rand.uniform(19.0, 21.0)
+        setback = rand.uniform(15.0, 18.0)
+        start = rand.uniform(5.0, 8.0) * 3600
+        end = rand.uniform(21.0, 23.0) * 3600
+        wanted = [
+            comfort if start <= (i * step) % 86400 < end else setback
+            for i in range(steps)
+        ]
+        yield wanted, None
+
+
+def recorded_run(directory, wanted, start=None, end=None):
+    """
+    Return a run of the room temperatures recorded in directory (see recorder
+    module) between start and end (UNIX times), wanting wanted at every step.
+    """
+
+    measured = []
+    segments = open_log(directory)
+    try:
+        for _, segment, snapshot in iter_log(segments, start, end):
+            factor = segment.meta["hk1"]["L_roomtemp_act"].get("factor", 1)
+            try:
+                measured.append(snapshot.get_value("hk1", "L_roomtemp_act") * factor)
+            except KeyError:
+                # Not polled: keep the last temperature
+                if measured:
+                    measured.append(measured[-1])
+    finally:
+        for segment in segments:
+            segment.close()
+    return [wanted] * len(measured), measured
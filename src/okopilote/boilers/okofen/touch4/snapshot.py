@@ -0,0 +1,268 @@
+"""
+Compact representation of Touch data.
+
+A Schema, derived from meta data, gives each device attribute a fixed place:
+numeric values are stored in a typed array of doubles, other values (strings)
+in a list of interned strings. A Snapshot holding data in that layout is cheap
+to copy, diff and serialize, and behaves like the {device: {attr: value}}
+dict returned by Touch.
+"""
+
+import hashlib
+import json
+import math
+import sys
+from array import array
+from collections.abc import Mapping, MutableMapping
+
+
+class Schema:
+    """
+    Layout of Touch data: fields (device, attr) split in numeric and string
+    fields, in meta data order.
+    """
+
+    def __init__(self, numeric, strings, devices=()):
+        # Lists of (device, attr)
+        self.numeric = list(numeric)
+        self.strings = list(strings)
+        # (device, attr) -> (is numeric, position)
+        self.index = {}
+        # device -> list of attributes, including devices without attribute
+        self.devices = {device: [] for device in devices}
+        for numeric_field, fields in ((True, self.numeric), (False, self.strings)):
+            for position, (device, attr) in enumerate(fields):
+                self.index[device, attr] = (numeric_field, position)
+                self.devices.setdefault(device, []).append(attr)
+        layout = json.dumps([self.numeric, self.strings, list(self.devices)])
+        self.fingerprint = hashlib.sha1(layout.encode()).hexdigest()
+
+    @classmethod
+    def from_meta(cls, meta):
+        """Derive a schema from Touch meta data."""
+
+        numeric, strings, devices = [], [], []
+        for device, attrs in meta.items():
+            if not isinstance(attrs, dict):
+                continue
+            devices.append(device)
+            for attr, attr_meta in attrs.items():
+                if isinstance(attr_meta, dict):
+                    val = attr_meta.get("val")
+                    if isinstance(val, (int, float)) and not isinstance(val, bool):
+                        numeric.append((device, attr))
+                        continue
+                    strings.append((device, attr))
+                elif not attr.endswith("_info"):
+                    # Plain values like "L_statetext"; "*_info" are comments
+                    strings.append((device, attr))
+        return cls(numeric, strings, devices)
+
+
+class Snapshot(Mapping):
+    """
+    Touch data laid out according to a schema. Missing values are NaN or None.
+    Values not described by the schema are kept in a dict aside.
+
+    A Snapshot is a mapping of devices to mutable views of their attributes,
+    so that it can stand in for the {device: {attr: value}} data dict.
+    """
+
+    __slots__ = ("schema", "numbers", "strings", "extra")
+
+    def __init__(self, schema, numbers=None, strings=None, extra=None):
+        self.schema = schema
+        if numbers is None:
+            numbers = array("d", [math.nan]) * len(schema.numeric)
+        self.numbers = numbers
+        self.strings = [None] * len(schema.strings) if strings is None else strings
+        # device -> {attr: value} not fitting in the schema
+        self.extra = {} if extra is None else extra
+
+    @classmethod
+    def from_data(cls, schema, data):
+        """Build a snapshot from a {device: {attr: value}} dict."""
+        snapshot = cls(schema)
+        snapshot.merge(data)
+        return snapshot
+
+    def get_value(self, device, attr):
+        """Return the raw value of device.attr. Raise KeyError if missing."""
+
+        field = self.schema.index.get((device, attr))
+        if field is not None:
+            numeric, position = field
+            if numeric:
+                value = self.numbers[position]
+                if value == value:
+                    return int(value) if value.is_integer() else value
+            else:
+                value = self.strings[position]
+                if value is not None:
+                    return value
+        return self.extra[device][attr]
+
+    def set_value(self, device, attr, value):
+        """Store the raw value of device.attr."""
+
+        field = self.schema.index.get((device, attr))
+        if field is not None:
+            numeric, position = field
+            if numeric:
+                stored = isinstance(value, (int, float)) and not isinstance(
+                    value, bool
+                )
+                if stored:
+                    self.numbers[position] = value
+            else:
+                stored = isinstance(value, str)
+                if stored:
+                    self.strings[position] = sys.intern(value)
+            if stored:
+                if self.extra:
+                    self.extra.get(device, {}).pop(attr, None)
+                return
+        self.extra.setdefault(device, {})[attr] = value
+
+    def del_value(self, device, attr):
+        """Forget the value of device.attr. Raise KeyError if missing."""
+
+        self.get_value(device, attr)
+        if attr in self.extra.get(device, ()):
+            del self.extra[device][attr]
+            return
+        numeric, position = self.schema.index[device, attr]
+        if numeric:
+            self.numbers[position] = math.nan
+        else:
+            self.strings[position] = None
+
+    def merge(self, data):
+        """Update values from a {device: {attr: value}} dict."""
+        for device, attrs in data.items():
+            for attr, value in attrs.items():
+                self.set_value(device, attr, value)
+
+    def copy(self):
+        """Return an independent copy (flat copy of the array and list)."""
+        return Snapshot(
+            self.schema,
+            array("d", self.numbers),
+            list(self.strings),
+            {device: dict(attrs) for device, attrs in self.extra.items()},
+        )
+
+    def diff(self, other):
+        """
+        Return the sorted list of (device, attr) whose values differ between
+        this snapshot and other, which must share the same schema.
+        """
+
+        if other.schema.fingerprint != self.schema.fingerprint:
+            raise ValueError("Snapshots do not share the same schema")
+        changed = []
+        if self.numbers != other.numbers:
+            for position, (a, b) in enumerate(zip(self.numbers, other.numbers)):
+                # NaN are missing values: equal to each other
+                if a != b and (a == a or b == b):
+                    changed.append(self.schema.numeric[position])
+        if self.strings != other.strings:
+            for position, (a, b) in enumerate(zip(self.strings, other.strings)):
+                if a != b:
+                    changed.append(self.schema.strings[position])
+        for device in self.extra.keys() | other.extra.keys():
+            mine, theirs = self.extra.get(device, {}), other.extra.get(device, {})
+            changed.extend(
+                (device, attr)
+                for attr in mine.keys() | theirs.keys()
+                if mine.get(attr) != theirs.get(attr)
+            )
+        return sorted(changed)
+
+    def to_bytes(self):
+        """Serialize the snapshot (not its schema)."""
+
+        header = json.dumps(
+            {
+                "schema": self.schema.fingerprint,
+                "count": len(self.numbers),
+                "strings": self.strings,
+                "extra": self.extra,
+            }
+        ).encode()
+        return len(header).to_bytes(4, "little") + header + self.numbers.tobytes()
+
+    @classmethod
+    def from_bytes(cls, schema, data):
+        """Deserialize a snapshot serialized with the same schema."""
+
+        size = int.from_bytes(data[:4], "little")
+        header = json.loads(data[4 : 4 + size].decode())
+        if header["schema"] != schema.fingerprint:
+            raise ValueError("Snapshot was serialized with another schema")
+        numbers = array("d")
+        numbers.frombytes(data[4 + size :])
+        if len(numbers) != header["count"]:
+            raise ValueError("Truncated snapshot")
+        strings = [None if s is None else sys.intern(s) for s in header["strings"]]
+        return cls(schema, numbers, strings, header["extra"])
+
+    def to_dict(self):
+        """Return values as a {device: {attr: value}} dict."""
+        return {device: dict(view) for device, view in self.items()}
+
+    # Mapping interface: device -> view of its attributes
+
+    def __getitem__(self, device):
+        if device not in self.schema.devices and device not in self.extra:
+            raise KeyError(device)
+        return _DeviceView(self, device)
+
+    def __iter__(self):
+        yield from self.schema.devices
+        for device in self.extra:
+            if device not in self.schema.devices:
+                yield device
+
+    def __len__(self):
+        return len(self.schema.devices.keys() | self.extra.keys())
+
+    def setdefault(self, device, default=None):
+        """Return the view of device, which always exists once asked for."""
+        if device not in self.schema.devices:
+            self.extra.setdefault(device, {})
+        return _DeviceView(self, device)
+
+
+class _DeviceView(MutableMapping):
+    # Mutable view of the attributes of a device in a snapshot
+
+    __slots__ = ("snapshot", "device")
+
+    def __init__(self, snapshot, device):
+        self.snapshot = snapshot
+        self.device = device
+
+    def __getitem__(self, attr):
+        return self.snapshot.get_value(self.device, attr)
+
+    def __setitem__(self, attr, value):
+        self.snapshot.set_value(self.device, attr, value)
+
+    def __delitem__(self, attr):
+        self.snapshot.del_value(self.device, attr)
+
+    def __iter__(self):
+        extra = self.snapshot.extra.get(self.device, {})
+        for attr in self.snapshot.schema.devices.get(self.device, ()):
+            if attr in extra:
+                continue
+            try:
+                self.snapshot.get_value(self.device, attr)
+            except KeyError:
+                continue
+            yield attr
+        yield from list(extra)
+
+    def __len__(self):
+        return sum(1 for _ in self)
@@ -1,23 +1,24 @@
 import logging
 import math
 import re
-import requests
+import threading
+from contextlib import asynccontextmanager, contextmanager, nullcontext
 from enum import Enum
-from urllib.parse import urljoin
-from time import sleep
+from time import monotonic, sleep
+from typing import Dict, List, Optional, Tuple
 
-try:
-    from requests.exceptions import JSONDecodeError
-except ImportError:
-    from json.decoder import JSONDecodeError
+from .circuits import FIRED_STATES, Burners, Circuits, KeepUnits
+from .decoder import ENCODING, decode, decode_sections
+from .errors import TouchError, TouchUnavailable
+from .fields import Device, Fields
+from .history import Change, ChangeLog, History
+from .meta_cache import interface_version
+from .snapshot import Schema, Snapshot
+from .transport import get_transport
 
 logger = logging.getLogger(__name__)
 
 
-class TouchError(Exception):
-    """Generic parent exception for Pelletronic errors."""
-
-
 class OpMode(Enum):
     """Constants for operation modes."""
 
@@ -27,114 +28,886 @@ class OpMode(Enum):
     SET_BACK = 3
 
 
-class Touch:
+# Operation modes by value, faster than OpMode(value)
+_OP_MODES = {mode.value: mode for mode in OpMode}
+
+
+class RequestScheduler:
     """
-    Interface for the Pelletronic Touch v4, Oekofen JSON Interface V4.00b.
+    Space out the requests sent to a Touch.
+
+    Touch rejects requests sent less than some delay after the previous one
+    and advertises that delay in the rejection ("Wait at least Nms during
+    requests"). The scheduler remembers the advertised delay and when the last
+    request ended, and holds back new requests until the delay is over. Requests
+    to the same Touch are serialized, from threads (slot()) and coroutines
+    (async_slot()) alike.
+    """
+
+    def __init__(self, delay=0.0):
+        # Minimum delay between the end of a request and the next one, in s
+        self.delay = delay
+        self._last_end = -math.inf
+        self.last_network_time = 0.0
+        self._lock = threading.Lock()
+        # Metrics
+        self.requests = 0
+        self.throttled = 0
+        self.wait_time = 0.0
+        self.network_time = 0.0
+
+    def next_delay(self):
+        """Return how long the next request must wait before being sent."""
+        return max(0.0, self._last_end + self.delay - monotonic())
+
+    def record(self, queued, sent, ended):
+        """Record timings (monotonic times) of a completed request."""
+        self._last_end = ended
+        self.last_network_time = ended - sent
+        self.requests += 1
+        self.wait_time += sent - queued
+        self.network_time += ended - sent
+
+    def record_throttle(self, delay):
+        """Record a rejection of Touch asking for delay seconds between requests."""
+        self.throttled += 1
+        if delay != self.delay:
+            logger.debug(f"Touch wants us to wait {delay}s between requests")
+        self.delay = delay
+
+    @contextmanager
+    def slot(self, check=None):
+        """
+        Context manager waiting for and holding the right to send a request.
+        check, if any, is called once the slot is acquired: exceptions it raises
+        release the slot without sending the request.
+        """
+
+        queued = monotonic()
+        with self._lock:
+            if check is not None:
+                check()
+            wait = self.next_delay()
+            if wait > 0:
+                sleep(wait)
+            sent = monotonic()
+            try:
+                yield
+            finally:
+                self.record(queued, sent, monotonic())
+
+    @asynccontextmanager
+    async def async_slot(self, check=None):
+        """
+        Asynchronous context manager like slot(), for coroutines: waits
+        without blocking the event loop.
+        """
+
+        # Imported here to keep importing this module fast
+        import asyncio
+
+        queued = monotonic()
+        if not self._lock.acquire(blocking=False):
+            # Wait for the lock in a thread: it may be held by another thread
+            acquired = asyncio.get_running_loop().run_in_executor(
+                None, self._lock.acquire
+            )
+            try:
+                await asyncio.shield(acquired)
+            except asyncio.CancelledError:
+                acquired.add_done_callback(lambda _: self._lock.release())
+                raise
+        try:
+            if check is not None:
+                check()
+            wait = self.next_delay()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            sent = monotonic()
+            try:
+                yield
+            finally:
+                self.record(queued, sent, monotonic())
+        finally:
+            self._lock.release()
+
+    def stats(self):
+        """Return request metrics: counts and queue wait vs network time (s)."""
+        n = self.requests or 1
+        return {
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "delay": self.delay,
+            "wait_time": self.wait_time,
+            "network_time": self.network_time,
+            "avg_wait_time": self.wait_time / n,
+            "avg_network_time": self.network_time / n,
+        }
+
+
+# Request schedulers shared by every Touch object of the same URL
+_schedulers: Dict[str, RequestScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(url):
+    """Return the request scheduler of the Touch at url."""
+    with _schedulers_lock:
+        return _schedulers.setdefault(url.rstrip("/"), RequestScheduler())
+
+
+class CircuitBreaker:
+    """
+    Fail fast while a Touch is unreachable, rather than waiting for timeouts.
+
+    After threshold consecutive failures, the breaker opens: requests are
+    refused at once with TouchUnavailable for backoff seconds. Then requests
+    probe the Touch again (half open): a success closes the breaker, a failure
+    opens it again for twice as long, up to max_backoff seconds. Requests to a
+    Touch being serialized, a failed probe stops the requests queued after it.
+    """
+
+    def __init__(self, threshold=3, backoff=4.0, max_backoff=300.0):
+        self.threshold = threshold
+        self.base_backoff = backoff
+        self.max_backoff = max_backoff
+        self.backoff = backoff
+        self.state = "closed"
+        self.failures = 0
+        self._retry_at = -math.inf
+        self._lock = threading.Lock()
+        # Metrics
+        self.opened = 0
+        self.refused = 0
+
+    def check(self):
+        """
+        Raise TouchUnavailable unless a request may be sent, which is the case
+        once the backoff is over.
+        """
+
+        with self._lock:
+            if self.state != "open":
+                return
+            now = monotonic()
+            if now >= self._retry_at:
+                logger.info("Probe the unreachable Touch")
+                self.state = "half-open"
+                return
+            self.refused += 1
+            wait = max(0.0, self._retry_at - now)
+        raise TouchUnavailable(f"Touch is unreachable, next try in {wait:.1f}s")
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                logger.info("Touch is reachable again")
+            self.state = "closed"
+            self.failures = 0
+            self.backoff = self.base_backoff
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half-open":
+                self.backoff = min(self.backoff * 2, self.max_backoff)
+            elif self.failures < self.threshold:
+                return
+            if self.state == "closed":
+                self.opened += 1
+            logger.warning(
+                f"Touch is unreachable ({self.failures} failures), "
+                + f"retry in {self.backoff:g}s"
+            )
+            self.state = "open"
+            self._retry_at = monotonic() + self.backoff
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "backoff": self.backoff,
+            "opened": self.opened,
+            "refused": self.refused,
+        }
+
+
+# Circuit breakers shared by every Touch object of the same URL
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(url):
+    """Return the circuit breaker of the Touch at url."""
+    with _breakers_lock:
+        return _breakers.setdefault(url.rstrip("/"), CircuitBreaker())
+
+
+class _Attribute:
+    # Descriptor of a float property of BaseTouch for a device attribute,
+    # writable unless its name starts with "L_". Reads go through the accessor
+    # table compiled when meta data are loaded: (dict of the device values,
+    # attribute, factor), or None when the time to live must be checked or
+    # the attribute is not in meta data. Also adds a <name>_round method to
+    # the class, rounding a value at the attribute precision.
+    __slots__ = ("name", "index", "device", "attr", "writable", "__doc__")
+
+    def __init__(self, device, attr, doc):
+        self.device = device
+        self.attr = attr
+        self.writable = not attr.startswith("L_")
+        self.__doc__ = doc
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.index = len(owner._dyn_props)
+        owner._dyn_props.append((name, self.device, self.attr, self.__doc__))
+        device, attr = self.device, self.attr
+
+        def fround(touch, value):
+            return touch._round(device, attr, value)
+
+        fround.__name__ = f"{name}_round"
+        fround.__doc__ = f"Round value with the same precision as {name}."
+        setattr(owner, fround.__name__, fround)
+
+    def __get__(self, touch, owner=None):
+        if touch is None:
+            return self
+        try:
+            values, attr, factor = touch._accessors[self.index]
+        except TypeError:
+            return touch._get(self.device, self.attr)
+        try:
+            return values[attr] * factor
+        except KeyError:
+            raise TouchError(f'"{self.device}.{self.attr}" not found in cache')
+
+    def __set__(self, touch, value):
+        if not self.writable:
+            raise AttributeError(f"{self.name} is read only")
+        touch._set(self.device, self.attr, value)
+
+
+class BaseTouch:
     """
+    Pelletronic Touch v4 data model, Oekofen JSON Interface V4.00b, without
+    I/O: meta data and data caches, value conversions and properties.
+    Subclasses implement the queries to the Touch.
 
-    def __init__(self, url, password, readonly=False):
-        self.api_url = url.rstrip("/") + "/" + password + "/"
+    Cached values expire after a time to live in seconds, given per
+    "device.attr" or per device in ttl, or else default_ttl (None: never).
+    Time to live of float properties are resolved when meta data are loaded.
+    With compact, cached data are held in a Snapshot (see snapshot module)
+    rather than in nested dicts.
+    timeout is the (connect, read) timeout of requests, in seconds.
+    keep lists names (see resolve()) to keep from "all" payloads besides the
+    properties: other sections and attributes are dropped while the payload is
+    decoded. None keeps everything. Meta data trimmed by keep are not saved to
+    meta_cache.
+    history is the number of samples of each value kept in history (0: no
+    history).
+    metrics is a metrics.Metrics object instrumenting requests, decoding and
+    property reads and writes, labelled with the Touch URL.
+    """
+
+    # Minimum number of changes kept by the change log, see cursor()
+    change_log_size = 1000
+
+    # Network time estimates (s) of query kinds, until measured
+    _default_costs = {"all": 0.4, "section": 0.1, "attr": 0.05}
+
+    def __init__(
+        self,
+        url,
+        password,
+        readonly=False,
+        meta_cache=None,
+        ttl=None,
+        default_ttl=None,
+        timeout=(10, 40),
+        compact=False,
+        keep=None,
+        history=0,
+        metrics=None,
+    ):
+        self.url = url.rstrip("/")
+        self.api_url = self.url + "/" + password + "/"
         self.readonly = readonly
+        self.meta_cache = meta_cache
+        self.timeout = timeout
         self._meta = {}
+        self._meta_from_cache = False
+        # Interface version of cached meta data, see meta_cache module
+        self._meta_version = None
+        # Fields and device views built from meta data on first use
+        self._fields = Fields(self._meta)
+        self._devices = {}
+        self._schema = None
+        self.compact = compact
         self._data = {}
-        self._session = requests.Session()
-        # Query and store meta data
-        self._load_meta()
+        self.ttl = dict(ttl or {})
+        self.default_ttl = default_ttl
+        # Monotonic time of the last fetch of each (device, attr)
+        self._fetched = {}
+        # Every (device, attr) read so far, refreshed together when expired
+        self._read = set()
+        # Write buffer: (device, attr) -> request, and cached values before
+        # the buffered writes
+        self._transaction_depth = 0
+        self._pending = {}
+        self._originals = {}
+        # (device, attr) kept from "all" payloads, or None
+        self.keep = self._keep_fields(keep)
+        self.metrics = metrics
+        self._history = History(history) if history else None
+        # [(callback, set of (device, attr) or None)] notified of changes
+        self._subscribers = []
+        # Changes of the loads not notified yet
+        self._changes = []
+        # history.ChangeLog of changes, created by the first cursor()
+        self.change_log = None
+        self._compile_accessors()
+        # Heating circuits and burners, discovered from meta data
+        self.circuits = Circuits(self)
+        self.burners = Burners(self)
+        self.scheduler = get_scheduler(self.url)
+        self.breaker = get_breaker(self.url)
+        # Measured network time of query kinds
+        self._costs = {}
+
+    def __getattr__(self, name):
+        # Devices of meta data, like touch.hk1 (see fields module)
+        meta = self.__dict__.get("_meta", {})
+        if name.startswith("_") or not isinstance(meta.get(name), dict):
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            )
+        return self.device(name)
+
+    def device(self, name):
+        """Return a view of device name, whose attributes are the device's."""
+
+        view = self._devices.get(name)
+        if view is None:
+            if not isinstance(self._meta.get(name), dict):
+                raise ValueError(f"Touch has no device '{name}'")
+            view = self._devices[name] = Device(self, name)
+        return view
+
+    def field(self, name):
+        """
+        Return the fields.Field of name (a dynamic property name or
+        "device.attr"), describing its type, unit, range and choices.
+        """
+
+        device, attr = self._field(name)
+        try:
+            return self._fields.get(device, attr or "")
+        except KeyError:
+            raise ValueError(f"Touch object has no attribute '{name}'")
 
-    def _request_touch(self, res, to_json=True, _allow_recursion=True):
+    @property
+    def meta(self):
+        """Meta data, as answered by the Touch to "all?" queries. Read only."""
+        return self._meta
+
+    @property
+    def meta_from_cache(self):
+        """Whether meta data were loaded from the meta data cache."""
+        return self._meta_from_cache
+
+    def resolve(self, name):
         """
-        Send a request to the Pelletronic Touch and return the JSON response.
-        res may be a URL or a requests.PreparedRequest object.
+        Return (device, attr) designated by name, which may be a dynamic
+        property name, "device.attr" or a device section (attr is then None).
+        Raise ValueError if there is no such attribute.
         """
+        return self._resolve(name)
+
+    def loaded(self, name="all"):
+        """Whether values of name ("all" or see resolve()) were ever loaded."""
 
-        if isinstance(res, requests.PreparedRequest):
-            r = self._session.send(res, timeout=(10, 40))
+        if name == "all":
+            return bool(self._fetched)
+        device, attr = self._resolve(name)
+        if attr is None:
+            return any(fetched[0] == device for fetched in self._fetched)
+        return (device, attr) in self._fetched
+
+    def cached(self, name="all"):
+        """
+        Return a copy of the cached raw values (factors not applied) of name
+        ("all" or see resolve()), as {device: {attr: value}}.
+        """
+
+        data = self._data
+        if name == "all":
+            return {device: dict(attrs) for device, attrs in data.items()}
+        device, attr = self._resolve(name)
+        attrs = data.get(device, {})
+        if attr is not None:
+            attrs = {attr: attrs[attr]} if attr in attrs else {}
+        return {device: dict(attrs)}
+
+    def set_raw(self, name, raw_value):
+        """
+        Set the setting name (see resolve()) to raw_value, the integer carried
+        by Touch write requests (factor not applied). Raise ValueError if name
+        is not a setting, or is read only.
+        """
+
+        device, attr = self._resolve(name)
+        if attr is None or not self.field(name).writable:
+            raise ValueError(f"'{name}' is not a setting")
+        self._set(device, attr, raw_value * self._factor(device, attr))
+
+    @property
+    def buffering(self):
+        """Whether writes are buffered until commit() (see begin())."""
+        return self._buffering()
+
+    def pending_writes(self):
+        """Return the write requests buffered until commit(), in order."""
+        return [request for _, request in self._pending_writes()]
+
+    def _write(self, request):
+        """Send a write request to Touch."""
+        raise NotImplementedError
+
+    def _buffering(self):
+        """Whether writes are buffered rather than sent at once."""
+        return self._transaction_depth > 0
+
+    def _span(self, name):
+        """Return a context timing a block into histogram name, if any."""
+        if self.metrics is None:
+            return nullcontext()
+        return self.metrics.span(name, touch=self.url)
+
+    def _count(self, name, value=1):
+        """Add value to counter name, if any."""
+        if self.metrics is not None:
+            self.metrics.inc(name, value, touch=self.url)
+
+    def _counted(self, chunks):
+        """Yield chunks, counting received bytes."""
+        for chunk in chunks:
+            self._count("received_bytes", len(chunk))
+            yield chunk
+
+    def _set(self, device, attr, value):
+        """
+        Set a Touch setting value, unless it is already the cached value.
+        While buffering, the write is coalesced with previous writes of the
+        same attribute and only the cache is updated.
+        """
+
+        if self.metrics is None:
+            return self._set_value(device, attr, value)
+        with self._span("set"):
+            return self._set_value(device, attr, value)
+
+    def _set_value(self, device, attr, value):
+        request, raw_value = self._write_request(device, attr, value)
+        cached = self._data.get(device, {}).get(attr)
+        if self._buffering():
+            key = (device, attr)
+            # Keep the value to restore on rollback
+            self._originals.setdefault(key, cached)
+            # Move the write at the end of the buffer: ordered by last write
+            self._pending.pop(key, None)
+            self._pending[key] = request
+            logger.debug(f"Buffer {request}")
+        elif cached == raw_value:
+            logger.debug(f"Skip {request}: value is unchanged")
+            return
         else:
-            r = self._session.get(urljoin(self.api_url, res), timeout=(10, 40))
-        # Touch enforces some delay before each request
-        if r.status_code == requests.codes.unauthorized and _allow_recursion:
-            m = re.match("Wait at least ([0-9]+)ms during requests", r.text)
-            if m:
-                delay = float(m.group(1)) / 1000
-                logger.debug(f"Touch wants us to wait {delay}s")
-                sleep(delay)
+            self._write(request)
+            self._wrote(device, attr, cached, raw_value)
+        self._data.setdefault(device, {})[attr] = raw_value
+
+    def _wrote(self, device, attr, old, new):
+        """Collect the change of a value written to Touch."""
+        if self._subscribers and old != new:
+            self._changes.append(Change(device, attr, old, new, self._clock()))
+
+    def _pending_writes(self):
+        """
+        Return buffered write requests, in order, as [((device, attr),
+        request)], skipping those restoring the value before buffering.
+        """
+        return [
+            (key, request)
+            for key, request in self._pending.items()
+            if self._data[key[0]].get(key[1]) != self._originals[key]
+        ]
+
+    def _end_transaction(self, sent):
+        """Clear the write buffer, restoring cached values not sent."""
+
+        for (device, attr), original in self._originals.items():
+            if (device, attr) in sent:
+                self._wrote(device, attr, original, self._data[device].get(attr))
+                continue
+            if original is None:
+                self._data.get(device, {}).pop(attr, None)
             else:
-                logger.warning("Touch rejected us. Wait 4s and retry")
-                sleep(4)
-            return self._request_touch(res, _allow_recursion=False)
-        r.raise_for_status()
-        if to_json:
-            try:
-                return r.json()
-            except JSONDecodeError:
-                raise TouchError(
-                    "Not a JSON response. Wrong password or "
-                    + f"setting name? Response: {r.text}"
-                )
-        else:
-            return r.text
+                self._data[device][attr] = original
+        self._pending.clear()
+        self._originals.clear()
 
-    def _load_meta(self):
-        """Query meta data from Touch and store them."""
+    def begin(self):
+        """Start buffering writes until commit() (transactions may nest)."""
+        self._transaction_depth += 1
 
-        logger.debug("Load meta data from Touch")
-        req = requests.Request("GET", urljoin(self.api_url, "all") + "?")
-
-        # Meta data are queried by ending URL paths with "?" but the char is
-        # stripped by several modules like urllib and requests. So we need a
-        # hack to restore the "?" before requests send the HTTP packet.
-        class MyPreparedRequest(requests.PreparedRequest):
-            @property
-            def path_url(self):
-                path_url = super().path_url
-                try:
-                    if self.url[-1] == "?" and path_url[-1] != "?":
-                        path_url += "?"
-                except IndexError:
-                    pass
-                return path_url
-
-        # Normally a prepared request is created by calling req.prepare() but
-        # we need to use our custom class.
-        prep = MyPreparedRequest()
-        prep.prepare(
-            method=req.method,
-            url=req.url,
-            headers=req.headers,
-            files=req.files,
-            data=req.data,
-            json=req.json,
-            params=req.params,
-            auth=req.auth,
-            cookies=req.cookies,
-            hooks=req.hooks,
-        )
-        # Restore the "?" in the prepared request
-        try:
-            if req.url[-1] == "?":
-                prep.url += "?"
-        except IndexError:
-            pass
-        # Eventually send the request (and get JSON response)
-        data = self._request_touch(prep)
+    def rollback(self):
+        """Discard buffered writes and restore the cached values."""
+        self._transaction_depth = 0
+        self._end_transaction(())
+
+    def _load_cached_meta(self):
+        """Load meta data from the cache. Return False if there are none."""
+
+        if self.meta_cache is None:
+            return False
+        meta = self.meta_cache.load(self.url)
+        if meta is None:
+            return False
+        logger.debug("Load meta data from cache")
+        self._meta.update(meta)
+        self._meta_from_cache = True
+        self._meta_version = interface_version(meta)
+        self._meta_loaded()
+        return True
+
+    def _store_meta(self, data):
+        """Store meta data queried from Touch."""
+
+        self._meta.clear()
         self._meta.update(data)
+        self._meta_from_cache = False
+        self._meta_loaded()
+        # Trimmed meta data would lack attributes other users of the cache need
+        if self.meta_cache is not None and self.keep is None:
+            self.meta_cache.save(self.url, data)
 
-    def _get(self, device, attr):
-        """Return a Touch setting value from cache."""
+    def _meta_outdated(self, query, data):
+        """
+        Whether cached meta data do not describe data loaded by query, as
+        happens after a firmware update: whole "all" payloads must be of the
+        interface version of meta data (see meta_cache.interface_version()),
+        others must only have attributes described by meta data.
+        """
+
+        if not self._meta_from_cache:
+            return False
+        if query == "all" and self.keep is None:
+            if interface_version(data) != self._meta_version:
+                logger.info("Cached meta data are of another interface, reload")
+                return True
+            return False
+        for device, attrs in data.items():
+            if not attrs.keys() <= self._meta.get(device, {}).keys():
+                logger.info(f"Cached meta data are outdated ({device}), reload")
+                return True
+        return False
+
+    def _meta_loaded(self):
+        """Update what derives from meta data."""
+
+        self._schema = Schema.from_meta(self._meta)
+        if self.compact:
+            data = self._data
+            self._data = Snapshot(self._schema)
+            self._data.merge(data)
+        self._compile_accessors()
+        self._fields = Fields(self._meta)
+        self._devices = {}
+        self.circuits = Circuits(self)
+        self.burners = Burners(self)
+
+    def snapshot(self):
+        """Return a copy of cached data as a compact Snapshot."""
+
+        if self.compact:
+            return self._data.copy()
+        if self._schema is None:
+            self._schema = Schema.from_meta(self._meta)
+        return Snapshot.from_data(self._schema, self._data)
+
+    def _compile_accessors(self):
+        """Resolve the accessor of each float property from meta data."""
+
+        accessors = []
+        for name, device, attr, _ in self._dyn_props:
+            meta = self._meta.get(device, {}).get(attr)
+            if (
+                not isinstance(meta, dict)
+                or self._ttl(device, attr) is not None
+                or self.metrics is not None
+            ):
+                # Go through _get()
+                accessors.append(None)
+            else:
+                values = self._data.setdefault(device, {})
+                accessors.append((values, attr, meta.get("factor", 1)))
+        self._accessors = accessors
+        # Time reads and check times to live only when needed: shadow _get() by
+        # _get_checked() on this instance, keeping _get() a plain cache lookup
+        if self.metrics is not None or self.ttl or self.default_ttl is not None:
+            self.__dict__["_get"] = self._get_checked
+        else:
+            self.__dict__.pop("_get", None)
+
+    def _keep_fields(self, keep):
+        """Return the (device, attr) kept from "all" payloads for keep."""
+
+        if keep is None:
+            return None
+        fields = [(device, attr) for _, device, attr, _ in self._dyn_props]
+        fields.extend(self._property_fields)
+        fields.extend(self._field(name) for name in keep)
+        return fields
+
+    def _field(self, name):
+        """Return (device, attr) designated by name, unchecked (see resolve())."""
+
+        prop = getattr(type(self), name, None)
+        if isinstance(prop, _Attribute):
+            return prop.device, prop.attr
+        device, _, attr = name.partition(".")
+        return device, attr or None
+
+    def _resolve(self, name):
+        """See resolve()."""
+
+        device, attr = self._field(name)
+        if isinstance(getattr(type(self), name, None), _Attribute):
+            return device, attr
+        if attr and attr in self._meta.get(device, ()):
+            return device, attr
+        if not attr and isinstance(self._meta.get(device), dict):
+            return device, None
+        raise ValueError(f"Touch object has no loadable attribute '{name}'")
+
+    @staticmethod
+    def _group(fields):
+        """
+        Group (device, attr) fields into {device: set of attributes, or None
+        for the whole section}.
+        """
+
+        grouped = {}
+        for device, attr in fields:
+            if attr is None:
+                grouped[device] = None
+            elif grouped.get(device, ()) is not None:
+                grouped.setdefault(device, set()).add(attr)
+        return grouped
+
+    def _kept(self, query, names=()):
+        """
+        Return what to keep from the payload of query, as expected by
+        decoder.decode_sections(), with names in addition to keep. None keeps
+        everything, which is always the case but for "all" queries. Meta data
+        of circuits and burners are kept to discover them.
+        """
+
+        if query not in ("all", "all?") or self.keep is None:
+            return None
+        kept = self._group(self.keep + [self._field(name) for name in names])
+        return KeepUnits(kept) if query == "all?" else kept
+
+    def _data_query(self, attribute):
+        """Return the Touch query loading attribute (or "all")."""
+
+        if attribute == "all":
+            return "all"
+        device, attr = self._resolve(attribute)
+        return device if attr is None else f"{device}.{attr}"
+
+    def _store_data(self, attribute, data):
+        """Cache data loaded by the query of attribute."""
+
+        # Merge by device, as a single attribute query must not wipe out the
+        # other attributes of its device (the Touch may be shared).
+        now = self._clock()
+        track = self._history is not None or self._subscribers
+        for device, attrs in data.items():
+            values = self._data.setdefault(device, {})
+            if track:
+                self._track(device, attrs, values, now)
+            values.update(attrs)
+            for attr in attrs:
+                self._fetched[device, attr] = now
+
+    def _track(self, device, attrs, values, now):
+        """Record loaded attrs in history and collect their changes."""
+
+        for attr, value in attrs.items():
+            old = values.get(attr)
+            if old != value:
+                self._changes.append(Change(device, attr, old, value, now))
+            if self._history is not None:
+                self._history.record(device, attr, now, value)
+
+    def _notify(self):
+        """Pass the changes collected since the last call to subscribers."""
+
+        changes, self._changes = self._changes, []
+        if not changes:
+            return
+        for callback, keys in list(self._subscribers):
+            if keys is not None:
+                wanted = [
+                    change
+                    for change in changes
+                    if (change.device, change.attr) in keys
+                    or (change.device, None) in keys
+                ]
+            else:
+                wanted = changes
+            if not wanted:
+                continue
+            try:
+                callback(wanted)
+            except Exception:
+                logger.exception(f"Subscriber {callback!r} failed")
+
+    def subscribe(self, callback, names=None):
+        """
+        Call callback with the list of Change of loaded values that changed,
+        once per load (load_data(), load_many(), refresh()), from the thread
+        loading. Values written since the previous load come first. names
+        (see resolve()) restricts the values watched.
+        """
+
+        keys = None if names is None else {self._field(name) for name in names}
+        self._subscribers.append((callback, keys))
+
+    def unsubscribe(self, callback):
+        """Stop notifying callback."""
+        self._subscribers = [s for s in self._subscribers if s[0] is not callback]
+
+    def cursor(self, names=None):
+        """
+        Return a history.Cursor reading the changes of names (see
+        resolve(), default: every value) from now on, as passed to
+        subscribers. Each consumer gets its own cursor and reads changes when
+        it wants to. Versions of the change log (change_log.version) can be
+        diffed with change_log.diff().
+        """
+
+        if self.change_log is None:
+            self.change_log = ChangeLog(self.change_log_size)
+            self.subscribe(self.change_log.append)
+        keys = None if names is None else {self._field(name) for name in names}
+        return self.change_log.cursor(keys)
+
+    def _query_cost(self, kind):
+        """Estimated network time of a query kind: "all", "section" or "attr"."""
 
         try:
-            value = self._data[device][attr]
-            meta = self._meta[device][attr]
+            return self._costs[kind]
         except KeyError:
-            raise TouchError(f'"{device}.{attr}" not found in cache/meta')
-        # If a factor exist, apply it to value
+            # Scale the default estimate by what was measured for another kind
+            for other, cost in self._costs.items():
+                return self._default_costs[kind] * cost / self._default_costs[other]
+            return self._default_costs[kind]
+
+    def _record_cost(self, query, network_time):
+        """Update the network time estimate of the kind of query."""
+
+        if query == "all":
+            kind = "all"
+        else:
+            kind = "attr" if "." in query else "section"
+        previous = self._costs.get(kind)
+        if previous is None:
+            self._costs[kind] = network_time
+        else:
+            self._costs[kind] = previous + 0.3 * (network_time - previous)
+
+    def _query_plan(self, names):
+        """
+        Return the cheapest list of queries loading every name (see
+        resolve()): per device section, per attribute or all data at once.
+        The cost of a plan is the estimated network time of its queries plus
+        the delay Touch enforces between queries.
+        """
+
+        if "all" in names:
+            return ["all"]
+        wanted = self._group(self._resolve(name) for name in names)
+
+        delay = self.scheduler.delay
+        section_cost = self._query_cost("section") + delay
+        attr_cost = self._query_cost("attr") + delay
+        queries, cost = [], -delay
+        for device, attrs in wanted.items():
+            if attrs is not None and len(attrs) * attr_cost <= section_cost:
+                queries.extend(f"{device}.{attr}" for attr in sorted(attrs))
+                cost += len(attrs) * attr_cost
+            else:
+                queries.append(device)
+                cost += section_cost
+        if cost > self._query_cost("all"):
+            return ["all"]
+        return queries
+
+    def _check_breaker(self):
+        """Raise TouchUnavailable if the Touch must not be queried."""
         try:
-            return value * meta["factor"]
-        except KeyError:
-            return value
+            self.breaker.check()
+        except TouchUnavailable:
+            self._count("unavailable")
+            raise
 
-    def _set(self, device, attr, value):
-        """Set a Touch setting value."""
+    def _rejection_backoff(self):
+        """
+        Record a rejection not asking for a delay, as a failure. Return how
+        long to wait before retrying, or raise TouchUnavailable if such
+        rejections go on.
+        """
+
+        self.breaker.record_failure()
+        self._check_breaker()
+        logger.warning(f"Touch rejected us. Wait {self.breaker.backoff}s and retry")
+        return self.breaker.backoff
+
+    def _throttle_delay(self, text):
+        """
+        Return the delay in seconds asked for by a rejection of Touch, or
+        None if the rejection is not about delay between requests.
+        """
+
+        m = re.match("Wait at least ([0-9]+)ms during requests", text)
+        return float(m.group(1)) / 1000 if m else None
+
+    def _decode_json(self, body, keep=None):
+        """
+        Decode a JSON response body, given as bytes or as an iterable of byte
+        chunks, keeping only keep (see decoder.decode_sections()).
+        """
+
+        try:
+            with self._span("decode"):
+                if keep is None and isinstance(body, bytes):
+                    return decode(body)
+                return decode_sections(
+                    [body] if isinstance(body, bytes) else body, keep
+                )
+        except ValueError:
+            # A streamed body is consumed: only a whole one can be shown
+            text = body.decode(ENCODING) if isinstance(body, bytes) else "..."
+            raise TouchError(
+                "Not a JSON response. Wrong password or "
+                + f"setting name? Response: {text}"
+            )
+
+    def _write_request(self, device, attr, value):
+        """Return the Touch request writing value, and the raw value."""
 
         try:
             meta = self._meta[device][attr]
@@ -144,16 +917,158 @@ class Touch:
             raw_value = round(value / meta["factor"])
         except KeyError:
             raw_value = int(value)
-        request = f"{device}.{attr}={raw_value}"
-        logger.info(f"Set {request}")
-        if not self.readonly:
-            result = self._request_touch(request, to_json=False)
-            # Touch put the request in the body response
-            if result != request:
-                raise TouchError(f"Unknown response to write request: {result}")
+        return f"{device}.{attr}={raw_value}", raw_value
+
+    def _check_write(self, request, result):
+        # Touch put the request in the body response
+        if result != request:
+            raise TouchError(f"Unknown response to write request: {result}")
+
+    def _ttl(self, device, attr):
+        """Return the time to live of the cached value of device.attr."""
+        if not self.ttl:
+            return self.default_ttl
+        for key in (f"{device}.{attr}", device):
+            if key in self.ttl:
+                return self.ttl[key]
+        return self.default_ttl
+
+    def _clock(self):
+        """Return the time of fetched values and history, in seconds."""
+        return monotonic()
+
+    def _age(self, device, attr):
+        """Return the age of the cached value of device.attr, in seconds."""
+        return self._clock() - self._fetched.get((device, attr), -math.inf)
+
+    def _expired(self, device, attr, max_age=None):
+        """Whether the cached value is older than max_age (default: its TTL)."""
+        if max_age is None:
+            max_age = self._ttl(device, attr)
+            if max_age is None:
+                return False
+        return self._age(device, attr) > max_age
+
+    def _expired_names(self, names=None, max_age=None):
+        """
+        Return "device.attr" names of expired values among names (default:
+        every value read so far). See resolve() for names syntax.
+        """
+
+        if names is None:
+            keys = self._read
         else:
-            logger.warning(f"Cant’t set {request}: read only mode")
-        self._data[device][attr] = raw_value
+            keys = []
+            for name in names:
+                device, attr = self._resolve(name)
+                if attr is None:
+                    keys.extend((device, a) for a in self._data.get(device, ()))
+                else:
+                    keys.append((device, attr))
+        return sorted(
+            f"{device}.{attr}"
+            for device, attr in set(keys)
+            if self._expired(device, attr, max_age)
+        )
+
+    def _refresh_on_read(self):
+        """Called when an expired value is read. Serve it as is by default."""
+
+    def age(self, name):
+        """Return the age in seconds of the value of name (see resolve())."""
+        device, attr = self._resolve(name)
+        if attr is None:
+            raise ValueError(f"'{name}' is not an attribute")
+        return self._age(device, attr)
+
+    def get_with_age(self, name):
+        """Return the value of name (see resolve()) and its age in seconds."""
+        device, attr = self._resolve(name)
+        if attr is None:
+            raise ValueError(f"'{name}' is not an attribute")
+        return self._get(device, attr), self._age(device, attr)
+
+    def _history_field(self, name):
+        device, attr = self._resolve(name)
+        if attr is None:
+            raise ValueError(f"'{name}' is not an attribute")
+        if self._history is None:
+            raise TouchError("History is disabled")
+        return device, attr
+
+    def _factor(self, device, attr):
+        meta = self._meta.get(device, {}).get(attr)
+        return meta.get("factor", 1) if isinstance(meta, dict) else 1
+
+    def history(self, name, max_age=None):
+        """
+        Return the [(time, value)] history of name (see
+        resolve()), oldest first, limited to samples younger than max_age.
+        """
+
+        device, attr = self._history_field(name)
+        since = None if max_age is None else self._clock() - max_age
+        samples = self._history.samples(device, attr, since)
+        factor = self._factor(device, attr)
+        if factor == 1:
+            return samples
+        return [(time, value * factor) for time, value in samples]
+
+    def slope(self, name, max_age=None):
+        """
+        Return the trend of name (see resolve()) in units per second over
+        its history younger than max_age, or None without enough samples.
+        """
+
+        device, attr = self._history_field(name)
+        since = None if max_age is None else self._clock() - max_age
+        slope = self._history.slope(device, attr, since)
+        return None if slope is None else slope * self._factor(device, attr)
+
+    def held_for(self, name):
+        """
+        Return for how long in seconds name (see resolve()) has had its
+        current value as far as history tells, or None without history.
+        """
+
+        device, attr = self._history_field(name)
+        since = self._history.held_since(device, attr)
+        return None if since is None else self._clock() - since
+
+    def _get(self, device, attr):
+        """Return a Touch setting value from cache."""
+
+        try:
+            value = self._data[device][attr]
+            meta = self._meta[device][attr]
+        except KeyError:
+            raise TouchError(f'"{device}.{attr}" not found in cache/meta')
+        # If a factor exist, apply it to value (plain text values have plain
+        # text meta data). Look it up rather than catching KeyError: most
+        # attributes have no factor, and raising costs more than the read.
+        if "factor" not in meta:
+            return value
+        try:
+            return value * meta["factor"]
+        except TypeError:
+            return value
+
+    def _get_checked(self, device, attr):
+        """_get() timing reads, and refreshing values past their time to live."""
+
+        with self._span("get"):
+            if self.ttl or self.default_ttl is not None:
+                self._read.add((device, attr))
+                if self._expired(device, attr):
+                    self._refresh_on_read()
+            return type(self)._get(self, device, attr)
+
+    def _read_fields(self, fields):
+        """Note reads of (device, attr) fields, refreshing expired values."""
+        if self.ttl or self.default_ttl is not None:
+            self._read.update(fields)
+            if any(self._expired(device, attr) for device, attr in fields):
+                self._refresh_on_read()
 
     def _round(self, dev, attr, value):
         """Round value with the same precision as the attribute."""
@@ -165,35 +1080,23 @@ class Touch:
         else:
             return round(value, -math.floor(math.log10(factor)))
 
-    def load_data(self, attribute="all"):
-        """Query attribute or all data from Touch and and cache them."""
-
-        logger.debug(f"Load {attribute} data from Touch")
-        if attribute == "all":
-            q = "all"
-        else:
-            # Look for Touch device and device attribute in dynamic properties
-            for name, device, attr in self._dyn_props:
-                if name == attribute:
-                    q = f"{device}.{attr}"
-                    break
-            else:
-                raise ValueError(
-                    f"Touch object has no loadable attribute '{attribute}'"
-                )
-
-        data = self._request_touch(q)
-        self._data.update(data)
+    # (device, attr) read by the properties below
+    _property_fields = [("pe1", "L_state"), ("hk1", "mode_auto"), ("hk1", "L_pump")]
 
     @property
     def boiler_fired(self):
         """Wether boiler fire is on or off."""
-        return self._get("pe1", "L_state") in [1, 2, 3, 4]
+        return self._get("pe1", "L_state") in FIRED_STATES
 
     @property
     def hc_op_mode(self):
         """Operation mode of the heating system."""
-        return OpMode(self._get("hk1", "mode_auto"))
+        value = self._get("hk1", "mode_auto")
+        try:
+            return _OP_MODES[value]
+        except KeyError:
+            # Raise ValueError
+            return OpMode(value)
 
     @hc_op_mode.setter
     def hc_op_mode(self, mode):
@@ -205,91 +1108,215 @@ class Touch:
         return self._get("hk1", "L_pump") == 1
 
     #
-    # Dynamically create float properties and their round functions
+    # Float properties and their round functions (<name>_round)
     #
-    # List of (property name, Touch device, device attribute, doc)
-    _dyn_props = [
-        ("boiler_flow_t", "pe1", "L_temp_act", "Boiler circuit temperature."),
-        (
-            "boiler_flow_t_set",
-            "pe1",
-            "L_temp_set",
-            "Boiler circuit temperature" + " setpoint.",
-        ),
-        ("hc_flow_t", "hk1", "L_flowtemp_act", "Heating circuit temperature."),
-        (
-            "hc_flow_t_set",
-            "hk1",
-            "L_flowtemp_set",
-            "Heating circuit temperature" + " setpoint.",
-        ),
-        ("room_t", "hk1", "L_roomtemp_act", "Room temperature."),
-        ("room_t_set", "hk1", "temp_heat", "Room temperature setpoint."),
-        (
-            "room_t_set_override",
-            "hk1",
-            "remote_override",
-            "Room temperature " + "setpoint override.",
-        ),
-    ]
-    for name, dev, attr, doc in _dyn_props:
-        # Define getter
-        exec("def fget(self):\n" + f'    return self._get("{dev}", "{attr}")')
-        # Define setter except for read only properties
-        if attr[0:2] == "L_":
-            fset = None
+    # List of (property name, Touch device, device attribute, doc), filled in
+    # by _Attribute.
+    _dyn_props: List[Tuple[str, str, str, Optional[str]]] = []
+    boiler_flow_t = _Attribute("pe1", "L_temp_act", "Boiler circuit temperature.")
+    boiler_flow_t_set = _Attribute(
+        "pe1", "L_temp_set", "Boiler circuit temperature setpoint."
+    )
+    hc_flow_t = _Attribute("hk1", "L_flowtemp_act", "Heating circuit temperature.")
+    hc_flow_t_set = _Attribute(
+        "hk1", "L_flowtemp_set", "Heating circuit temperature setpoint."
+    )
+    room_t = _Attribute("hk1", "L_roomtemp_act", "Room temperature.")
+    room_t_set = _Attribute("hk1", "temp_heat", "Room temperature setpoint.")
+    room_t_set_override = _Attribute(
+        "hk1", "remote_override", "Room temperature setpoint override."
+    )
+
+
+class Touch(BaseTouch):
+    """
+    Interface for the Pelletronic Touch v4, Oekofen JSON Interface V4.00b.
+    """
+
+    # Size of the chunks of streamed responses, in bytes
+    CHUNK_SIZE = 16384
+
+    def __init__(self, url, password, transport="requests", **kwargs):
+        """
+        transport is a transport.Transport or the name of one: "requests"
+        (default) or "socket". See BaseTouch for other arguments.
+        """
+        super().__init__(url, password, **kwargs)
+        self.transport = get_transport(transport, self.timeout)
+        # Query and store meta data
+        self._load_meta()
+
+    def close(self):
+        """Release network resources."""
+        self.transport.close()
+
+    def _request_touch(self, res, to_json=True, keep=None, _allow_recursion=True):
+        """
+        Send a request to the Pelletronic Touch and return the JSON response,
+        keeping only keep (see decoder.decode_sections()). With keep, the
+        response is decoded while it is received.
+        """
+
+        stream = to_json and keep is not None
+        if _allow_recursion:
+            self._check_breaker()
+        # Touch enforces some delay before each request: the scheduler holds
+        # the request back until the delay is over. The response is received
+        # within the slot, so that the delay and the network time count from
+        # its end and the transport is not used by another request meanwhile.
+        # The breaker is checked again once in the slot: requests queued behind
+        # a probe of an unreachable Touch fail fast if the probe fails.
+        check = self._check_breaker if _allow_recursion else None
+        with self.scheduler.slot(check):
+            self._count("requests")
+            try:
+                with self._span("request"):
+                    r = self.transport.get(self.api_url + res, stream=stream)
+                    try:
+                        if stream and r.status < 400:
+                            data = self._receive_json(r, keep)
+                        else:
+                            body = r.body
+                    finally:
+                        r.close()
+            except Exception as e:
+                # A TouchError other than a protocol error is a bad payload:
+                # the Touch did answer
+                if not isinstance(e, TouchError) or isinstance(e, ConnectionError):
+                    self._count("request_errors")
+                    self.breaker.record_failure()
+                raise
+        if r.status != 401:
+            self.breaker.record_success()
+        if r.status == 401 and _allow_recursion:
+            self._count("rejections")
+            delay = self._throttle_delay(body.decode(ENCODING))
+            if delay is not None:
+                # Retry once the (newly learnt) delay is over
+                self.scheduler.record_throttle(delay)
+            else:
+                sleep(self._rejection_backoff())
+            self._count("retries")
+            return self._request_touch(res, to_json, keep, _allow_recursion=False)
+        if r.status >= 400:
+            self._count("request_errors")
+            text = body.decode(ENCODING)
+            raise TouchError(f"HTTP error {r.status} for {res}: {text}")
+        if stream:
+            return data
+        self._count("received_bytes", len(body))
+        if to_json:
+            return self._decode_json(body)
         else:
-            exec(
-                "def fset(self, value):\n" + f'    self._set("{dev}", "{attr}", value)'
-            )
-        # Create property attribute
-        exec(f"{name} = property(fget, fset, None, doc)")
-        # Create a round function returning the same precision as the attribute
-        exec(
-            "def fround(self, value):\n"
-            + f'    return self._round("{dev}", "{attr}", value)'
-        )
-        exec(f"{name}_round = fround")
+            return body.decode(ENCODING)
 
-    # @property
-    # def room_t(self):
-    #    """ Temperature of the room. """
-    #    return self._get('hk1', 'L_roomtemp_act')
-    #
-    # @property
-    # def room_t_set(self):
-    #    """ Temperature setpoint of the room. """
-    #    return self._get('hk1', 'temp_heat')
-    #
-    # @room_t_set.setter
-    # def room_t_set(self, value):
-    #    self._set('hk1', 'temp_heat', value)
-    #
-    # @property
-    # def boiler_flow_t(self):
-    #    """ Temperature of the flow in the boiler circuit. """
-    #    return self._get('pe1', 'L_temp_act')
-    #
-    # @property
-    # def boiler_flow_t_set(self):
-    #    """ Temperature setpoint of the flow in the boiler circuit. """
-    #    return self._get('pe1', 'L_temp_set')
-    #
-    # @property
-    # def hc_flow_t(self):
-    #    """ Temperature of the flow in the heating circuit. """
-    #    return self._get('hk1', 'L_flowtemp_act')
-    #
-    # @property
-    # def hc_flow_t_set(self):
-    #    """ Temperature setpoint of the flow in the heating circuit. """
-    #    return self._get('hk1', 'L_flowtemp_set')
-    #
-    # @property
-    # def room_t_set_override(self):
-    #    """ Override of the temperature setpoint of the room. """
-    #    return self._get('hk1', 'remote_override')
-    #
-    # @room_t_set_override.setter
-    # def room_t_set_override(self, value):
-    #    self._set('hk1', 'remote_override', value)
+    def _receive_json(self, response, keep):
+        """Decode a streamed JSON response while it is received."""
+
+        chunks = response.iter_chunks(self.CHUNK_SIZE)
+        if self.metrics is not None:
+            chunks = self._counted(chunks)
+        return self._decode_json(chunks, keep)
+
+    def _load_meta(self, refresh=False):
+        """
+        Load meta data from the cache if any and valid, otherwise query them
+        from Touch and store them. Set refresh to bypass the cache.
+        """
+
+        if not refresh and self._load_cached_meta():
+            return
+        logger.debug("Load meta data from Touch")
+        self._store_meta(self._request_touch("all?", keep=self._kept("all?")))
+
+    def reload_meta(self):
+        """Reload meta data from the Touch, bypassing the meta data cache."""
+        self._load_meta(refresh=True)
+
+    def _write(self, request):
+        logger.info(f"Set {request}")
+        if not self.readonly:
+            self._check_write(request, self._request_touch(request, to_json=False))
+        else:
+            logger.warning(f"Cant’t set {request}: read only mode")
+
+    def commit(self):
+        """
+        End a transaction. When ending the outermost one, send buffered
+        writes in one ordered pass. If a write fails, the cached values of
+        writes not sent are restored before raising.
+        """
+
+        self._transaction_depth = max(0, self._transaction_depth - 1)
+        if self._transaction_depth:
+            return
+        sent = set()
+        try:
+            for key, request in self._pending_writes():
+                self._write(request)
+                sent.add(key)
+        finally:
+            self._end_transaction(sent)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Context manager buffering writes, committed on exit or rolled back
+        if an exception is raised.
+        """
+
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        else:
+            self.commit()
+
+    def _refresh_on_read(self):
+        self.refresh()
+
+    def refresh(self, names=None, max_age=None):
+        """
+        Reload, in one batch, the values of names (default: every value read
+        so far) older than max_age (default: their TTL). Return the names of
+        reloaded values.
+        """
+
+        expired = self._expired_names(names, max_age)
+        if expired:
+            self.load_many(expired)
+        return expired
+
+    def load_data(self, attribute="all", keep=()):
+        """
+        Query attribute or all data from Touch and and cache them. keep lists
+        names to keep from all data besides the keep argument of the Touch.
+        """
+
+        self._load_data(attribute, keep)
+        self._notify()
+
+    def _load_data(self, attribute, keep=()):
+        logger.debug(f"Load {attribute} data from Touch")
+        q = self._data_query(attribute)
+        data = self._request_touch(q, keep=self._kept(q, keep))
+        self._record_cost(q, self.scheduler.last_network_time)
+        if self._meta_outdated(q, data):
+            self._load_meta(refresh=True)
+        self._store_data(attribute, data)
+
+    def load_many(self, names):
+        """
+        Query several attributes and/or device sections from Touch with the
+        cheapest plan, and cache them. See resolve() for names syntax.
+        """
+
+        queries = self._query_plan(names)
+        logger.debug(f"Load {', '.join(queries)} data from Touch")
+        try:
+            for q in queries:
+                self._load_data(q, keep=names)
+        finally:
+            self._notify()
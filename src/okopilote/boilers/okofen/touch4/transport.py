@@ -0,0 +1,303 @@
+"""
+HTTP transports of the Touch JSON interface.
+
+A transport sends GET requests for URLs and returns Response objects. Two
+transports are available:
+- "requests": based on requests.Session;
+- "socket": a lean persistent HTTP/1.1 client, made for the dialect of the
+  Touch, which answers with a status line and a Content-length header only.
+Both keep the trailing "?" of meta data queries, which most HTTP libraries
+strip.
+"""
+
+import logging
+
+from .errors import TouchProtocolError
+
+logger = logging.getLogger(__name__)
+
+
+class Response:
+    """
+    Response to a request: HTTP status and body. A streamed body is read by
+    iter_chunks(), or at once by the body property, before the response is
+    closed.
+    """
+
+    def __init__(self, status, body=None, chunks=None, close=None):
+        self.status = status
+        self._body = body
+        self._chunks = chunks
+        self._close = close
+
+    @property
+    def body(self):
+        """Whole body, as bytes."""
+        if self._body is None:
+            self._body = b"".join(self.iter_chunks())
+        return self._body
+
+    def iter_chunks(self, size=16384):
+        """Iterate over the body by chunks of bytes."""
+        if self._body is not None:
+            yield self._body
+        elif self._chunks is not None:
+            chunks, self._chunks = self._chunks, None
+            yield from chunks(size)
+
+    def close(self):
+        """Release the connection of a streamed response."""
+        if self._close is not None:
+            self._close()
+            self._close = None
+
+
+class ResponseHead:
+    """
+    Status and headers of a response, parsed from its status line and then
+    fed line by line, by blocking and asyncio clients alike.
+    """
+
+    __slots__ = ("status", "length", "close")
+
+    def __init__(self, status_line):
+        if not status_line:
+            raise ConnectionResetError("Connection closed by Touch")
+        try:
+            self.status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            raise TouchProtocolError(f"Malformed status line: {status_line!r}")
+        # Body length, None if the body ends with the connection
+        self.length = None
+        # Whether the Touch closes the connection after the body
+        self.close = False
+
+    def feed(self, line):
+        """Parse a header line. Return False at the end of the head."""
+
+        if line in (b"\r\n", b"\n", b""):
+            return False
+        name, _, value = line.decode("ISO-8859-1").partition(":")
+        name = name.strip().lower()
+        if name == "content-length":
+            try:
+                self.length = int(value)
+            except ValueError:
+                raise TouchProtocolError(f"Malformed Content-length: {value!r}")
+        elif name == "connection":
+            self.close = value.strip().lower() == "close"
+        return True
+
+
+class Transport:
+    """Base class of transports. timeout is (connect, read) in seconds."""
+
+    def __init__(self, timeout=(10, 40)):
+        self.timeout = timeout
+
+    def get(self, url, stream=False):
+        """
+        Send a GET request for url and return a Response. With stream, the
+        body is read as it is consumed.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release network resources."""
+
+
+class RequestsTransport(Transport):
+    """
+    Transport based on requests.Session, tuned for a single device that
+    serves one request at a time: one kept-alive connection per Touch and no
+    retries by urllib3, since Touch objects handle failures themselves (see
+    CircuitBreaker).
+    """
+
+    def __init__(self, timeout=(10, 40)):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        super().__init__(timeout)
+        self._requests = requests
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        # The Touch sends plain bodies: don't ask for compressed ones
+        self._session.headers.update(
+            {"Connection": "keep-alive", "Accept-Encoding": "identity"}
+        )
+
+    def get(self, url, stream=False):
+        requests = self._requests
+        # Session headers, which prepared requests of meta data queries miss
+        req = requests.Request("GET", url, headers=dict(self._session.headers))
+        if url.endswith("?"):
+            prep = _prepare_keeping_question_mark(requests, req)
+        else:
+            prep = self._session.prepare_request(req)
+        r = self._session.send(prep, timeout=self.timeout, stream=stream)
+        if not stream:
+            return Response(r.status_code, r.content)
+        return Response(r.status_code, chunks=r.iter_content, close=r.close)
+
+    def close(self):
+        self._session.close()
+
+
+def _prepare_keeping_question_mark(requests, req):
+    # Meta data are queried by ending URL paths with "?" but the char is
+    # stripped by several modules like urllib and requests. So we need a
+    # hack to restore the "?" before requests send the HTTP packet.
+    class MyPreparedRequest(requests.PreparedRequest):
+        @property
+        def path_url(self):
+            path_url = super().path_url
+            if self.url.endswith("?") and not path_url.endswith("?"):
+                path_url += "?"
+            return path_url
+
+    # Normally a prepared request is created by calling req.prepare() but
+    # we need to use our custom class.
+    prep = MyPreparedRequest()
+    prep.prepare(
+        method=req.method,
+        url=req.url,
+        headers=req.headers,
+        files=req.files,
+        data=req.data,
+        json=req.json,
+        params=req.params,
+        auth=req.auth,
+        cookies=req.cookies,
+        hooks=req.hooks,
+    )
+    # Restore the "?" in the prepared request
+    prep.url += "?"
+    return prep
+
+
+class SocketTransport(Transport):
+    """
+    Persistent HTTP/1.1 client on a plain socket, reconnecting when the Touch
+    closes the connection. Requests to one transport must be serialized until
+    their response is closed, streamed body included: Touch objects send
+    them and receive their response within a slot of their request
+    scheduler.
+    """
+
+    def __init__(self, timeout=(10, 40)):
+        # Imported here to keep importing this module fast
+        import socket
+        from urllib.parse import urlsplit
+
+        super().__init__(timeout)
+        self._socket = socket
+        self._urlsplit = urlsplit
+        self._netloc = None
+        self._sock = None
+        self._file = None
+
+    def _connect(self, netloc):
+        self.close()
+        socket = self._socket
+        split = self._urlsplit(f"//{netloc}")
+        self._sock = socket.create_connection(
+            (split.hostname, split.port or 80), timeout=self.timeout[0]
+        )
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock.settimeout(self.timeout[1])
+        self._file = self._sock.makefile("rb")
+        self._netloc = netloc
+
+    def get(self, url, stream=False):
+        split = self._urlsplit(url)
+        # Path and query as is: urlsplit() strips a trailing "?"
+        target = url[len(split.scheme) + 3 + len(split.netloc) :] or "/"
+        fresh = False
+        if self._sock is None or self._netloc != split.netloc:
+            self._connect(split.netloc)
+            fresh = True
+        try:
+            self._sock.sendall(
+                f"GET {target} HTTP/1.1\r\nHost: {split.netloc}\r\n\r\n".encode(
+                    "ISO-8859-1"
+                )
+            )
+            status, length, close = self._read_head()
+        except ConnectionError:
+            self.close()
+            if fresh:
+                raise
+            # The Touch closed the idle connection: retry on a new one
+            logger.debug("Connection to Touch lost, reconnect")
+            return self.get(url, stream)
+        except Exception:
+            self.close()
+            raise
+
+        if length is None:
+            # Body ends with the connection
+            close = True
+        if not stream:
+            body = self._file.read() if length is None else self._read(length)
+            if close:
+                self.close()
+            return Response(status, body)
+
+        file, consumed = self._file, []
+
+        def chunks(size):
+            remaining = length
+            while remaining is None or remaining > 0:
+                chunk = file.read1(size if remaining is None else min(size, remaining))
+                if not chunk:
+                    if remaining is not None:
+                        raise ConnectionResetError("Response body is truncated")
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+            consumed.append(True)
+
+        def end():
+            # The connection can't be reused if the body was not read up
+            if close or not consumed:
+                self.close()
+
+        return Response(status, chunks=chunks, close=end)
+
+    def _read_head(self):
+        head = ResponseHead(self._file.readline())
+        while head.feed(self._file.readline()):
+            pass
+        return head.status, head.length, head.close
+
+    def _read(self, length):
+        body = self._file.read(length)
+        if len(body) < length:
+            self.close()
+            raise ConnectionResetError("Response body is truncated")
+        return body
+
+    def close(self):
+        if self._sock is not None:
+            self._file.close()
+            self._sock.close()
+            self._sock, self._file = None, None
+
+
+# Transport classes by name
+TRANSPORTS = {"requests": RequestsTransport, "socket": SocketTransport}
+
+
+def get_transport(transport, timeout=(10, 40)):
+    """Return transport if it is a Transport, or a new transport by name."""
+
+    if isinstance(transport, Transport):
+        return transport
+    try:
+        return TRANSPORTS[transport](timeout)
+    except KeyError:
+        raise ValueError(f"Unknown Touch transport '{transport}'")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of Touch property reads: compiled accessors and the current
+_get() versus the baseline path, properties generated by exec() calling the
+baseline _get(), reproduced by BaselineTouch.
+"""
+import json
+import os
+from timeit import repeat
+
+from okopilote.boilers.okofen.touch4.touch import BaseTouch, OpMode, TouchError
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(__file__)), "fixtures")
+
+with open(os.path.join(FIXTURES, "all+meta"), "rb") as f:
+    meta = json.loads(f.read().decode(encoding="ISO-8859-1"))
+with open(os.path.join(FIXTURES, "all"), "rb") as f:
+    data = json.loads(f.read().decode(encoding="ISO-8859-1"))
+
+
+class BaselineTouch(BaseTouch):
+    """Property reads as they were before compiled accessors."""
+
+    def _get(self, device, attr):
+        try:
+            value = self._data[device][attr]
+            meta = self._meta[device][attr]
+        except KeyError:
+            raise TouchError(f'"{device}.{attr}" not found in cache/meta')
+        try:
+            return value * meta["factor"]
+        except KeyError:
+            return value
+
+    @property
+    def boiler_fired(self):
+        return self._get("pe1", "L_state") in [1, 2, 3, 4]
+
+    @property
+    def hc_op_mode(self):
+        return OpMode(self._get("hk1", "mode_auto"))
+
+    exec("def fget(self):\n" + '    return self._get("hk1", "L_roomtemp_act")')
+    exec("room_t = property(fget)")
+
+
+touches = {}
+for name, cls in (("baseline", BaselineTouch), ("current", BaseTouch)):
+    touch = touches[name] = cls("http://localhost:3938", "mypass123")
+    touch._store_meta(meta)
+    touch._store_data("all", data)
+
+number = 200000
+cases = {
+    "room_t": "touch.room_t",
+    "_get()": 'touch._get("hk1", "L_roomtemp_act")',
+    "hc_op_mode": "touch.hc_op_mode",
+    "boiler_fired": "touch.boiler_fired",
+}
+for case, stmt in cases.items():
+    # Alternate baseline and current runs, so that both see the same noise
+    best = {name: float("inf") for name in touches}
+    for _ in range(7):
+        for name, touch in touches.items():
+            time = min(repeat(stmt, number=number, repeat=1, globals={"touch": touch}))
+            best[name] = min(best[name], time / number * 1e9)
+    print(
+        f"{case:>12}: {best['baseline']:7.1f} ns baseline, "
+        + f"{best['current']:7.1f} ns current"
+    )
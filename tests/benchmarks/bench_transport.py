@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Benchmark of Touch transports: latency and CPU time per request, for all data
+and for a single attribute.
+
+Run against a Touch, or a simulated one (tests/fixtures/simulator.py) started
+by the script when no URL is given:
+    bench_transport.py [URL [PASSWORD]]
+"""
+import os
+import sys
+from contextlib import nullcontext
+from time import perf_counter, process_time
+
+from okopilote.boilers.okofen.touch4.touch import Touch
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(__file__)), "fixtures")
+sys.path.insert(0, FIXTURES)
+
+from simulator import TouchSimulator  # noqa: E402
+
+if len(sys.argv) > 1:
+    device = nullcontext()
+    url = sys.argv[1]
+    password = sys.argv[2] if len(sys.argv) > 2 else "mypass123"
+else:
+    device = TouchSimulator(delay=0.0)
+    url, password = device.url, device.password
+number = 200
+
+with device:
+    for transport in ("requests", "socket"):
+        touch = Touch(url, password, transport=transport)
+        # Measure the transport, not the delay Touch enforces between requests
+        touch.scheduler.delay = 0.0
+        for query in ("all", "hk1.temp_heat"):
+            touch.load_data(query)
+            wall, cpu = perf_counter(), process_time()
+            for _ in range(number):
+                touch.load_data(query)
+            wall, cpu = perf_counter() - wall, process_time() - cpu
+            print(
+                f"{transport:>8} {query:>13}: {wall / number * 1e3:6.2f} ms/request, "
+                + f"{cpu / number * 1e3:6.2f} ms CPU/request"
+            )
+        touch.close()
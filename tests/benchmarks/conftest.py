@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "fixtures")
+)
+
+from simulator import TouchSimulator, start_fleet  # noqa: E402
+
+PASSWORD = "mypass123"
+
+
+@pytest.fixture(scope="module")
+def simulator():
+    """Simulated Touch without throttle nor latency: measures the client."""
+    with TouchSimulator(password=PASSWORD, delay=0.0) as sim:
+        yield sim
+
+
+@pytest.fixture(scope="module")
+def throttled():
+    """Simulated Touch with a throttle and latency, like a real one (faster)."""
+    with TouchSimulator(password=PASSWORD, delay=0.05, latency=(0.01, 0.02)) as sim:
+        yield sim
+
+
+@pytest.fixture(scope="module")
+def fleet():
+    simulators = start_fleet(8, password=PASSWORD, delay=0.0, latency=(0.0, 0.005))
+    yield simulators
+    for sim in simulators:
+        sim.stop()
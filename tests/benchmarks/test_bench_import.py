@@ -0,0 +1,67 @@
+"""
+Benchmarks of the cold start of the package: import in a fresh interpreter.
+"""
+import importlib.util
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Modules slow to import, only imported when used
+LAZY = [
+    "requests",
+    "http.server",
+    "socket",
+    "okopilote.boilers.okofen.touch4.boiler",
+]
+
+# Only the benchmarks need pytest-benchmark, not the checks of lazy imports
+needs_benchmark = pytest.mark.skipif(
+    importlib.util.find_spec("pytest_benchmark") is None,
+    reason="pytest-benchmark is not installed",
+)
+
+
+def run_python(code):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        env=env,
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    ).stdout
+
+
+def test_import_is_lazy():
+    loaded = run_python(
+        "import sys, okopilote.boilers.okofen.touch4\n"
+        + f"print(' '.join(m for m in {LAZY!r} if m in sys.modules))"
+    )
+    assert loaded.split() == []
+
+
+def test_from_conf_is_lazy():
+    pytest.importorskip("okopilote.devices.common")
+    loaded = run_python(
+        "import sys\n"
+        + "from okopilote.boilers.okofen.touch4 import from_conf\n"
+        + "print(' '.join(m for m in ('requests', 'http.server') if m in sys.modules))"
+    )
+    assert loaded.split() == []
+
+
+@needs_benchmark
+@pytest.mark.parametrize(
+    "code",
+    [
+        # Interpreter start alone, as a reference
+        "pass",
+        "import okopilote.boilers.okofen.touch4",
+        "from okopilote.boilers.okofen.touch4 import from_conf",
+    ],
+)
+def test_import(benchmark, code):
+    pytest.importorskip("okopilote.devices.common")
+    benchmark(run_python, code)
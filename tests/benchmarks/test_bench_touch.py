@@ -0,0 +1,103 @@
+"""
+Benchmarks of the Touch client against simulated devices, run with
+pytest-benchmark:
+    pytest tests/benchmarks --benchmark-autosave
+and compared to a saved run with --benchmark-compare.
+"""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from conftest import PASSWORD  # noqa: E402
+from okopilote.boilers.okofen.touch4.touch import Touch  # noqa: E402
+
+TRANSPORTS = ["requests", "socket"]
+
+
+@pytest.fixture(params=TRANSPORTS)
+def touch(request, simulator):
+    touch = Touch(simulator.url, PASSWORD, transport=request.param)
+    touch.load_data()
+    yield touch
+    touch.close()
+
+
+def boiler_class():
+    pytest.importorskip("okopilote.devices.common")
+    from okopilote.boilers.okofen.touch4.boiler import Boiler
+
+    return Boiler
+
+
+@pytest.mark.parametrize("transport", TRANSPORTS)
+def test_startup(benchmark, simulator, transport):
+    def start():
+        Touch(simulator.url, PASSWORD, transport=transport).close()
+
+    benchmark(start)
+
+
+@pytest.mark.parametrize("query", ["all", "pe1", "hk1.temp_heat"])
+def test_load_data(benchmark, touch, query):
+    benchmark(touch.load_data, query)
+
+
+def test_load_many(benchmark, touch):
+    benchmark(touch.load_many, ["boiler_flow_t", "room_t", "hk1.mode_auto"])
+
+
+def test_set(benchmark, touch):
+    # Alternate values: writing the cached value is skipped
+    values = iter([19.5, 19.0] * 100000)
+
+    def write():
+        touch.room_t_set = next(values)
+
+    benchmark(write)
+
+
+def test_force_heating(benchmark, simulator):
+    boiler = boiler_class()(simulator.url, PASSWORD, transport="socket")
+    boiler.acquire()
+
+    def cycle():
+        boiler.force_heating()
+        boiler.release_heating()
+
+    benchmark(cycle)
+    boiler.close()
+
+
+def test_throttled_load(benchmark, throttled):
+    touch = Touch(throttled.url, PASSWORD, transport="socket")
+    benchmark.pedantic(touch.load_data, rounds=10)
+    # The throttle is learnt from the first rejection, then respected
+    assert throttled.throttled <= 1
+    touch.close()
+
+
+def test_fleet_poll(benchmark, fleet):
+    from okopilote.boilers.okofen.touch4.fleet import FleetPoller
+
+    Boiler = boiler_class()
+    boilers = {
+        f"boiler{i}": Boiler(sim.url, PASSWORD, transport="socket")
+        for i, sim in enumerate(fleet)
+    }
+    poller = FleetPoller(boilers, max_workers=4, deadline=10.0)
+    snapshot = benchmark(poller.poll)
+    assert not snapshot.stale
+    benchmark.extra_info["devices"] = len(boilers)
+    poller.close()
+    for boiler in boilers.values():
+        boiler.close()
+
+
+def test_simulate(benchmark):
+    boiler_class()
+    from okopilote.boilers.okofen.touch4.simulation import simulate, synthetic_runs
+
+    # One day by minute
+    report = benchmark(lambda: simulate(synthetic_runs(1)))
+    assert report.steps == 1440
+    benchmark.extra_info["steps"] = report.steps
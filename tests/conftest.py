@@ -0,0 +1,37 @@
+import json
+import os
+import sys
+
+import pytest
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+sys.path.insert(0, FIXTURES)
+
+from simulator import TouchSimulator  # noqa: E402
+
+from okopilote.boilers.okofen.touch4.touch import BaseTouch  # noqa: E402
+
+# Manual scripts, run against a Touch or tests/fixtures/server.py
+collect_ignore = ["test_touch.py", "test_boiler.py"]
+
+
+@pytest.fixture
+def simulator():
+    """Simulated Touch without throttle nor latency."""
+    with TouchSimulator(delay=0.0) as sim:
+        yield sim
+
+
+def payload(name):
+    """Return the decoded JSON payload of fixture name."""
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return json.loads(f.read().decode("ISO-8859-1"))
+
+
+@pytest.fixture
+def touch():
+    """Touch holding the meta data and data of fixtures, without a server."""
+    touch = BaseTouch("http://localhost:3938", "mypass123")
+    touch._store_meta(payload("all+meta"))
+    touch._store_data("all", payload("all"))
+    return touch
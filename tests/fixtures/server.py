@@ -10,7 +10,11 @@ Body is a binay encoded ISO-8859-1 JSON payload.
 """
 
 import json
-from http.server import BaseHTTPRequestHandler, HTTPServer
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Directory of the downloaded payloads
+FIXTURES = os.path.dirname(os.path.abspath(__file__))
 
 
 class MyHandler(BaseHTTPRequestHandler):
@@ -18,10 +22,10 @@ class MyHandler(BaseHTTPRequestHandler):
     protocol_version = "HTTP/1.1"
 
     # Get initial data from downloaded files
-    with open("all", "rb") as f:
+    with open(os.path.join(FIXTURES, "all"), "rb") as f:
         data = json.loads(f.read().decode(encoding="ISO-8859-1"))
 
-    with open("all+meta", "rb") as f:
+    with open(os.path.join(FIXTURES, "all+meta"), "rb") as f:
         data_meta = json.loads(f.read().decode(encoding="ISO-8859-1"))
 
     def do_GET(self):
@@ -42,6 +46,8 @@ class MyHandler(BaseHTTPRequestHandler):
         except ValueError:
             self._send_syntax_error()
         else:
+            if value.lstrip("-").isdigit():
+                value = int(value)
             try:
                 self.data[section][attr] = value
             except KeyError as e:
@@ -53,7 +59,7 @@ class MyHandler(BaseHTTPRequestHandler):
         try:
             section, attr = target.split(".")
         except ValueError:
-            self._send_syntax_error()
+            self._parse_section(target)
         else:
             try:
                 data = json.dumps({section: {attr: self.data[section][attr]}})
@@ -62,6 +68,14 @@ class MyHandler(BaseHTTPRequestHandler):
             else:
                 self._send_data(data)
 
+    def _parse_section(self, target):
+        try:
+            data = json.dumps({target: self.data[target]})
+        except KeyError as e:
+            self.send_error(500, explain=f"Key not found: {e}")
+        else:
+            self._send_data(data)
+
     def _parse_target(self, target):
         if target == "all":
             self._send_data(json.dumps(self.data))
@@ -86,11 +100,11 @@ class MyHandler(BaseHTTPRequestHandler):
     def _send_syntax_error(self):
         self.send_error(
             400,
-            explain='Supported path syntax is: "/" PASSWD "/" ( "all" [ "?" ] | ATTRIBUTE [ "=" VALUE ] )',
+            explain='Supported path syntax is: "/" PASSWD "/" ( "all" [ "?" ] | SECTION | ATTRIBUTE [ "=" VALUE ] )',
         )
 
 
-def run(server_class=HTTPServer):
+def run(server_class=ThreadingHTTPServer):
     print("Start mocked Oekofen JSON interface V4.00b on 0.0.0.0:3938")
     server_address = ("", 3938)
     httpd = server_class(server_address, MyHandler)
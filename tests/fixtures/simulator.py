@@ -0,0 +1,212 @@
+"""
+Simulate Pelletronic Touch v4 devices - Oekofen JSON Interface V4.00b - for
+load and latency testing.
+
+Unlike server.py, a simulated Touch:
+- rejects requests sent less than delay seconds after the previous one with
+  401 "Wait at least Nms during requests", as the real Touch does;
+- rejects wrong passwords with 401;
+- answers after a random latency, and drops some connections;
+- has its own data, so that many devices run side by side on separate ports.
+Randomness is seeded for reproducible runs.
+"""
+
+import argparse
+import copy
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+from server import MyHandler
+
+
+class SimulatedHandler(MyHandler):
+
+    # Set by TouchSimulator on per device subclasses
+    simulator = None
+
+    def log_message(self, format, *args):
+        if self.simulator.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        sim = self.simulator
+        try:
+            empty, passwd, target = self.path.split("/")
+        except ValueError:
+            self._send_syntax_error()
+            return
+        if empty:
+            self._send_syntax_error()
+            return
+        reply = sim.admit(passwd)
+        if reply == "drop":
+            self.close_connection = True
+            return
+        if reply is not None:
+            self._send(401, reply)
+            return
+        sim.wait_latency()
+        self._parse_target(target)
+
+    def _send_data(self, data):
+        self._send(200, data)
+
+    def _send(self, code, text):
+        body = text.encode(encoding="ISO-8859-1")
+        # Headers and body in one write: no delayed ACK between them
+        head = (
+            f"HTTP/1.1 {code} {self.responses[code][0]}\r\n"
+            f"Date: {self.date_time_string()}\r\n"
+            f"Content-length: {len(body)}\r\n\r\n"
+        )
+        # The request ends before the client may receive the response, not
+        # after: the client would otherwise send the next one too early
+        self.simulator.request_done()
+        self.wfile.write(head.encode("ISO-8859-1") + body)
+
+
+class TouchSimulator:
+    """
+    Simulated Touch serving on port (0: any free port). delay is the minimum
+    time in seconds between requests (0: no throttle), latency the (min, max)
+    reply time and drop_rate the ratio of connections dropped.
+    """
+
+    def __init__(
+        self,
+        port=0,
+        password="mypass123",
+        delay=2.5,
+        latency=(0.0, 0.0),
+        drop_rate=0.0,
+        seed=0,
+        verbose=False,
+    ):
+        self.password = password
+        self.delay = delay
+        self.latency = latency
+        self.drop_rate = drop_rate
+        self.verbose = verbose
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._last_end = -float("inf")
+        # Counters
+        self.requests = 0
+        self.throttled = 0
+        self.dropped = 0
+        handler = type(
+            "Handler",
+            (SimulatedHandler,),
+            {
+                "simulator": self,
+                "data": copy.deepcopy(MyHandler.data),
+                "data_meta": copy.deepcopy(MyHandler.data_meta),
+            },
+        )
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def data(self):
+        """Current device data: {device: {attr: value}}."""
+        return self.httpd.RequestHandlerClass.data
+
+    def admit(self, password):
+        """
+        Return None to serve a request, "drop" to drop its connection, or the
+        text of a 401 rejection.
+        """
+
+        with self._lock:
+            self.requests += 1
+            if self.drop_rate and self._random.random() < self.drop_rate:
+                self.dropped += 1
+                return "drop"
+            if self.password is not None and password != self.password:
+                return "Wrong password"
+            now = time.monotonic()
+            if now - self._last_end < self.delay:
+                self.throttled += 1
+                self._last_end = now
+                return f"Wait at least {round(self.delay * 1000)}ms during requests"
+            return None
+
+    def wait_latency(self):
+        with self._lock:
+            latency = self._random.uniform(*self.latency)
+        if latency > 0:
+            time.sleep(latency)
+
+    def request_done(self):
+        with self._lock:
+            self._last_end = time.monotonic()
+
+    def start(self):
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def start_fleet(count, **kwargs):
+    """Start count simulated Touch on separate ports; see TouchSimulator."""
+    return [TouchSimulator(**kwargs).start() for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=3938, help="first port")
+    parser.add_argument("--devices", type=int, default=1)
+    parser.add_argument("--password", default="mypass123")
+    parser.add_argument("--delay", type=float, default=2.5, help="throttle (s)")
+    parser.add_argument(
+        "--latency", type=float, nargs=2, default=(0.0, 0.0), help="min max (s)"
+    )
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+    simulators = [
+        TouchSimulator(
+            port=args.port + i,
+            password=args.password,
+            delay=args.delay,
+            latency=tuple(args.latency),
+            drop_rate=args.drop_rate,
+            seed=args.seed + i,
+            verbose=args.verbose,
+        ).start()
+        for i in range(args.devices)
+    ]
+    for sim in simulators:
+        print(f"Simulated Touch on {sim.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        for sim in simulators:
+            sim.stop()
+
+
+if __name__ == "__main__":
+    main()
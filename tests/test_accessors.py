@@ -0,0 +1,43 @@
+import pytest
+
+from okopilote.boilers.okofen.touch4.touch import TouchError
+
+from .conftest import payload
+
+
+def test_properties_apply_factors(touch):
+    data = payload("all")
+    assert touch.room_t == pytest.approx(data["hk1"]["L_roomtemp_act"] * 0.1)
+    assert touch.boiler_flow_t == pytest.approx(data["pe1"]["L_temp_act"] * 0.1)
+    assert touch.room_t_set_round(19.04) == 19.0
+
+
+def test_accessors_follow_data(touch):
+    touch._store_data("hk1", {"hk1": {"L_roomtemp_act": 215}})
+    assert touch.room_t == pytest.approx(21.5)
+    touch._data["hk1"].pop("L_roomtemp_act")
+    with pytest.raises(TouchError):
+        touch.room_t
+
+
+def test_accessors_are_recompiled_with_meta(touch):
+    meta = payload("all+meta")
+    meta["hk1"]["L_roomtemp_act"]["factor"] = 0.5
+    touch._store_meta(meta)
+    touch._store_data("all", payload("all"))
+    assert touch.room_t == payload("all")["hk1"]["L_roomtemp_act"] * 0.5
+
+
+def test_expiring_values_are_checked_on_read(touch):
+    touch.default_ttl = 60.0
+    touch._compile_accessors()
+    refreshed = []
+    touch._refresh_on_read = lambda: refreshed.append(True)
+    touch._fetched["hk1", "L_roomtemp_act"] -= 120
+    touch.room_t
+    assert refreshed
+
+
+def test_read_only_property(touch):
+    with pytest.raises(AttributeError):
+        touch.room_t = 20.0
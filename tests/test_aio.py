@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("okopilote.devices.common")
+
+from simulator import TouchSimulator  # noqa: E402
+
+from okopilote.boilers.okofen.touch4.aio import AsyncBoiler, AsyncTouch  # noqa: E402
+from okopilote.boilers.okofen.touch4.touch import TouchUnavailable  # noqa: E402
+
+
+def test_stalled_touch_serves_last_known_values(simulator):
+    async def main():
+        touch = await AsyncTouch.open(
+            simulator.url, simulator.password, timeout=(1.0, 0.2)
+        )
+        boiler = AsyncBoiler(touch)
+        await boiler.acquire()
+        room_t = touch.room_t
+        # The Touch stops answering in time
+        simulator.latency = (1.0, 1.0)
+        await boiler.acquire()
+        await boiler.close()
+        return boiler, room_t
+
+    boiler, room_t = asyncio.run(main())
+    assert boiler.stale
+    assert isinstance(boiler.acquire_error, asyncio.TimeoutError)
+    assert boiler.touch.room_t == room_t
+
+
+def test_failed_probe_stops_queued_requests(simulator):
+    async def main():
+        touch = await AsyncTouch.open(
+            simulator.url, simulator.password, timeout=(1.0, 0.2)
+        )
+        breaker = touch.breaker
+        for _ in range(breaker.threshold):
+            breaker.record_failure()
+        # Backoff over: the next request probes the stalled Touch
+        breaker._retry_at = 0.0
+        simulator.latency = (1.0, 1.0)
+        loads = (touch.load_data("hk1") for _ in range(3))
+        errors = await asyncio.gather(*loads, return_exceptions=True)
+        await touch.close()
+        return breaker, errors
+
+    breaker, errors = asyncio.run(main())
+    # Only the probe was sent
+    assert breaker.failures == breaker.threshold + 1
+    assert sum(isinstance(e, TouchUnavailable) for e in errors) == 2
+
+
+def test_touches_of_a_device_share_its_throttle():
+    with TouchSimulator(delay=0.05) as sim:
+
+        async def main():
+            touches = [await AsyncTouch.open(sim.url, sim.password) for _ in range(2)]
+            await asyncio.gather(*(t.load_data() for t in touches for _ in range(3)))
+            for touch in touches:
+                await touch.close()
+
+        asyncio.run(main())
+        # The throttle is learnt from the first rejection, then respected
+        assert sim.throttled <= 1
+
+
+def test_adaptive_polling_skips_polls(simulator):
+    async def main():
+        touch = await AsyncTouch.open(simulator.url, simulator.password)
+        boiler = AsyncBoiler(touch, adaptive_polling=True)
+        await boiler.acquire()
+        requests = simulator.requests
+        await boiler.acquire()
+        await boiler.close()
+        return boiler, requests
+
+    boiler, requests = asyncio.run(main())
+    assert simulator.requests == requests
+    assert boiler.poller.skipped == 1
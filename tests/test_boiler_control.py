@@ -0,0 +1,55 @@
+import configparser
+import socket
+import threading
+from urllib.request import urlopen
+
+import pytest
+
+pytest.importorskip("okopilote.devices.common")
+
+from okopilote.boilers.okofen.touch4.boiler import Boiler, from_conf  # noqa: E402
+
+
+@pytest.fixture(params=[False, True], ids=["polling", "adaptive"])
+def refusing(simulator, request):
+    """Boiler whose heating circuit is off: it refuses control."""
+    simulator.data["hk1"]["mode_auto"] = 0
+    boiler = Boiler(simulator.url, simulator.password, adaptive_polling=request.param)
+    boiler.acquire()
+    yield boiler
+    boiler.close()
+
+
+def test_refusal_is_answered_without_requests(refusing):
+    requests = refusing.touch.scheduler.requests
+    threads = threading.active_count()
+    assert not refusing.accept_control
+    assert not refusing.accept_control_with_age()[2]
+    assert refusing.touch.scheduler.requests == requests
+    assert threading.active_count() == threads
+
+
+def test_refusal_is_confirmed_by_acquire(refusing):
+    refusing.confirm_delay = 0.0
+    assert not refusing.accept_control
+    refusing.acquire()
+    assert refusing.accept_control_with_age()[2]
+
+
+def test_metrics_are_served_until_close(simulator):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    conf = configparser.ConfigParser()
+    conf["boiler"] = {
+        "url": simulator.url,
+        "password": simulator.password,
+        "metrics_port": str(port),
+    }
+    boiler = from_conf(conf["boiler"])
+    boiler.acquire()
+    with urlopen(f"http://127.0.0.1:{port}/metrics") as r:
+        assert b"touch4_requests_total" in r.read()
+    boiler.close()
+    with pytest.raises(OSError):
+        urlopen(f"http://127.0.0.1:{port}/metrics", timeout=1)
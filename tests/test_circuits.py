@@ -0,0 +1,83 @@
+import pytest
+
+from okopilote.boilers.okofen.touch4.circuits import KeepUnits
+from okopilote.boilers.okofen.touch4.touch import BaseTouch, TouchError
+
+PUMP = {"val": 0, "format": "0:Off|1:On"}
+TEMP = {"val": 200, "unit": "°C", "factor": 0.1}
+META = {
+    "system": {"L_ambient": TEMP},
+    "hk10": {"L_pump": PUMP},
+    "hk1": {"L_pump": PUMP},
+    "hk2": {"L_pump": PUMP},
+    "pe1": {"L_state": {"val": 99}, "L_temp_act": TEMP, "L_temp_set": TEMP},
+    "pe2": {"L_state": {"val": 99}, "L_temp_act": TEMP, "L_temp_set": TEMP},
+}
+
+
+@pytest.fixture(params=[False, True], ids=["dict", "compact"])
+def touch(request):
+    touch = BaseTouch("http://localhost:3938", "mypass123", compact=request.param)
+    touch._store_meta(META)
+    touch._store_data(
+        "all",
+        {
+            "hk1": {"L_pump": 0},
+            "hk2": {"L_pump": 1},
+            "hk10": {"L_pump": 0},
+            "pe1": {"L_state": 99, "L_temp_act": 450, "L_temp_set": 0},
+            "pe2": {"L_state": 99, "L_temp_act": 750, "L_temp_set": 700},
+        },
+    )
+    return touch
+
+
+def test_units_are_discovered_in_number_order(touch):
+    assert dict(touch.circuits) == {1: "hk1", 2: "hk2", 10: "hk10"}
+    assert touch.burners.devices == ["pe1", "pe2"]
+    assert touch.burners.names(["L_state"]) == ["pe1.L_state", "pe2.L_state"]
+
+
+def test_values_have_factors_applied(touch):
+    assert list(touch.circuits.values("L_pump")) == [0, 1, 0]
+    assert list(touch.burners.values("L_temp_act")) == pytest.approx([45.0, 75.0])
+
+
+def test_decisions_over_every_unit(touch):
+    assert touch.circuits.pumping()
+    assert not touch.burners.fired()
+    # pe2 is hotter than 70 and its setpoint
+    assert touch.burners.hot(70)
+    assert not touch.burners.hot(80)
+    touch._store_data("pe1", {"pe1": {"L_state": 4}})
+    assert touch.burners.fired()
+
+
+def test_missing_values_are_errors(touch):
+    touch._store_meta(dict(META, hk3={"L_pump": PUMP}))
+    with pytest.raises(TouchError, match="hk3.L_pump"):
+        touch.circuits.pumping()
+    with pytest.raises(TouchError):
+        touch.burners.values("L_modulation")
+
+
+def test_keep_units():
+    keep = KeepUnits({"system": ["L_ambient"]})
+    assert "hk7" in keep and keep["pe3"] is None
+    assert keep["system"] == ["L_ambient"]
+    assert "ww1" not in keep
+
+
+def test_boiler_delivers_heat_through_its_circuit(simulator):
+    pytest.importorskip("okopilote.devices.common")
+    from okopilote.boilers.okofen.touch4.boiler import Boiler
+
+    simulator.httpd.RequestHandlerClass.data_meta["hk2"] = {"L_pump": dict(PUMP)}
+    simulator.data["hk2"] = {"L_pump": 1}
+    simulator.data["hk1"]["L_pump"] = 0
+    boiler = Boiler(simulator.url, simulator.password)
+    boiler.acquire()
+    # hk2 pumps, but heat is forced on hk1
+    assert boiler.touch.circuits.pumping()
+    assert not boiler.delivering_heat
+    boiler.close()
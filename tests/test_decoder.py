@@ -0,0 +1,59 @@
+import json
+import os
+
+import pytest
+
+from okopilote.boilers.okofen.touch4.decoder import (
+    PayloadError,
+    decode,
+    decode_sections,
+)
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+def split(payload, size):
+    return [payload[i : i + size] for i in range(0, len(payload), size)]
+
+
+@pytest.mark.parametrize("name", ["all", "all+meta"])
+@pytest.mark.parametrize("size", [1, 7, 4096])
+def test_chunks_decode_like_whole_payload(name, size):
+    payload = fixture(name)
+    assert decode_sections(split(payload, size)) == decode(payload)
+
+
+def test_keep_drops_sections_and_attributes():
+    payload = fixture("all")
+    data = decode_sections(split(payload, 5), {"hk1": {"temp_heat"}, "pe1": None})
+    assert data == {
+        "hk1": {"temp_heat": decode(payload)["hk1"]["temp_heat"]},
+        "pe1": decode(payload)["pe1"],
+    }
+
+
+def test_numbers_split_between_chunks():
+    assert decode_sections([b'{"a": {"b": 12', b'34}, "c": 5', b"6}"]) == {
+        "a": {"b": 1234},
+        "c": 56,
+    }
+
+
+def test_iso_8859_1_text():
+    payload = json.dumps({"hk1": {"L_statetext": "Mode arrêt"}}, ensure_ascii=False)
+    chunks = split(payload.encode("ISO-8859-1"), 3)
+    assert decode_sections(chunks)["hk1"]["L_statetext"] == "Mode arrêt"
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [b"", b"[1]", b'{"a": {"b": 1}', b'{"a" {"b": 1}}', b'{"a": {"b": 1},}', b"{"],
+)
+def test_malformed_payloads(payload):
+    with pytest.raises(PayloadError):
+        decode_sections(split(payload, 2))
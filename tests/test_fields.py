@@ -0,0 +1,79 @@
+import pytest
+
+from okopilote.boilers.okofen.touch4.fields import Device, Field
+from okopilote.boilers.okofen.touch4.touch import Touch, TouchError
+
+from .conftest import payload
+
+
+def test_field_kinds():
+    number = Field("hk1", "temp_heat", {"val": 190, "factor": 0.1, "min": 100})
+    assert (number.kind, number.factor, number.minimum) == ("number", 0.1, 100)
+    assert number.writable
+    choice = Field("hk1", "L_pump", {"val": 0, "format": "0:Off|1:On|x:Bad"})
+    assert choice.kind == "choice" and not choice.writable
+    assert choice.choices == {0: "Off", 1: "On"}
+    assert choice.label(1) == "On" and choice.label(7) is None
+    assert Field("hk1", "name", {"val": ""}).kind == "text"
+    assert Field("hk1", "L_statetext", "Heating").kind == "text"
+    assert number.round(19.04999) == 19.0
+
+
+def test_devices_are_attributes_of_touch(touch):
+    assert isinstance(touch.hk1, Device)
+    assert touch.hk1 is touch.device("hk1")
+    assert "temp_heat" in dir(touch.hk1)
+    assert "hk_info" not in dir(touch.hk1)
+    with pytest.raises(AttributeError):
+        touch.hk9
+    with pytest.raises(AttributeError):
+        touch._hk1
+    with pytest.raises(ValueError):
+        touch.device("hk9")
+
+
+def test_attributes_are_read_through_fields(touch):
+    assert touch.hk1.temp_heat == pytest.approx(19.0)
+    assert touch.hk1.L_pump == 0
+    assert isinstance(touch.hk1.L_statetext, str)
+    with pytest.raises(AttributeError):
+        touch.hk1.hk_info
+    with pytest.raises(AttributeError):
+        touch.hk1.unknown
+
+
+def test_fields_are_built_on_first_use(touch):
+    assert len(touch._fields) == 0
+    touch.hk1.temp_heat
+    touch.hk1.temp_heat
+    assert len(touch._fields) == 1
+    field = touch.field("hk1.temp_heat")
+    assert field is touch._fields.get("hk1", "temp_heat")
+    assert touch.field("room_t_set").name == "hk1.temp_heat"
+    with pytest.raises(ValueError):
+        touch.field("hk1.unknown")
+    # Meta data reloaded: fields are rebuilt
+    touch._store_meta(payload("all+meta"))
+    assert len(touch._fields) == 0
+
+
+def test_missing_values_are_errors(touch):
+    del touch._data["hk1"]["temp_heat"]
+    with pytest.raises(TouchError):
+        touch.hk1.temp_heat
+
+
+def test_attributes_are_written(simulator):
+    touch = Touch(simulator.url, simulator.password)
+    touch.load_data("hk1")
+    touch.hk1.temp_setback = 16.5
+    assert simulator.data["hk1"]["temp_setback"] == 165
+    assert touch.hk1.temp_setback == pytest.approx(16.5)
+    with pytest.raises(ValueError):
+        # Range: 10 to 40 °C
+        touch.hk1.temp_setback = 45.0
+    with pytest.raises(AttributeError):
+        touch.hk1.L_pump = 1
+    with pytest.raises(AttributeError):
+        touch.hk1.L_statetext = "Off"
+    touch.close()
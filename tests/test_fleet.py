@@ -0,0 +1,40 @@
+import pytest
+
+pytest.importorskip("okopilote.devices.common")
+
+from simulator import TouchSimulator  # noqa: E402
+
+from okopilote.boilers.okofen.touch4.boiler import Boiler  # noqa: E402
+from okopilote.boilers.okofen.touch4.fleet import FleetPoller  # noqa: E402
+
+
+def test_unreachable_boiler_is_reported_stale():
+    with TouchSimulator(delay=0.0) as up, TouchSimulator(delay=0.0) as down:
+        boilers = {
+            "up": Boiler(up.url, up.password),
+            "down": Boiler(down.url, down.password),
+        }
+        fleet = FleetPoller(boilers, deadline=5.0)
+        snapshot = fleet.poll()
+        assert snapshot.stale == []
+        down.drop_rate = 1.0
+        snapshot = fleet.poll()
+        assert boilers["down"].stale
+        assert snapshot.stale == ["down"]
+        result = snapshot.devices["down"]
+        assert isinstance(result.error, OSError)
+        assert result.data is not None
+        assert snapshot.devices["up"].error is None
+        fleet.close()
+        for boiler in boilers.values():
+            boiler.close()
+
+
+def test_poll_reports_touch_data(simulator):
+    boiler = Boiler(simulator.url, simulator.password)
+    fleet = FleetPoller({"boiler": boiler})
+    result = fleet.poll().devices["boiler"]
+    assert not result.stale
+    assert result.data["hk1"]["temp_heat"] == simulator.data["hk1"]["temp_heat"]
+    fleet.close()
+    boiler.close()
@@ -0,0 +1,132 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from okopilote.boilers.okofen.touch4.gateway import Gateway
+from okopilote.boilers.okofen.touch4.meta_cache import MetaCache
+from okopilote.boilers.okofen.touch4.touch import Touch
+
+# Meta data of a Touch with a single device
+MINIMAL_META = {"hk1": {"temp_heat": {"val": 190, "factor": 0.1}}}
+
+
+def fetch(gateway, query):
+    url = f"{gateway.url}/{gateway.password}/{query}"
+    with urllib.request.urlopen(url) as response:
+        return response.read().decode("iso-8859-1")
+
+
+def get(gateway, query):
+    return json.loads(fetch(gateway, query))
+
+
+@pytest.fixture
+def touch(simulator):
+    touch = Touch(simulator.url, simulator.password, transport="socket")
+    yield touch
+    touch.close()
+
+
+def test_cached_meta_are_reloaded(simulator, tmp_path):
+    cache = MetaCache(str(tmp_path))
+    cache.save(simulator.url, MINIMAL_META)
+    touch = Touch(simulator.url, simulator.password, meta_cache=cache)
+    assert touch._meta.keys() == MINIMAL_META.keys()
+    with Gateway(touch, port=0) as gateway:
+        meta = get(gateway, "all?")
+    touch.close()
+    assert meta.keys() == simulator.httpd.RequestHandlerClass.data_meta.keys()
+
+
+def test_trimming_touch_is_refused(simulator):
+    touch = Touch(simulator.url, simulator.password, keep=[])
+    with pytest.raises(ValueError):
+        Gateway(touch, port=0)
+    touch.close()
+
+
+def test_unreachable_touch_without_data(simulator, touch):
+    simulator.drop_rate = 1.0
+    with Gateway(touch, port=0) as gateway:
+        with pytest.raises(urllib.error.HTTPError) as error:
+            get(gateway, "all")
+    assert error.value.code == 503
+
+
+def test_unreachable_touch_with_data(simulator, touch):
+    with Gateway(touch, port=0, max_age=0.0) as gateway:
+        data = get(gateway, "hk1.temp_heat")
+        simulator.drop_rate = 1.0
+        assert get(gateway, "hk1.temp_heat") == data
+        with pytest.raises(urllib.error.HTTPError) as error:
+            get(gateway, "pe1")
+    assert error.value.code == 503
+
+
+def test_writes_are_coalesced(simulator, touch):
+    with Gateway(touch, port=0, write_delay=60.0) as gateway:
+        assert get(gateway, "hk1.temp_heat") == {"hk1": {"temp_heat": 190}}
+        for raw in ("200", "210"):
+            assert fetch(gateway, f"hk1.temp_heat={raw}") == f"hk1.temp_heat={raw}"
+        assert touch.pending_writes() == ["hk1.temp_heat=210"]
+        # Reads send pending writes first
+        assert get(gateway, "hk1")["hk1"]["temp_heat"] == 210
+    assert simulator.data["hk1"]["temp_heat"] == 210
+    assert gateway.stats["sent"] == 1
+
+
+@pytest.mark.parametrize(
+    "write",
+    ["hk1.temp_heat=19.5", "hk1.unknown=1", "hk1.L_statetext=1", "hk1.L_pump=1"],
+)
+def test_bad_writes(touch, write):
+    with Gateway(touch, port=0) as gateway:
+        with pytest.raises(urllib.error.HTTPError) as error:
+            fetch(gateway, write)
+    assert error.value.code == 400
+
+
+def test_public_touch_api(touch):
+    assert not touch.loaded("hk1.temp_heat")
+    touch.load_data("hk1")
+    assert touch.loaded("hk1") and touch.loaded("hk1.temp_heat")
+    assert not touch.loaded("pe1")
+    assert touch.resolve("room_t_set") == ("hk1", "temp_heat")
+    assert touch.cached("hk1.temp_heat") == {"hk1": {"temp_heat": 190}}
+    with touch.transaction():
+        touch.set_raw("hk1.temp_heat", 200)
+        assert touch.buffering
+        assert touch.room_t_set == pytest.approx(20.0)
+        assert touch.pending_writes() == ["hk1.temp_heat=200"]
+    assert not touch.buffering
+    for name in ("hk1.L_statetext", "hk1.L_pump"):
+        with pytest.raises(ValueError):
+            touch.set_raw(name, 1)
+
+
+def test_cached_reads_do_not_wait_for_loads(simulator, touch):
+    with Gateway(touch, port=0, max_age=60.0) as gateway:
+        data = get(gateway, "hk1.temp_heat")
+        simulator.latency = (0.5, 0.5)
+        load = threading.Thread(target=get, args=(gateway, "pe1"))
+        load.start()
+        time.sleep(0.1)
+        start = time.monotonic()
+        assert get(gateway, "hk1.temp_heat") == data
+        assert time.monotonic() - start < 0.3
+        load.join()
+    assert gateway.stats["hits"] == 1
+
+
+def test_meta_carry_last_loaded_values(simulator, touch):
+    with Gateway(touch, port=0) as gateway:
+        assert get(gateway, "all?")["hk1"]["temp_heat"]["val"] == 190
+        fetch(gateway, "hk1.temp_heat=200")
+        gateway.flush()
+        meta = get(gateway, "all?")
+    assert meta["hk1"]["temp_heat"]["val"] == 200
+    assert touch.meta["hk1"]["temp_heat"]["val"] == 190
@@ -0,0 +1,160 @@
+import threading
+
+import pytest
+
+from okopilote.boilers.okofen.touch4.history import Change, ChangeLog, History
+from okopilote.boilers.okofen.touch4.touch import BaseTouch
+
+META = {
+    "hk1": {
+        "L_roomtemp_act": {"val": 190, "unit": "°C", "factor": 0.1},
+        "L_pump": {"val": 0, "format": "0:Off|1:On"},
+    },
+    "pe1": {"L_state": {"val": 99, "format": "1:Start|4:Burning|99:Off"}},
+}
+
+
+class ClockTouch(BaseTouch):
+    """Touch without I/O whose clock is set by tests."""
+
+    time = 0.0
+
+    def _clock(self):
+        return self.time
+
+
+@pytest.fixture
+def touch():
+    touch = ClockTouch("http://localhost:3938", "mypass123", history=3)
+    touch._store_meta(META)
+    return touch
+
+
+def load(touch, time, **hk1):
+    touch.time = time
+    touch._store_data("hk1", {"hk1": hk1})
+    touch._notify()
+
+
+def test_history_is_bounded():
+    history = History(2)
+    for time, value in enumerate([10, 11, 12]):
+        history.record("hk1", "temp_heat", time, value)
+    assert history.samples("hk1", "temp_heat") == [(1, 11), (2, 12)]
+    assert history.samples("hk1", "temp_heat", since=2) == [(2, 12)]
+    history.resize(3)
+    history.record("hk1", "temp_heat", 3, 13)
+    assert len(history.samples("hk1", "temp_heat")) == 3
+
+
+def test_trends(touch):
+    for time, value in [(0, 190), (60, 196), (120, 202)]:
+        load(touch, time, L_roomtemp_act=value)
+    assert touch.slope("room_t") == pytest.approx(0.01)
+    assert touch.history("room_t", max_age=60) == [
+        (60, pytest.approx(19.6)),
+        (120, pytest.approx(20.2)),
+    ]
+    load(touch, 180, L_roomtemp_act=202)
+    assert touch.held_for("room_t") == 60
+
+
+def test_subscribers_get_changes(touch):
+    received = []
+    touch.subscribe(received.extend, names=["room_t"])
+    load(touch, 0, L_roomtemp_act=190, L_pump=0)
+    load(touch, 60, L_roomtemp_act=190, L_pump=1)
+    load(touch, 120, L_roomtemp_act=195)
+    assert [(c.name, c.old, c.new) for c in received] == [
+        ("hk1.L_roomtemp_act", None, 190),
+        ("hk1.L_roomtemp_act", 190, 195),
+    ]
+
+
+def test_change_log_versions_and_diff():
+    log = ChangeLog(size=2)
+    assert log.append([Change("hk1", "L_pump", 0, 1, 0)]) == 1
+    log.append([Change("hk1", "L_pump", 1, 0, 1)])
+    log.append([Change("pe1", "L_state", 99, 4, 2)])
+    assert log.diff(0) == {("pe1", "L_state"): (99, 4)}
+    assert log.diff(1, 2) == {("hk1", "L_pump"): (1, 0)}
+    changes, version, dropped = log.since(2)
+    assert [c.name for c in changes] == ["pe1.L_state"]
+    assert version == 3 and not dropped
+
+
+def test_cursors_read_at_their_own_pace():
+    log = ChangeLog(size=1)
+    all_changes, pumps = log.cursor(), log.cursor({("hk1", None)})
+    log.append([Change("hk1", "L_pump", 0, 1, 0), Change("pe1", "L_state", 99, 4, 0)])
+    assert len(all_changes.read()) == 2
+    assert all_changes.read() == []
+    for time in range(1, 4):
+        log.append([Change("pe1", "L_state", 4, 99 + time, time)])
+    # Older changes were dropped before pumps read them
+    assert pumps.read() == []
+    assert pumps.lost
+    with pytest.raises(LookupError):
+        log.diff(0)
+
+
+def test_touch_cursor(touch):
+    cursor = touch.cursor(names=["hk1.L_pump"])
+    load(touch, 0, L_pump=1, L_roomtemp_act=190)
+    assert [c.name for c in cursor.read()] == ["hk1.L_pump"]
+    assert touch.change_log.version == 1
+
+
+def test_diff_merges_changes():
+    log = ChangeLog()
+    log.append([Change("hk1", "L_pump", 0, 1, 0)])
+    log.append([Change("hk1", "L_pump", 1, 0, 1), Change("pe1", "L_state", 99, 1, 1)])
+    log.append([Change("pe1", "L_state", 1, 4, 2)])
+    # The pump is back to off: no change
+    assert log.diff(0) == {("pe1", "L_state"): (99, 4)}
+    assert log.diff(3) == {}
+    assert log.since(3) == ([], 3, False)
+
+
+def test_cursors_resync_after_losses():
+    log = ChangeLog(size=1)
+    cursor = log.cursor()
+    for time in range(4):
+        log.append([Change("pe1", "L_state", time, time + 1, time)])
+    cursor.read()
+    assert cursor.lost
+    log.append([Change("pe1", "L_state", 4, 5, 4)])
+    assert [c.new for c in cursor.read()] == [5]
+    assert not cursor.lost
+
+
+def test_cursors_miss_no_change_of_concurrent_loads():
+    log = ChangeLog(size=100000)
+    cursor = log.cursor()
+
+    def load(device):
+        for time in range(1000):
+            log.append([Change(device, "L_state", time, time + 1, time)])
+
+    threads = [threading.Thread(target=load, args=(f"pe{n}",)) for n in (1, 2)]
+    for thread in threads:
+        thread.start()
+    read = []
+    while any(thread.is_alive() for thread in threads):
+        read.extend(cursor.read())
+    read.extend(cursor.read())
+    assert len(read) == 2000
+    for device in ("pe1", "pe2"):
+        assert [c.new for c in read if c.device == device] == list(range(1, 1001))
+
+
+def test_touch_cursor_watches_devices(touch):
+    cursor = touch.cursor(names=["pe1"])
+    touch.time = 0
+    touch._store_data("all", {"hk1": {"L_pump": 1}, "pe1": {"L_state": 4}})
+    touch._notify()
+    assert [c.name for c in cursor.read()] == ["pe1.L_state"]
+    assert touch.change_log.diff(0) == {
+        ("hk1", "L_pump"): (None, 1),
+        ("pe1", "L_state"): (None, 4),
+    }
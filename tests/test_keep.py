@@ -0,0 +1,106 @@
+import threading
+import time
+
+import pytest
+
+from okopilote.boilers.okofen.touch4.meta_cache import MetaCache
+from okopilote.boilers.okofen.touch4.touch import Touch
+from okopilote.boilers.okofen.touch4.transport import SocketTransport
+
+# Properties besides the float ones
+PROPERTIES = ["boiler_fired", "hc_op_mode", "hc_pumping"]
+
+
+def full_meta(simulator):
+    return simulator.httpd.RequestHandlerClass.data_meta
+
+
+def test_keep_covers_properties(simulator):
+    touch = Touch(simulator.url, simulator.password, keep=[])
+    touch.load_data()
+    for name, _, _, _ in touch._dyn_props:
+        getattr(touch, name)
+    for name in PROPERTIES:
+        getattr(touch, name)
+    touch.close()
+
+
+def test_keep_keeps_units_meta_whole(simulator):
+    touch = Touch(simulator.url, simulator.password, keep=[])
+    meta = full_meta(simulator)
+    for device in ("hk1", "pe1"):
+        assert touch._meta[device].keys() == meta[device].keys()
+    touch.close()
+
+
+def test_trimmed_boiler_decides(simulator):
+    pytest.importorskip("okopilote.devices.common")
+    from okopilote.boilers.okofen.touch4.boiler import Boiler
+
+    boiler = Boiler(simulator.url, simulator.password, trim=True)
+    boiler.acquire()
+    for name in ["accept_control", "generating_heat", "heat_available"]:
+        getattr(boiler, name)
+    boiler.touch.load_data()
+    for name in PROPERTIES:
+        getattr(boiler.touch, name)
+    boiler.close()
+
+
+def test_trimmed_meta_are_not_cached(simulator, tmp_path):
+    cache = MetaCache(str(tmp_path))
+    touch = Touch(simulator.url, simulator.password, keep=[], meta_cache=cache)
+    touch.close()
+    assert cache.load(touch.url) is None
+    touch = Touch(simulator.url, simulator.password, meta_cache=cache)
+    touch.close()
+    assert cache.load(touch.url) == full_meta(simulator)
+
+
+class ExclusiveTransport(SocketTransport):
+    """Socket transport counting overlapping uses, with slow bodies."""
+
+    def __init__(self):
+        super().__init__()
+        self.busy = False
+        self.overlaps = 0
+
+    def get(self, url, stream=False):
+        if self.busy:
+            self.overlaps += 1
+        self.busy = True
+        response = super().get(url, stream)
+        chunks, close = response._chunks, response._close
+
+        def slow_chunks(size):
+            for chunk in chunks(size):
+                time.sleep(0.01)
+                yield chunk
+
+        def end():
+            self.busy = False
+            if close is not None:
+                close()
+
+        if chunks is not None:
+            response._chunks = slow_chunks
+        response._close = end
+        return response
+
+
+def test_streamed_bodies_are_read_within_the_slot(simulator):
+    transport = ExclusiveTransport()
+    touch = Touch(simulator.url, simulator.password, keep=[], transport=transport)
+
+    def load():
+        for _ in range(5):
+            touch.load_data()
+
+    threads = [threading.Thread(target=load) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    touch.close()
+    assert transport.overlaps == 0
+    assert touch.scheduler.last_network_time >= 0.01
@@ -0,0 +1,76 @@
+import copy
+import json
+import os
+
+from okopilote.boilers.okofen.touch4.meta_cache import MetaCache, interface_version
+from okopilote.boilers.okofen.touch4.touch import Touch
+
+
+def full_meta(simulator):
+    return simulator.httpd.RequestHandlerClass.data_meta
+
+
+def test_cached_meta_spare_the_query(simulator, tmp_path):
+    cache = MetaCache(str(tmp_path))
+    Touch(simulator.url, simulator.password, meta_cache=cache).close()
+    requests = simulator.requests
+    touch = Touch(simulator.url, simulator.password, meta_cache=cache)
+    assert simulator.requests == requests
+    assert touch._meta == full_meta(simulator)
+    touch.load_data()
+    assert touch._meta_from_cache
+    touch.close()
+
+
+def test_interface_version_of_meta_and_data(simulator):
+    data = simulator.data
+    meta = full_meta(simulator)
+    assert interface_version(meta) == interface_version(data)
+    changed = copy.deepcopy(data)
+    del changed["hk1"]["temp_heat"]
+    assert interface_version(changed) != interface_version(meta)
+
+
+def test_meta_of_another_firmware_are_reloaded(simulator, tmp_path):
+    cache = MetaCache(str(tmp_path))
+    meta = copy.deepcopy(full_meta(simulator))
+    # Attribute removed by a firmware update: data never lack it otherwise
+    meta["hk1"]["L_removed"] = {"val": 0, "factor": 1}
+    cache.save(simulator.url, meta)
+    touch = Touch(simulator.url, simulator.password, meta_cache=cache)
+    assert "L_removed" in touch._meta["hk1"]
+    touch.load_data()
+    touch.close()
+    assert "L_removed" not in touch._meta["hk1"]
+    assert cache.load(touch.url) == full_meta(simulator)
+
+
+def test_stale_entry_is_ignored(simulator, tmp_path):
+    cache = MetaCache(str(tmp_path), max_age=60)
+    cache.save(simulator.url, full_meta(simulator))
+    (path,) = tmp_path.iterdir()
+    with open(path) as f:
+        entry = json.load(f)
+    entry["saved"] -= 120
+    with open(path, "w") as f:
+        json.dump(entry, f)
+    assert cache.load(simulator.url) is None
+
+
+def test_unreadable_entries_are_ignored(simulator, tmp_path):
+    cache = MetaCache(str(tmp_path))
+    cache.save(simulator.url, full_meta(simulator))
+    (path,) = tmp_path.iterdir()
+    with open(path, "w") as f:
+        f.write("{")
+    assert cache.load(simulator.url) is None
+    # Entry of meta data not matching its interface version
+    cache.save(simulator.url, full_meta(simulator))
+    with open(path) as f:
+        entry = json.load(f)
+    entry["interface"] = "V4.00b"
+    with open(path, "w") as f:
+        json.dump(entry, f)
+    assert cache.load(simulator.url) is None
+    cache.invalidate(simulator.url)
+    assert not os.listdir(tmp_path)
@@ -0,0 +1,36 @@
+import pytest
+
+pytest.importorskip("okopilote.devices.common")
+
+from okopilote.boilers.okofen.touch4.boiler import Boiler  # noqa: E402
+
+
+@pytest.fixture
+def boiler(simulator):
+    boiler = Boiler(simulator.url, simulator.password, adaptive_polling=True)
+    boiler.acquire()
+    yield boiler
+    boiler.close()
+
+
+def test_forcing_state_follows_force_and_release(boiler):
+    assert boiler.poller.current_state() != "forcing"
+    boiler.force_heating()
+    assert boiler.poller.current_state() == "forcing"
+    boiler.acquire()
+    assert boiler.poller.state == "forcing"
+    boiler.release_heating()
+    assert boiler.force_room_t_set is None
+    assert boiler.poller.current_state() != "forcing"
+    # The end of forcing is a state change: polled at once
+    assert boiler.poller.due() == 0.0
+    boiler.acquire()
+    assert boiler.poller.state != "forcing"
+    assert boiler.poller.due() > 0.0
+
+
+def test_release_twice(boiler):
+    boiler.force_heating()
+    boiler.release_heating()
+    boiler.release_heating()
+    assert not boiler.forcing
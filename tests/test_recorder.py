@@ -0,0 +1,123 @@
+import csv
+import io
+import math
+
+import pytest
+
+from okopilote.boilers.okofen.touch4.recorder import (
+    Recorder,
+    iter_log,
+    open_log,
+    to_csv,
+    to_parquet,
+)
+from okopilote.boilers.okofen.touch4.touch import BaseTouch
+
+META = {
+    "hk1": {
+        "L_roomtemp_act": {"val": 190, "unit": "°C", "factor": 0.1},
+        "L_statetext": "Heating",
+    },
+}
+
+
+def touch_with(meta, **hk1):
+    touch = BaseTouch("http://localhost:3938", "mypass123")
+    touch._store_meta(meta)
+    touch._store_data("hk1", {"hk1": hk1})
+    return touch
+
+
+@pytest.fixture
+def log(tmp_path):
+    """Log of three polls: two with META, one with a pump added."""
+
+    recorder = Recorder(str(tmp_path), batch=2)
+    recorder.record(touch_with(META, L_roomtemp_act=190, L_statetext="Off"), 10)
+    recorder.record(touch_with(META, L_roomtemp_act=195), 20)
+    meta = {"hk1": dict(META["hk1"], L_pump={"val": 0, "format": "0:Off|1:On"})}
+    touch = touch_with(meta, L_roomtemp_act=200, L_statetext="Heating", L_pump=1)
+    recorder.record(touch, 30)
+    recorder.close()
+    return str(tmp_path)
+
+
+def test_polls_are_read_back(log):
+    segments = open_log(log)
+    assert len(segments) == 2
+    polls = list(iter_log(segments))
+    assert [time for time, _, _ in polls] == [10, 20, 30]
+    assert polls[0][2].get_value("hk1", "L_statetext") == "Off"
+    # Values not polled are missing, not carried over
+    with pytest.raises(KeyError):
+        polls[1][2].get_value("hk1", "L_statetext")
+    assert polls[2][2].get_value("hk1", "L_pump") == 1
+    assert [time for time, _, _ in iter_log(segments, start=15, end=30)] == [20]
+
+
+def test_columns(log):
+    segment = next(s for s in open_log(log) if len(s) == 2)
+    assert list(segment.times()) == [10, 20]
+    assert list(segment.column("hk1", "L_roomtemp_act")) == [190, 195]
+    assert segment.column("hk1", "L_statetext") == ["Off", None]
+    with pytest.raises(KeyError):
+        segment.column("hk1", "L_pump")
+
+
+def test_unflushed_polls_are_not_read(tmp_path):
+    recorder = Recorder(str(tmp_path), batch=2)
+    recorder.record(touch_with(META, L_roomtemp_act=190), 10)
+    assert [len(segment) for segment in open_log(str(tmp_path))] == [0]
+    recorder.flush()
+    assert [len(segment) for segment in open_log(str(tmp_path))] == [1]
+
+
+def test_torn_row_is_dropped_on_append(tmp_path):
+    recorder = Recorder(str(tmp_path))
+    recorder.record(touch_with(META, L_roomtemp_act=190, L_statetext="Off"), 10)
+    recorder.close()
+    # Crash while writing the second row
+    (rows,) = tmp_path.glob("*.rows")
+    with open(rows, "ab") as f:
+        f.write(b"\0" * 12)
+    recorder = Recorder(str(tmp_path))
+    recorder.record(touch_with(META, L_roomtemp_act=195, L_statetext="Heating"), 20)
+    recorder.close()
+    polls = list(iter_log(open_log(str(tmp_path))))
+    assert [time for time, _, _ in polls] == [10, 20]
+    assert polls[1][2].get_value("hk1", "L_roomtemp_act") == 195
+    assert polls[1][2].get_value("hk1", "L_statetext") == "Heating"
+
+
+def test_csv_export(log):
+    f = io.StringIO()
+    to_csv(log, f)
+    f.seek(0)
+    rows = [(r["hk1.L_pump"], r["hk1.L_statetext"]) for r in csv.DictReader(f)]
+    assert rows == [("", "Off"), ("", ""), ("1", "Heating")]
+
+
+def test_parquet_export(log, tmp_path):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "touch4.parquet")
+    to_parquet(log, path)
+    table = parquet.read_table(path).to_pydict()
+    assert table["time"] == [10, 20, 30]
+    assert table["hk1.L_roomtemp_act"] == [190, 195, 200]
+    assert table["hk1.L_statetext"] == ["Off", None, "Heating"]
+    assert table["hk1.L_pump"][0] is None or math.isnan(table["hk1.L_pump"][0])
+
+
+def test_replay(log):
+    pytest.importorskip("okopilote.devices.common")
+    from okopilote.boilers.okofen.touch4.replay import ReplayTouch
+
+    touch = ReplayTouch(log)
+    try:
+        temps = []
+        while not touch.exhausted:
+            touch.load_data("hk1")
+            temps.append((touch.time, touch.room_t))
+        assert temps == [(10, 19.0), (20, 19.5), (30, 20.0)]
+    finally:
+        touch.close()
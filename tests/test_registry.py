@@ -0,0 +1,80 @@
+import logging
+
+import pytest
+
+from okopilote.boilers.okofen.touch4.meta_cache import MetaCache
+from okopilote.boilers.okofen.touch4.registry import get_touch, release_touch
+from okopilote.boilers.okofen.touch4.snapshot import Snapshot
+from okopilote.boilers.okofen.touch4.transport import SocketTransport
+
+# Settings of a Boiler, see boiler module
+BOILER_SETTINGS = {
+    "ttl": {"hk1.temp_heat": 300.0},
+    "timeout": (3.0, 10.0),
+    "compact": True,
+    "keep": ["pe1.L_temp_set"],
+    "history": 10,
+    "transport": "socket",
+}
+
+
+def test_same_settings_share_silently(simulator, tmp_path, caplog):
+    url, password = simulator.url, simulator.password
+    first = get_touch(url, password, meta_cache=MetaCache(str(tmp_path)))
+    with caplog.at_level(logging.WARNING):
+        second = get_touch(url, password, meta_cache=MetaCache(str(tmp_path)), ttl={})
+    assert second is first
+    assert caplog.records == []
+    release_touch(second)
+    release_touch(first)
+
+
+@pytest.mark.parametrize("boiler_first", [True, False], ids=["boiler", "sensor"])
+def test_settings_do_not_depend_on_order(simulator, tmp_path, boiler_first):
+    url, password = simulator.url, simulator.password
+    cache = MetaCache(str(tmp_path))
+    users = [
+        lambda: get_touch(url, password, meta_cache=cache, **BOILER_SETTINGS),
+        lambda: get_touch(url, password, readonly=True, meta_cache=cache),
+    ]
+    if not boiler_first:
+        users.reverse()
+    touch = users[0]()
+    assert users[1]() is touch
+    touch.load_data()
+    assert touch.ttl == BOILER_SETTINGS["ttl"]
+    assert touch.timeout == BOILER_SETTINGS["timeout"]
+    assert isinstance(touch.transport, SocketTransport)
+    assert isinstance(touch._data, Snapshot)
+    assert touch._history.size == 10
+    assert ("pe1", "L_temp_set") in touch.keep
+    assert not dict(touch._data.get("ww1", {}))
+    assert touch.meta_cache is cache
+    assert not touch.readonly
+    release_touch(touch)
+    release_touch(touch)
+
+
+def test_compatible_settings_merge(simulator):
+    url, password = simulator.url, simulator.password
+    first = get_touch(url, password, ttl={"hk1": 30.0}, keep=["ww1"], history=5)
+    second = get_touch(url, password, ttl={"pe1": 5.0}, keep=["pe1"], history=20)
+    assert second is first
+    assert first.ttl == {"hk1": 30.0, "pe1": 5.0}
+    assert ("ww1", None) in first.keep and ("pe1", None) in first.keep
+    assert first._history.size == 20
+    # Meta data trimmed by the first keep are loaded again
+    assert "pe1" in first._meta
+    release_touch(second)
+    release_touch(first)
+
+
+def test_conflicting_settings_raise(simulator):
+    url, password = simulator.url, simulator.password
+    first = get_touch(url, password, ttl={"room_t": 30.0}, timeout=(3, 10))
+    with pytest.raises(ValueError, match="room_t"):
+        get_touch(url, password, ttl={"room_t": 5.0})
+    with pytest.raises(ValueError, match="timeout"):
+        get_touch(url, password, timeout=(5, 5))
+    assert first.ttl == {"room_t": 30.0}
+    release_touch(first)
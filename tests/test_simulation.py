@@ -0,0 +1,36 @@
+import logging
+import threading
+
+import pytest
+
+pytest.importorskip("okopilote.devices.common")
+
+from okopilote.boilers.okofen.touch4.simulation import (  # noqa: E402
+    _log_level,
+    simulate,
+    synthetic_runs,
+)
+
+
+def test_simulation_is_quiet(caplog):
+    with caplog.at_level(logging.INFO):
+        report = simulate(synthetic_runs(1, steps=240), room_t_set_max=19.0)
+    assert report.writes > 0
+    assert caplog.records == []
+
+
+def test_simulation_log_level(caplog):
+    with caplog.at_level(logging.INFO):
+        simulate(synthetic_runs(1, steps=240), log_level=logging.INFO)
+    assert caplog.records
+    assert logging.getLogger("okopilote.boilers.okofen.touch4.boiler").level == 0
+
+
+def test_other_threads_log_during_runs(caplog):
+    logger = logging.getLogger("okopilote.boilers.okofen.touch4.boiler")
+    with caplog.at_level(logging.INFO), _log_level(logging.ERROR):
+        logger.info("simulated")
+        thread = threading.Thread(target=logger.info, args=("live",))
+        thread.start()
+        thread.join()
+    assert [r.getMessage() for r in caplog.records] == ["live"]
@@ -0,0 +1,69 @@
+import pytest
+
+from okopilote.boilers.okofen.touch4.snapshot import Schema, Snapshot
+from okopilote.boilers.okofen.touch4.touch import BaseTouch
+
+from .conftest import payload
+
+
+@pytest.fixture
+def schema():
+    return Schema.from_meta(payload("all+meta"))
+
+
+def test_schema_splits_numbers_and_strings(schema):
+    assert ("hk1", "temp_heat") in schema.numeric
+    assert ("hk1", "L_statetext") in schema.strings
+    assert ("hk1", "hk_info") not in schema.index
+    assert Schema.from_meta(payload("all+meta")).fingerprint == schema.fingerprint
+
+
+def test_snapshot_round_trips_data(schema):
+    data = payload("all")
+    snapshot = Snapshot.from_data(schema, data)
+    assert snapshot.to_dict() == data
+    restored = Snapshot.from_bytes(schema, snapshot.to_bytes())
+    assert restored.to_dict() == data
+
+
+def test_missing_and_extra_values(schema):
+    snapshot = Snapshot(schema)
+    assert dict(snapshot["hk1"]) == {}
+    with pytest.raises(KeyError):
+        snapshot.get_value("hk1", "temp_heat")
+    # Values not fitting the schema are kept aside
+    snapshot["hk1"]["temp_heat"] = "n/a"
+    snapshot.setdefault("zz1")["new"] = 1
+    assert snapshot["hk1"]["temp_heat"] == "n/a"
+    assert snapshot["zz1"]["new"] == 1
+    snapshot["hk1"]["temp_heat"] = 190
+    assert snapshot.extra["hk1"] == {}
+    del snapshot["hk1"]["temp_heat"]
+    assert "temp_heat" not in snapshot["hk1"]
+
+
+def test_diff(schema):
+    snapshot = Snapshot.from_data(schema, payload("all"))
+    other = snapshot.copy()
+    assert snapshot.diff(other) == []
+    other["hk1"]["temp_heat"] = 200
+    other["hk1"]["L_statetext"] = "Mode confort"
+    assert snapshot.diff(other) == [("hk1", "L_statetext"), ("hk1", "temp_heat")]
+    assert snapshot["hk1"]["temp_heat"] == payload("all")["hk1"]["temp_heat"]
+    with pytest.raises(ValueError):
+        snapshot.diff(Snapshot(Schema([], [])))
+
+
+def test_compact_touch_reads_like_dict_touch():
+    touches = []
+    for compact in (False, True):
+        touch = BaseTouch("http://localhost:3938", "mypass123", compact=compact)
+        touch._store_meta(payload("all+meta"))
+        touch._store_data("all", payload("all"))
+        touches.append(touch)
+    dict_touch, compact_touch = touches
+    assert isinstance(compact_touch._data, Snapshot)
+    for name, _, _, _ in BaseTouch._dyn_props:
+        assert getattr(compact_touch, name) == getattr(dict_touch, name)
+    assert compact_touch.hc_op_mode is dict_touch.hc_op_mode
+    assert compact_touch.snapshot().to_dict() == dict_touch.snapshot().to_dict()
@@ -28,9 +28,9 @@ for attr in [
     print(attr, "=", getattr(p, attr))
 
 # p.readonly = False
-print("temp_heat:", p._data["hk1"]["temp_heat"])
+print("temp_heat:", p.hk1.temp_heat)
 p.room_t_set -= 0.1
-print("temp_heat:", p._data["hk1"]["temp_heat"])
+print("temp_heat:", p.hk1.temp_heat)
 print("Set operation mode to HEATING")
 p.hc_op_mode = OpMode.HEATING
 sleep(2)
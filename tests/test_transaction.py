@@ -0,0 +1,67 @@
+import pytest
+
+from okopilote.boilers.okofen.touch4.touch import OpMode, Touch, TouchError
+
+
+@pytest.fixture
+def touch(simulator):
+    touch = Touch(simulator.url, simulator.password)
+    touch.load_data()
+    yield touch
+    touch.close()
+
+
+def test_unchanged_value_is_not_written(simulator, touch):
+    requests = simulator.requests
+    touch.room_t_set = touch.room_t_set
+    assert simulator.requests == requests
+
+
+def test_writes_are_coalesced(simulator, touch):
+    requests = simulator.requests
+    with touch.transaction():
+        touch.room_t_set = 19.0
+        touch.room_t_set = 19.5
+        touch.hc_op_mode = OpMode.HEATING
+        assert simulator.requests == requests
+    assert simulator.requests == requests + 2
+    assert simulator.data["hk1"]["temp_heat"] == 195
+    assert simulator.data["hk1"]["mode_auto"] == OpMode.HEATING.value
+
+
+def test_restored_value_is_not_written(simulator, touch):
+    requests = simulator.requests
+    room_t_set = touch.room_t_set
+    with touch.transaction():
+        touch.room_t_set = room_t_set + 1
+        touch.room_t_set = room_t_set
+    assert simulator.requests == requests
+    assert touch.room_t_set == room_t_set
+
+
+def test_rollback_restores_cache(simulator, touch):
+    room_t_set = touch.room_t_set
+    with pytest.raises(RuntimeError):
+        with touch.transaction():
+            touch.room_t_set = room_t_set + 1
+            raise RuntimeError
+    assert touch.room_t_set == room_t_set
+    assert not touch._buffering()
+
+
+def test_failed_commit_restores_unsent_values(simulator, touch):
+    room_t_set, op_mode = touch.room_t_set, touch.hc_op_mode
+    # Setting unknown to the simulated Touch: its write fails
+    touch._meta["hk9"] = {"temp_heat": {"val": 0, "factor": 0.1}}
+    touch.begin()
+    touch.room_t_set = room_t_set + 1
+    touch._set("hk9", "temp_heat", 20.0)
+    touch.hc_op_mode = OpMode.SET_BACK
+    with pytest.raises(TouchError):
+        touch.commit()
+    # Sent before the failure
+    assert touch.room_t_set == room_t_set + 1
+    # Not sent
+    assert "temp_heat" not in touch._data.get("hk9", {})
+    assert touch.hc_op_mode is op_mode
+    assert not touch._buffering()
@@ -0,0 +1,104 @@
+import socketserver
+import threading
+import time
+
+import pytest
+
+from okopilote.boilers.okofen.touch4.touch import (
+    Touch,
+    TouchError,
+    TouchUnavailable,
+    get_breaker,
+)
+from okopilote.boilers.okofen.touch4.transport import ResponseHead
+
+
+class GarbageHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.rfile.readline()
+        self.wfile.write(b"Garbage\r\n\r\n")
+
+
+class DroppingHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.rfile.readline()
+        # Slow enough for other requests to queue up
+        time.sleep(0.2)
+
+
+@pytest.fixture
+def dropping():
+    """URL of a server closing connections without answering."""
+    with socketserver.ThreadingTCPServer(("127.0.0.1", 0), DroppingHandler) as server:
+        server.daemon_threads = True
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+        server.shutdown()
+
+
+@pytest.fixture
+def garbage():
+    """URL of a server answering something else than HTTP."""
+    with socketserver.ThreadingTCPServer(("127.0.0.1", 0), GarbageHandler) as server:
+        server.daemon_threads = True
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+        server.shutdown()
+
+
+@pytest.mark.parametrize("line", [b"Garbage\r\n", b"HTTP/1.1 OK\r\n"])
+def test_malformed_status_lines(line):
+    with pytest.raises(TouchError) as info:
+        ResponseHead(line)
+    # Handled like a lost connection
+    assert isinstance(info.value, ConnectionError)
+
+
+@pytest.mark.parametrize("transport", ["requests", "socket"])
+def test_malformed_responses_are_request_failures(garbage, transport):
+    # What Boiler.acquire() handles as an unreachable Touch
+    with pytest.raises(OSError):
+        Touch(garbage, "mypass123", transport=transport)
+    assert get_breaker(garbage).failures == 1
+
+
+def test_boiler_serves_last_values_on_malformed_responses(simulator, garbage):
+    pytest.importorskip("okopilote.devices.common")
+    from okopilote.boilers.okofen.touch4.boiler import Boiler
+
+    boiler = Boiler(simulator.url, simulator.password, transport="socket")
+    boiler.acquire()
+    boiler.touch.api_url = f"{garbage}/{simulator.password}/"
+    boiler.acquire()
+    assert boiler.stale
+    assert isinstance(boiler.acquire_error, TouchError)
+    boiler.close()
+
+
+def test_failed_probe_stops_queued_requests(simulator, dropping):
+    touch = Touch(simulator.url, simulator.password, transport="socket")
+    touch.api_url = f"{dropping}/{simulator.password}/"
+    breaker = touch.breaker
+    for _ in range(breaker.threshold):
+        breaker.record_failure()
+    # Backoff over: the next request probes the Touch
+    breaker._retry_at = 0.0
+    errors = []
+
+    def load():
+        try:
+            touch.load_data("hk1")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=load) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    touch.close()
+    # Only the probe was sent
+    assert breaker.failures == breaker.threshold + 1
+    assert sum(isinstance(e, TouchUnavailable) for e in errors) == 2